@@ -0,0 +1,103 @@
+import pygame
+
+# pygame subsystems and how to start them. pygame.init() starts all of them,
+# including audio and joystick, which a headless server or tool never needs.
+SUBSYSTEMS = {
+    "display": (pygame.display.init, pygame.display.get_init),
+    "font": (pygame.font.init, pygame.font.get_init),
+    "mixer": (pygame.mixer.init, pygame.mixer.get_init),
+    "joystick": (pygame.joystick.init, pygame.joystick.get_init),
+}
+
+# What each way of running the code needs
+MODE_SUBSYSTEMS = {
+    "client": ("display", "font"),
+    "tools": ("font",),
+    "server": (),
+}
+
+fonts = {}
+images = {}
+
+
+def init_subsystems(*names):
+    # Asks pygame rather than remembering, so this still works after pygame.quit()
+    for name in names:
+        init, get_init = SUBSYSTEMS[name]
+        if not get_init():
+            init()
+
+
+def init_mode(mode):
+    init_subsystems(*MODE_SUBSYSTEMS[mode])
+
+
+def clear_caches():
+    fonts.clear()
+    images.clear()
+
+
+def get_font(size, name=None):
+    # Fonts are built on first use and shared by every screen that asks
+    key = (name, size)
+    font = fonts.get(key)
+    if font is None:
+        init_subsystems("font")
+        if not fonts:
+            # Fonts from before a pygame.quit() can't be used again
+            pygame.register_quit(clear_caches)
+        font = pygame.font.Font(name, size)
+        fonts[key] = font
+    return font
+
+
+def get_image(path, alpha=True):
+    image = images.get(path)
+    if image is None:
+        image = pygame.image.load(path)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if alpha else image.convert()
+        images[path] = image
+    return image
+
+
+def preload(font_sizes=(), image_paths=()):
+    # Warm the caches during a loading screen instead of on first draw
+    for size in font_sizes:
+        get_font(size)
+    for path in image_paths:
+        get_image(path)
+
+
+if __name__ == "__main__":
+    import os
+    import subprocess
+    import sys
+
+    # Each measurement runs in a fresh interpreter so nothing is cached
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+
+    def measure(code, runs=5):
+        best = None
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", code], cwd=here, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            value = float(output.strip().splitlines()[-1])
+            best = value if best is None else min(best, value)
+        return best * 1000
+
+    def timed(setup, body):
+        # Script printing how long body takes after setup has run
+        return f"import time\n{setup}\nstart = time.perf_counter()\n{body}\nprint(time.perf_counter() - start)"
+
+    for label, setup, body in (("import pygame", "", "import pygame"),
+                               ("pygame.init()", "import pygame", "pygame.init()"),
+                               ("init_mode('client')", "import assets", "assets.init_mode('client')"),
+                               ("init_mode('server')", "import assets", "assets.init_mode('server')")):
+        print(f"{label:22s} {measure(timed(setup, body)):7.1f}ms")
+    for module, game_class in (("gamedemo", "Game"), ("towergame", "Game"),
+                               ("pointandclick", "PointClickGame"), ("pointnclickad", "HybridGame")):
+        imported = measure(timed("", f"import {module}"))
+        started = measure(timed("", f"import {module}\n{module}.{game_class}()"))
+        print(f"{module:15s} import {imported:7.1f}ms   startup {started:7.1f}ms")
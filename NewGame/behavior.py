@@ -0,0 +1,260 @@
+import numpy as np
+
+# Leaf results
+SUCCESS = 0
+FAILURE = 1
+RUNNING = 2
+
+# Node kinds
+SEQUENCE = 0
+SELECTOR = 1
+INVERT = 2
+LEAF = 3
+
+COMPOSITES = {"sequence": SEQUENCE, "selector": SELECTOR, "invert": INVERT}
+LEAF_KINDS = ("condition", "action")
+
+# next_leaf value once the root has finished
+DONE = -1
+
+
+class CompiledTree:
+    # A tree written as nested tuples, e.g.
+    #   ("selector", [
+    #       ("sequence", [("condition", "target_within", 120), ("action", "charge", 30)]),
+    #       ("action", "roam"),
+    #   ])
+    # flattened depth-first into arrays. Leaves name functions in `leaves`,
+    # called as fn(context, agents, elapsed, *args) with index arrays of the
+    # agents at that leaf and how many ticks each has been running it; they
+    # return a status per agent (or one status for all).
+    #
+    # Passing a result up through sequences, selectors and inverters never
+    # runs a leaf, so it is worked out once here: next_leaf[node, status] is
+    # the leaf to run next, or DONE with the root's result in root_status.
+    def __init__(self, tree, leaves):
+        self.kinds = []
+        self.parents = []
+        self.children = []
+        self.functions = []
+        self.args = []
+        self.names = []
+        self._add(tree, -1, leaves)
+        count = len(self.kinds)
+        self.root_leaf = self.first_leaf(0)
+        self.next_leaf = np.full((count, 2), DONE, dtype=np.int32)
+        self.root_status = np.zeros((count, 2), dtype=np.int8)
+        for node in range(count):
+            for status in (SUCCESS, FAILURE):
+                self.next_leaf[node, status], self.root_status[node, status] = self._resolve(node, status)
+
+    def _add(self, spec, parent, leaves):
+        kind_name = spec[0]
+        index = len(self.kinds)
+        self.parents.append(parent)
+        self.children.append([])
+        if kind_name in COMPOSITES:
+            kind = COMPOSITES[kind_name]
+            self.kinds.append(kind)
+            self.functions.append(None)
+            self.args.append(())
+            self.names.append(kind_name)
+            children = spec[1]
+            if not children or (kind == INVERT and len(children) != 1):
+                raise ValueError(f"bad child count for {kind_name} node")
+            for child in children:
+                self.children[index].append(self._add(child, index, leaves))
+        elif kind_name in LEAF_KINDS:
+            name = spec[1]
+            if name not in leaves:
+                raise ValueError(f"unknown behavior leaf {name!r}")
+            self.kinds.append(LEAF)
+            self.functions.append(leaves[name])
+            self.args.append(tuple(spec[2:]))
+            self.names.append(name)
+        else:
+            raise ValueError(f"unknown behavior node {kind_name!r}")
+        return index
+
+    def first_leaf(self, node):
+        while self.kinds[node] != LEAF:
+            node = self.children[node][0]
+        return node
+
+    def _resolve(self, node, status):
+        while True:
+            parent = self.parents[node]
+            if parent == -1:
+                return DONE, status
+            kind = self.kinds[parent]
+            siblings = self.children[parent]
+            position = siblings.index(node)
+            has_next = position + 1 < len(siblings)
+            if kind == SEQUENCE and status == SUCCESS and has_next:
+                return self.first_leaf(siblings[position + 1]), status
+            if kind == SELECTOR and status == FAILURE and has_next:
+                return self.first_leaf(siblings[position + 1]), status
+            if kind == INVERT:
+                status = FAILURE if status == SUCCESS else SUCCESS
+            node = parent
+
+
+class BehaviorGroup:
+    # Agents sharing one compiled tree. Each agent remembers the leaf it was
+    # running, so a tick resumes there instead of walking down from the root,
+    # and all agents standing on the same leaf are handed to it in one call.
+    def __init__(self, tree, context, count):
+        self.tree = tree
+        self.context = context
+        self.count = count
+        self.running = np.full(count, DONE, dtype=np.int32)
+        self.elapsed = np.zeros(count, dtype=np.int32)
+        self.results = np.zeros(count, dtype=np.int8)  # Root result from each agent's last finished pass
+        self.passes = 0
+
+    def reset(self, agents=None):
+        if agents is None:
+            agents = slice(None)
+        self.running[agents] = DONE
+        self.elapsed[agents] = 0
+
+    def tick(self, agents=None, frames=1):
+        # frames: how many ticks' worth of time passes, for running leaves' elapsed counts
+        tree = self.tree
+        active = np.arange(self.count) if agents is None else np.asarray(agents)
+        nodes = self.running[active]
+        nodes[nodes == DONE] = tree.root_leaf
+        self.passes = 0
+        # Every pass moves each agent to a later leaf in depth-first order,
+        # so this ends after at most one pass per leaf
+        while active.size:
+            self.passes += 1
+            statuses = np.empty(active.size, dtype=np.int8)
+            order = np.argsort(nodes, kind="stable")
+            ordered = nodes[order]
+            starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+            ends = np.r_[starts[1:], ordered.size]
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                leaf = int(ordered[start])
+                picked = order[start:end]
+                agents_at_leaf = active[picked]
+                statuses[picked] = tree.functions[leaf](self.context, agents_at_leaf,
+                                                        self.elapsed[agents_at_leaf], *tree.args[leaf])
+            running = statuses == RUNNING
+            still_running = active[running]
+            self.running[still_running] = nodes[running]
+            self.elapsed[still_running] += frames
+            finished = ~running
+            active = active[finished]
+            nodes = nodes[finished]
+            statuses = statuses[finished]
+            self.elapsed[active] = 0
+            following = tree.next_leaf[nodes, statuses]
+            done = following == DONE
+            self.running[active[done]] = DONE
+            self.results[active[done]] = tree.root_status[nodes[done], statuses[done]]
+            active = active[~done]
+            nodes = following[~done]
+
+
+if __name__ == "__main__":
+    import time
+
+    # 10,000 agents on four trees, with leaves vectorized over NumPy state
+    class World:
+        def __init__(self, count, seed=0):
+            rng = np.random.default_rng(seed)
+            self.positions = rng.uniform(0, 2000, size=(count, 2)).astype(np.float32)
+            self.headings = rng.uniform(-1, 1, size=(count, 2)).astype(np.float32)
+            self.speeds = np.full(count, 2.0, dtype=np.float32)
+            self.players = rng.uniform(0, 2000, size=(4, 2)).astype(np.float32)
+            self.shots = 0
+
+        def offsets(self, agents):
+            # Vector to the nearest player
+            delta = self.players[None, :, :] - self.positions[agents, None, :]
+            nearest = (delta * delta).sum(axis=2).argmin(axis=1)
+            return delta[np.arange(len(agents)), nearest]
+
+    def player_within(world, agents, elapsed, radius):
+        delta = world.offsets(agents)
+        return np.where((delta * delta).sum(axis=1) <= radius * radius, SUCCESS, FAILURE)
+
+    def approach(world, agents, elapsed, speed):
+        delta = world.offsets(agents)
+        length = np.maximum(np.sqrt((delta * delta).sum(axis=1)), 1e-6)
+        world.headings[agents] = delta / length[:, None]
+        world.speeds[agents] = speed
+        return SUCCESS
+
+    def flee(world, agents, elapsed, speed):
+        approach(world, agents, elapsed, speed)
+        world.headings[agents] *= -1
+        return SUCCESS
+
+    def wander(world, agents, elapsed):
+        turning = np.random.random(len(agents)) < 0.05
+        world.headings[agents[turning]] = np.random.uniform(-1, 1, size=(int(turning.sum()), 2))
+        world.speeds[agents] = 1.0
+        return SUCCESS
+
+    def wait(world, agents, elapsed, ticks):
+        world.speeds[agents] = 0.0
+        return np.where(elapsed >= ticks, SUCCESS, RUNNING)
+
+    def shoot(world, agents, elapsed):
+        world.shots += len(agents)
+        return SUCCESS
+
+    leaves = {"player_within": player_within, "approach": approach, "flee": flee,
+              "wander": wander, "wait": wait, "shoot": shoot}
+    trees = [
+        # Grunt: chase anyone close, otherwise wander
+        ("selector", [
+            ("sequence", [("condition", "player_within", 300), ("action", "approach", 2.5)]),
+            ("action", "wander"),
+        ]),
+        # Archer: back off when crowded, shoot and reload in range, else close in
+        ("selector", [
+            ("sequence", [("condition", "player_within", 80), ("action", "flee", 3.0)]),
+            ("sequence", [("condition", "player_within", 250), ("action", "shoot"), ("action", "wait", 20)]),
+            ("action", "approach", 2.0),
+        ]),
+        # Brute: charge, then rest whether or not it connected
+        ("sequence", [
+            ("condition", "player_within", 400),
+            ("action", "approach", 5.0),
+            ("action", "wait", 30),
+            ("action", "approach", 1.0),
+            ("action", "wait", 60),
+        ]),
+        # Coward: runs from anything it can see
+        ("selector", [
+            ("sequence", [("invert", [("condition", "player_within", 200)]), ("action", "wander")]),
+            ("action", "flee", 2.5),
+        ]),
+    ]
+    agents = 10000
+    world = World(agents)
+    compiled = [CompiledTree(tree, leaves) for tree in trees]
+    per_tree = agents // len(trees)
+    groups = []
+    for i, tree in enumerate(compiled):
+        # Each group's context is a view of its slice of the shared world
+        view = World(0)
+        view.positions = world.positions[i * per_tree:(i + 1) * per_tree]
+        view.headings = world.headings[i * per_tree:(i + 1) * per_tree]
+        view.speeds = world.speeds[i * per_tree:(i + 1) * per_tree]
+        view.players = world.players
+        groups.append(BehaviorGroup(tree, view, per_tree))
+    ticks = 300
+    start = time.perf_counter()
+    passes = 0
+    for _ in range(ticks):
+        for group in groups:
+            group.tick()
+            passes += group.passes
+        world.positions += world.headings * world.speeds[:, None]
+    elapsed = time.perf_counter() - start
+    print(f"{agents} agents on {len(trees)} trees: {elapsed / ticks * 1000:.2f}ms/tick "
+          f"({elapsed / ticks / agents * 1e9:.0f}ns/agent, {passes / ticks:.1f} leaf passes/tick)")
@@ -0,0 +1,208 @@
+import asyncio
+import math
+import multiprocessing
+import random
+import time
+
+import pygame
+
+import gamedemo
+from netserver import (INPUT, MSG_INPUT, MSG_JOIN, MSG_SNAPSHOT, MSG_WELCOME, SNAPSHOT, SNAPSHOT_ENEMY,
+                       SNAPSHOT_PLAYER, WELCOME, mask_from_keys, pack_message, read_message, serve_process)
+from sessions import ATTACK_KEY, ATTACK_RANGE, TICK_RATE
+
+# Limits a sweep step must stay within; the driver exits non-zero otherwise
+BUDGET = {
+    "tick_p99_ms": 1000.0 / TICK_RATE,
+    "latency_p99_ms": 50.0,
+    "bytes_per_client_per_second": 16 * 1024,
+}
+
+BEHAVIORS = ("wander", "door_runner", "fighter")
+
+_doors = None
+
+
+def room_doors():
+    # Door centers per room, taken from the same layout the server builds
+    global _doors
+    if _doors is None:
+        _doors = {room_id: [door.rect.center for door in room.doors]
+                  for room_id, room in gamedemo.build_rooms().items()}
+    return _doors
+
+
+def keys_toward(x, y, target_x, target_y, slack=4):
+    keys = []
+    if target_x < x - slack:
+        keys.append(pygame.K_LEFT)
+    elif target_x > x + slack:
+        keys.append(pygame.K_RIGHT)
+    if target_y < y - slack:
+        keys.append(pygame.K_UP)
+    elif target_y > y + slack:
+        keys.append(pygame.K_DOWN)
+    return keys
+
+
+class Bot:
+    # Headless client: joins a match, then answers every snapshot with the
+    # keys its behavior wants held, like a player would each frame.
+    #   wander      - random walk, changes direction now and then
+    #   door_runner - heads for a door in its room, so it keeps changing rooms
+    #   fighter     - chases the nearest enemy it can see and attacks in range
+    def __init__(self, behavior, seed=None):
+        self.behavior = behavior
+        self.rng = random.Random(seed)
+        self.match_id = None
+        self.index = None
+        self.room = 0
+        self.x = 0
+        self.y = 0
+        self.enemies = []
+        self.held = []
+        self.target = None
+        self.sequence = 0
+        self.tick = 0  # Of the newest snapshot, acked with every input
+        self.snapshots = 0
+        self.bytes_received = 0
+        self.latencies = []
+
+    def read_snapshot(self, payload):
+        tick, stamp, player_count, enemy_count = SNAPSHOT.unpack_from(payload)
+        self.tick = tick
+        self.latencies.append(time.time() - stamp)
+        offset = SNAPSHOT.size
+        for i in range(player_count):
+            room, x, y = SNAPSHOT_PLAYER.unpack_from(payload, offset)
+            if i == self.index:
+                self.room, self.x, self.y = room, x, y
+            offset += SNAPSHOT_PLAYER.size
+        self.enemies = [SNAPSHOT_ENEMY.unpack_from(payload, offset + i * SNAPSHOT_ENEMY.size)
+                        for i in range(enemy_count)]
+        self.snapshots += 1
+
+    def choose_keys(self):
+        if self.behavior == "wander":
+            if self.rng.random() < 0.05:
+                self.held = self.rng.sample((pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN),
+                                            self.rng.randint(0, 2))
+            return self.held
+        if self.behavior == "door_runner":
+            doors = room_doors().get(self.room, ())
+            if self.target not in doors:
+                self.target = self.rng.choice(doors) if doors else None
+            if self.target is None:
+                return []
+            return keys_toward(self.x, self.y, *self.target)
+        # fighter
+        if not self.enemies:
+            return []
+        target_x, target_y = min(self.enemies, key=lambda e: (e[0] - self.x) ** 2 + (e[1] - self.y) ** 2)
+        keys = keys_toward(self.x, self.y, target_x, target_y)
+        if math.hypot(target_x - self.x, target_y - self.y) <= ATTACK_RANGE:
+            keys.append(ATTACK_KEY)
+        return keys
+
+    async def run(self, host, port, duration):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(pack_message(MSG_JOIN))
+            kind, payload = await read_message(reader)
+            if kind != MSG_WELCOME:
+                return
+            self.match_id, self.index = WELCOME.unpack(payload)
+            end = time.perf_counter() + duration
+            while time.perf_counter() < end:
+                kind, payload = await asyncio.wait_for(read_message(reader), 1.0)
+                self.bytes_received += len(payload) + 3
+                if kind != MSG_SNAPSHOT:
+                    continue
+                self.read_snapshot(payload)
+                self.sequence += 1
+                mask = mask_from_keys(self.choose_keys())
+                writer.write(pack_message(MSG_INPUT, INPUT.pack(mask, self.sequence, self.tick)))
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+
+async def run_bots(port, count, duration, host="127.0.0.1", seed=0):
+    bots = [Bot(BEHAVIORS[i % len(BEHAVIORS)], seed=seed + i) for i in range(count)]
+    # Stagger the joins slightly so the server sees a ramp, not one burst
+    tasks = []
+    for bot in bots:
+        tasks.append(asyncio.create_task(bot.run(host, port, duration)))
+        await asyncio.sleep(0.002)
+    await asyncio.gather(*tasks)
+    return bots
+
+
+def load_step(bot_count, enemies_per_room, duration=5.0, tick_rate=TICK_RATE):
+    # One sweep step: a server in its own process with bot_count bots
+    # connected over loopback from this one
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe()
+    server = context.Process(target=serve_process, args=(child, tick_rate, enemies_per_room, duration + 2.0))
+    server.start()
+    try:
+        port = parent.recv()
+        bots = asyncio.run(run_bots(port, bot_count, duration))
+        stats = parent.recv()
+    finally:
+        server.join()
+    latencies = sorted(latency for bot in bots for latency in bot.latencies)
+    received = sum(bot.bytes_received for bot in bots)
+    return {
+        "bots": bot_count,
+        "enemies_per_room": enemies_per_room,
+        "matches": stats["matches"],
+        "tick_p50_ms": stats["tick_p50"] * 1000,
+        "tick_p99_ms": stats["tick_p99"] * 1000,
+        "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "bytes_per_client_per_second": received / max(1, bot_count) / duration,
+        "snapshots_dropped": stats["snapshots_dropped"],
+    }
+
+
+def over_budget(result, budget=BUDGET):
+    return [name for name, limit in budget.items() if result[name] > limit]
+
+
+def sweep(bot_counts=(4, 16, 64, 128), enemy_densities=(6, 24), duration=5.0):
+    failures = []
+    for enemies_per_room in enemy_densities:
+        for bot_count in bot_counts:
+            result = load_step(bot_count, enemies_per_room, duration)
+            exceeded = over_budget(result)
+            print(f"{bot_count:4d} bots, {enemies_per_room:3d} enemies/room, {result['matches']:3d} matches: "
+                  f"tick p50 {result['tick_p50_ms']:6.2f}ms p99 {result['tick_p99_ms']:6.2f}ms, "
+                  f"snapshot latency p50 {result['latency_p50_ms']:6.2f}ms p99 {result['latency_p99_ms']:6.2f}ms, "
+                  f"{result['bytes_per_client_per_second'] / 1024:6.1f}KB/s per client, "
+                  f"{result['snapshots_dropped']} dropped" + (f"  OVER BUDGET: {', '.join(exceeded)}" if exceeded else ""))
+            if exceeded:
+                failures.append((bot_count, enemies_per_room, exceeded))
+    return failures
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--sweep" in sys.argv:
+        failures = sweep()
+        sys.exit(1 if failures else 0)
+    # python bots.py PORT [COUNT [SECONDS]]: drive an already running server
+    port = int(args[0]) if args else 7777
+    count = int(args[1]) if len(args) > 1 else 8
+    seconds = float(args[2]) if len(args) > 2 else 10.0
+    bots = asyncio.run(run_bots(port, count, seconds))
+    latencies = sorted(latency for bot in bots for latency in bot.latencies)
+    print(f"{count} bots, {sum(bot.snapshots for bot in bots)} snapshots, latency p50 "
+          f"{percentile(latencies, 0.5) * 1000:.2f}ms p99 {percentile(latencies, 0.99) * 1000:.2f}ms")
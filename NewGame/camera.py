@@ -0,0 +1,135 @@
+import pygame
+
+# Chunks are square pieces of a room's static content, pre-rendered once
+CHUNK_SIZE = 256
+
+# Chunk surfaces unused for this many frames are dropped
+EVICT_AFTER = 180
+
+
+class Camera:
+    def __init__(self, view_width, view_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.x = 0
+        self.y = 0
+        self.world_width = view_width
+        self.world_height = view_height
+
+    def set_world(self, width, height):
+        self.world_width = width
+        self.world_height = height
+
+    def follow(self, target_x, target_y):
+        # Center on the target but never show outside the room
+        self.x = int(target_x - self.view_width // 2)
+        self.y = int(target_y - self.view_height // 2)
+        self.x = max(0, min(self.world_width - self.view_width, self.x))
+        self.y = max(0, min(self.world_height - self.view_height, self.y))
+
+    def get_rect(self):
+        return pygame.Rect(self.x, self.y, self.view_width, self.view_height)
+
+    def to_screen(self, x, y):
+        return x - self.x, y - self.y
+
+    def to_world(self, x, y):
+        return x + self.x, y + self.y
+
+
+class ChunkedRoomRenderer:
+    # Splits a room into fixed-size chunks whose static content (floor,
+    # walls, doors) is rendered into cached surfaces on first view. Each
+    # frame only the chunks overlapping the camera are blitted, so draw cost
+    # follows the viewport size rather than the room size.
+    def __init__(self, room, chunk_size=CHUNK_SIZE, evict_after=EVICT_AFTER):
+        self.room = room
+        self.chunk_size = chunk_size
+        self.evict_after = evict_after
+        self.chunks = {}
+        self.last_used = {}
+        self.frame = 0
+
+    def render_chunk(self, cx, cy):
+        size = self.chunk_size
+        area = pygame.Rect(cx * size, cy * size, size, size)
+        surface = pygame.Surface((size, size)).convert()
+        self.room.draw_static(surface, area.x, area.y, area)
+        return surface
+
+    def invalidate(self, rect=None):
+        # Re-render chunks touching rect (or all of them) next time they are seen
+        if rect is None:
+            self.chunks.clear()
+            return
+        size = self.chunk_size
+        for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                self.chunks.pop((cx, cy), None)
+
+    def draw(self, screen, camera):
+        self.frame += 1
+        size = self.chunk_size
+        view = camera.get_rect()
+        first_cx = max(0, view.left // size)
+        first_cy = max(0, view.top // size)
+        last_cx = (min(view.right, self.room.width) - 1) // size
+        last_cy = (min(view.bottom, self.room.height) - 1) // size
+
+        blits = []
+        for cy in range(first_cy, last_cy + 1):
+            for cx in range(first_cx, last_cx + 1):
+                key = (cx, cy)
+                surface = self.chunks.get(key)
+                if surface is None:
+                    surface = self.render_chunk(cx, cy)
+                    self.chunks[key] = surface
+                self.last_used[key] = self.frame
+                blits.append((surface, (cx * size - camera.x, cy * size - camera.y)))
+        screen.blits(blits, False)
+
+        # Evict chunks that have been off-screen for a while
+        if self.frame % 60 == 0:
+            stale = [key for key, used in self.last_used.items() if self.frame - used > self.evict_after]
+            for key in stale:
+                self.chunks.pop(key, None)
+                del self.last_used[key]
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 600))
+
+    class BenchWall:
+        def __init__(self, x, y):
+            self.rect = pygame.Rect(x, y, 40, 40)
+
+    class BenchRoom:
+        def __init__(self, width, height):
+            self.width = width
+            self.height = height
+            self.walls = [BenchWall(x, y) for x in range(0, width, 120) for y in range(0, height, 120)]
+
+        def draw_static(self, surface, offset_x, offset_y, area):
+            surface.fill((0, 100, 0))
+            for wall in self.walls:
+                if wall.rect.colliderect(area):
+                    pygame.draw.rect(surface, (139, 69, 19), wall.rect.move(-offset_x, -offset_y))
+
+    # Frame cost should stay flat as the room grows
+    for width, height in ((800, 600), (4000, 3000), (16000, 12000)):
+        room = BenchRoom(width, height)
+        renderer = ChunkedRoomRenderer(room)
+        camera = Camera(800, 600)
+        camera.set_world(width, height)
+        frames = 600
+        start = time.perf_counter()
+        for frame in range(frames):
+            camera.follow(400 + frame * 3 % (width - 400), 300 + frame * 2 % (height - 300))
+            renderer.draw(screen, camera)
+        elapsed = time.perf_counter() - start
+        print(f"{width}x{height}: {elapsed / frames * 1000:.2f}ms/frame, {len(renderer.chunks)} chunks cached")
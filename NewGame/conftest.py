@@ -0,0 +1,5 @@
+import os
+
+# The game modules import pygame; keep any display or audio it opens headless
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
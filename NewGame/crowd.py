@@ -0,0 +1,208 @@
+import math
+
+import numpy as np
+
+from grid import TILE_SIZE, UniformGrid
+
+# Agents within this distance of each other are neighbors; also the grid cell size
+NEIGHBOR_RADIUS = 48
+# Gap separation tries to keep between two agents' bodies
+SPACING = 4
+
+SEPARATION_WEIGHT = 6.0
+ALIGNMENT_WEIGHT = 0.1
+# Push away from solid tiles (and the edge of the grid) within WALL_MARGIN of a body
+WALL_WEIGHT = 1.0
+WALL_MARGIN = 12
+# Push out of overlapping obstacle bodies, such as players
+BODY_WEIGHT = 4.0
+# Cap on the total steering per frame, in pixels
+MAX_FORCE = 3.0
+
+# Up to this many agents every pair is checked directly; building the grid costs more
+SMALL_CROWD = 64
+
+# Direction for pushing apart two agents standing on exactly the same spot
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+class CrowdSteering:
+    # Boids-style steering for a crowd of round agents: separation from
+    # neighbors, alignment with their mean velocity, avoidance of walls and
+    # of obstacle bodies. Neighbors come from a uniform grid rebuilt every
+    # tick and every force is accumulated over NumPy arrays of pairs, so a
+    # tick costs a handful of array passes over the agents plus the pairs,
+    # and stays linear in the agent count while the crowd is spread out.
+    # steer() turns each agent's intended movement for a tick into the steered one.
+    def __init__(self, neighbor_radius=NEIGHBOR_RADIUS, spacing=SPACING, separation=SEPARATION_WEIGHT,
+                 alignment=ALIGNMENT_WEIGHT, avoidance=WALL_WEIGHT, wall_margin=WALL_MARGIN,
+                 bodies=BODY_WEIGHT, max_force=MAX_FORCE, tile_size=TILE_SIZE):
+        self.neighbor_radius = neighbor_radius
+        self.spacing = spacing
+        self.separation = separation
+        self.alignment = alignment
+        self.avoidance = avoidance
+        self.wall_margin = wall_margin
+        self.bodies = bodies
+        self.max_force = max_force
+        self.tile_size = tile_size
+        self.grid = UniformGrid(neighbor_radius)
+        # The last collision grid seen, with a solid border added; a room's
+        # grid is built once, so it is padded once
+        self.padded_source = None
+        self.padded = None
+
+    def steer(self, positions, steps, radii, collision_grid=None, obstacles=None, obstacle_radii=0, frames=1):
+        # positions are [n, 2] and steps each agent's intended movement this
+        # tick, [n, 2]; returns the steered movement. radii is a number or
+        # one per agent. collision_grid is a [rows, cols] bool grid from
+        # build_collision_grid, anything off it counting as solid. obstacles
+        # are [m, 2] positions of bodies agents must not walk through. A tick
+        # covering several frames steers that many frames' worth.
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        steps = np.asarray(steps, dtype=np.float64).reshape(-1, 2)
+        count = len(positions)
+        if count == 0:
+            return steps.copy()
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (count,))
+        # Everything below works on x and y columns; pair arrays are the
+        # largest in a tick and [p, 2] slices of them cost twice as much
+        x = positions[:, 0]
+        y = positions[:, 1]
+        step_x = steps[:, 0].copy()
+        step_y = steps[:, 1].copy()
+        force_x = np.zeros(count)
+        force_y = np.zeros(count)
+
+        # Each pair comes once, i < j; whatever i gets from it j gets mirrored
+        i, j = self.neighbor_pairs(positions)
+        if len(i):
+            delta_x = x[i] - x[j]
+            delta_y = y[i] - y[j]
+            distance = np.sqrt(delta_x * delta_x + delta_y * delta_y)
+            stacked = np.flatnonzero(distance <= 1e-9)
+            inverse = 1.0 / np.maximum(distance, 1e-9)
+            unit_x = delta_x * inverse
+            unit_y = delta_y * inverse
+            # Opposite directions for the two halves of a stacked pair
+            angle = i[stacked] * GOLDEN_ANGLE
+            unit_x[stacked] = -np.cos(angle)
+            unit_y[stacked] = -np.sin(angle)
+
+            # Separation: stronger the deeper a neighbor is inside the gap
+            desired = radii[i] + radii[j] + self.spacing
+            crowding = np.clip((desired - distance) / desired, 0.0, None) * self.separation
+            push_x = unit_x * crowding
+            push_y = unit_y * crowding
+            force_x += np.bincount(i, push_x, count) - np.bincount(j, push_x, count)
+            force_y += np.bincount(i, push_y, count) - np.bincount(j, push_y, count)
+
+            # Agents stop pressing into neighbors already too close, which
+            # is what otherwise piles a crowd up on a shared target
+            crowded = crowding > 0
+            into_i = np.minimum(step_x[i] * unit_x + step_y[i] * unit_y, 0.0) * crowded
+            into_j = np.maximum(step_x[j] * unit_x + step_y[j] * unit_y, 0.0) * crowded
+            blocked_x = np.bincount(i, unit_x * into_i, count) + np.bincount(j, unit_x * into_j, count)
+            blocked_y = np.bincount(i, unit_y * into_i, count) + np.bincount(j, unit_y * into_j, count)
+
+            # Alignment: toward the neighbors' mean movement
+            neighbors = np.bincount(i, minlength=count) + np.bincount(j, minlength=count)
+            has = neighbors > 0
+            mean_x = np.bincount(i, step_x[j], count) + np.bincount(j, step_x[i], count)
+            mean_y = np.bincount(i, step_y[j], count) + np.bincount(j, step_y[i], count)
+            force_x[has] += (mean_x[has] / neighbors[has] - step_x[has]) * self.alignment
+            force_y[has] += (mean_y[has] / neighbors[has] - step_y[has]) * self.alignment
+            step_x -= blocked_x
+            step_y -= blocked_y
+
+        if obstacles is not None and len(obstacles):
+            obstacles = np.asarray(obstacles, dtype=np.float64).reshape(-1, 2)
+            # Few obstacles, so every agent is checked against every one
+            delta_x = x[:, None] - obstacles[None, :, 0]
+            delta_y = y[:, None] - obstacles[None, :, 1]
+            distance = np.maximum(np.sqrt(delta_x * delta_x + delta_y * delta_y), 1e-9)
+            reach = radii[:, None] + np.broadcast_to(np.asarray(obstacle_radii, dtype=np.float64), (len(obstacles),))
+            overlap = np.clip((reach - distance) / reach, 0.0, None) * self.bodies / distance
+            force_x += (delta_x * overlap).sum(axis=1)
+            force_y += (delta_y * overlap).sum(axis=1)
+
+        if collision_grid is not None:
+            wall_x, wall_y = self.wall_forces(x, y, radii, collision_grid)
+            force_x += wall_x
+            force_y += wall_y
+        magnitude = np.sqrt(force_x * force_x + force_y * force_y)
+        scale = np.minimum(1.0, self.max_force / np.maximum(magnitude, 1e-12)) * frames
+        return np.column_stack((step_x + force_x * scale, step_y + force_y * scale))
+
+    def neighbor_pairs(self, positions):
+        # Each pair of agents closer than the neighbor radius once, i < j
+        if len(positions) <= SMALL_CROWD:
+            delta = positions[:, None, :] - positions[None, :, :]
+            close = (delta * delta).sum(axis=2) < self.neighbor_radius * self.neighbor_radius
+            return np.nonzero(np.triu(close, 1))
+        return self.grid.build(positions).neighbor_pairs(positions, self.neighbor_radius)
+
+    def wall_forces(self, x, y, radii, collision_grid):
+        # Probe WALL_MARGIN beyond each body left, right, up and down; a
+        # solid tile there pushes the other way. The grid is padded with a
+        # solid border so probes off it need no separate test: clipped onto
+        # the border, all four probes are one lookup.
+        rows, cols = collision_grid.shape
+        if self.padded_source is not collision_grid:
+            self.padded = np.pad(collision_grid, 1, constant_values=True)
+            self.padded_source = collision_grid
+        reach = radii + self.wall_margin
+        count = len(x)
+        tile_x = np.empty(4 * count)
+        tile_y = np.empty(4 * count)
+        tile_x[:count] = x - reach
+        tile_x[count:2 * count] = x + reach
+        tile_x[2 * count:] = np.tile(x, 2)
+        tile_y[:2 * count] = np.tile(y, 2)
+        tile_y[2 * count:3 * count] = y - reach
+        tile_y[3 * count:] = y + reach
+        tile_columns = np.clip(np.floor(tile_x / self.tile_size), -1, cols).astype(np.int64) + 1
+        tile_rows = np.clip(np.floor(tile_y / self.tile_size), -1, rows).astype(np.int64) + 1
+        solid = self.padded[tile_rows, tile_columns].reshape(4, count) * self.avoidance
+        return solid[0] - solid[1], solid[2] - solid[3]
+
+
+if __name__ == "__main__":
+    import time
+
+    import pygame
+
+    from grid import build_collision_grid
+
+    class BenchWall:
+        def __init__(self, x, y, width, height):
+            self.rect = pygame.Rect(x, y, width, height)
+
+    def simulate(count, speed=2.0, radius=15, seed=3):
+        # count enemies chasing the middle of a walled arena sized so the
+        # crowd would cover a third of it when spread out, for long enough
+        # that all of them arrive; returns the steering time per tick
+        side = int(math.sqrt(count * (2 * radius + SPACING) ** 2 * 3))
+        walls = [BenchWall(0, 0, side, 20), BenchWall(0, side - 20, side, 20),
+                 BenchWall(0, 0, 20, side), BenchWall(side - 20, 0, 20, side),
+                 BenchWall(side // 3, side // 3, 60, 60)]
+        collision_grid = build_collision_grid(walls, side, side)
+        rng = np.random.default_rng(seed)
+        positions = rng.uniform(40, side - 40, (count, 2))
+        target = np.array([side / 2, side / 2])
+        crowd = CrowdSteering()
+        ticks = int(side / 2 / speed) + 100
+        spent = 0.0
+        for _ in range(ticks):
+            chase = target - positions
+            length = np.maximum(np.sqrt((chase * chase).sum(axis=1)), 1e-9)
+            steps = chase / length[:, None] * np.minimum(speed, length)[:, None]
+            start = time.perf_counter()
+            steps = crowd.steer(positions, steps, radius, collision_grid, [target], 20)
+            spent += time.perf_counter() - start
+            positions += steps
+        return spent / ticks
+
+    for count in (1000, 2000, 4000, 8000):
+        tick = simulate(count)
+        print(f"{count:5d} enemies: steering {tick * 1000:6.2f}ms/tick ({tick / count * 1e6:.2f}us/enemy)")
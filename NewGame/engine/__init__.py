@@ -0,0 +1,5 @@
+# Shared pieces of every game mode: entities, rooms and the frame loop.
+# Run `python -m engine` from NewGame to benchmark all four modes.
+from engine.entities import Chest, Collectible, Door, GameObject, Key, LockedDoor, Player, Wall, movement
+from engine.mode import Mode
+from engine.room import Room
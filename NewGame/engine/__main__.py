@@ -0,0 +1,135 @@
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import gamedemo
+import pointandclick
+import pointnclickad
+import towergame
+from engine.entities import movement
+
+# Every mode headless on the shared loop: scripted input drives frame()
+# and the frame profiler reports where the time goes, so one run shows
+# what a change to the engine does for all of them.
+
+FRAMES = 600
+WALK = ((pygame.K_RIGHT,), (pygame.K_DOWN,), (pygame.K_LEFT,), (pygame.K_UP,),
+        (pygame.K_RIGHT, pygame.K_DOWN), (pygame.K_LEFT, pygame.K_UP))
+
+
+class ScriptedKeys:
+    # Stands in for pygame.key.get_pressed()
+    def __init__(self):
+        self.held = set()
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def key_event(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+
+
+def click_event(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos)
+
+
+def no_events(mode, frame):
+    return []
+
+
+def click_objects(objects_of):
+    # Click the mode's objects in turn, one every half second
+    def script(mode, frame):
+        objects = objects_of(mode)
+        if frame % 30 or not objects:
+            return []
+        return [click_event(objects[frame // 30 % len(objects)].rect.center)]
+    return script
+
+
+def tower_script(mode, frame):
+    if mode.game_over or mode.win:
+        return [key_event(pygame.K_r)]
+    return [key_event(pygame.K_SPACE)] if frame % 20 == 0 else []
+
+
+MODES = (
+    ("gamedemo", gamedemo.Game, no_events),
+    ("pointnclickad", pointnclickad.HybridGame, click_objects(lambda mode: mode.current_room.objects)),
+    ("pointandclick", pointandclick.PointClickGame, click_objects(lambda mode: mode.scene.objects)),
+    ("towergame", towergame.Game, tower_script),
+)
+
+
+def run_mode(mode_class, script, frames=FRAMES):
+    mode = mode_class()
+    mode.hitches.out = None
+    mode.running = True
+    profiler = mode.profiler
+    profiler.enabled = True
+    profiler.frames_recorded = 0
+    keys = ScriptedKeys()
+    start = time.perf_counter()
+    for frame in range(frames):
+        keys.held = set(WALK[frame // 40 % len(WALK)])
+        profiler.begin_frame()
+        mode.frame(script(mode, frame), keys)
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+    # Only the last profiler.capacity frames are kept
+    averages = dict(zip(profiler.phases, profiler.averages()))
+    mode.close()
+    return elapsed / frames, averages
+
+
+def collision_primitives(rounds=20000):
+    # Player movement in the pillared hall: one collidelist call against the
+    # room's wall rects, next to the per-wall Python loop it replaced
+    room = gamedemo.build_rooms()[4]
+    player = gamedemo.Player(150, 150)
+    keys = ScriptedKeys()
+    keys.held = {pygame.K_RIGHT}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        player.update(keys, room.wall_rects)
+        player.place(150, 150)
+    engine_time = time.perf_counter() - start
+
+    def looped_update(x, y, walls):
+        dx, dy = movement(keys)
+        rect = pygame.Rect(x + dx * 4, y + dy * 4, 25, 25)
+        for wall in walls:
+            if rect.colliderect(wall.rect):
+                return x, y
+        return rect.x, rect.y
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        looped_update(150, 150, room.walls)
+    loop_time = time.perf_counter() - start
+    return len(room.walls), engine_time / rounds, loop_time / rounds
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else FRAMES
+    # The modes write saves, run history and telemetry to the working directory
+    with tempfile.TemporaryDirectory() as directory:
+        here = os.getcwd()
+        os.chdir(directory)
+        try:
+            for name, mode_class, script in MODES:
+                per_frame, averages = run_mode(mode_class, script, frames)
+                phases = "  ".join(f"{phase} {seconds * 1000:.2f}" for phase, seconds in averages.items() if seconds)
+                print(f"{name:14s} {per_frame * 1000:6.2f}ms/frame  ({phases} ms)")
+        finally:
+            os.chdir(here)
+    walls, engine_time, loop_time = collision_primitives()
+    print(f"player vs {walls} walls: collidelist {engine_time * 1e6:.2f}us, per-wall loop {loop_time * 1e6:.2f}us")
+    pygame.quit()
@@ -0,0 +1,17 @@
+# Window and frame rate every mode runs at
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+FPS = 60
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+GRAY = (128, 128, 128)
+DARK_GREEN = (0, 128, 0)
+BROWN = (139, 69, 19)
+DOOR_FRAME = (50, 50, 50)
+CHEST_LID = (100, 50, 0)
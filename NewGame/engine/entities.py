@@ -0,0 +1,167 @@
+import pygame
+
+from engine.config import BLACK, BLUE, BROWN, CHEST_LID, DOOR_FRAME, RED, WHITE, YELLOW
+
+COLLECTIBLE_SIZE = 12
+
+
+def movement(keys):
+    # (dx, dy), each -1, 0 or 1, from the arrow keys and WASD. keys is
+    # pygame.key.get_pressed() or anything indexable the same way.
+    dx = bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]) - bool(keys[pygame.K_LEFT] or keys[pygame.K_a])
+    dy = bool(keys[pygame.K_DOWN] or keys[pygame.K_s]) - bool(keys[pygame.K_UP] or keys[pygame.K_w])
+    return dx, dy
+
+
+class Player:
+    # The square walking player of the room-based modes
+    def __init__(self, x, y, speed=4, color=BLUE, size=25):
+        self.x = x
+        self.y = y
+        self.width = size
+        self.height = size
+        self.speed = speed
+        self.color = color
+        self.rect = pygame.Rect(x, y, size, size)
+
+    def update(self, keys, wall_rects):
+        dx, dy = movement(keys)
+        if not dx and not dy:
+            return
+        rect = self.rect
+        rect.x = self.x + dx * self.speed
+        rect.y = self.y + dy * self.speed
+        # One C-level scan of the room's wall rects; a blocked move is undone
+        if rect.collidelist(wall_rects) == -1:
+            self.x = rect.x
+            self.y = rect.y
+        else:
+            rect.x = self.x
+            rect.y = self.y
+
+    def place(self, x, y):
+        self.x = x
+        self.y = y
+        self.rect.x = x
+        self.rect.y = y
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        x = self.x - offset_x
+        y = self.y - offset_y
+        pygame.draw.rect(screen, self.color, (x, y, self.width, self.height))
+        # Draw a simple face
+        pygame.draw.circle(screen, WHITE, (int(x + self.width // 4), int(y + 8)), 2)
+        pygame.draw.circle(screen, WHITE, (int(x + self.width - self.width // 4), int(y + 8)), 2)
+
+
+class Wall:
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.rect = pygame.Rect(x, y, width, height)
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        pygame.draw.rect(screen, BROWN, (self.x - offset_x, self.y - offset_y, self.width, self.height))
+
+
+class Door:
+    # A doorway to another room; the player arrives at (spawn_x, spawn_y)
+    def __init__(self, x, y, width, height, leads_to_room, spawn_x, spawn_y):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.rect = pygame.Rect(x, y, width, height)
+        self.leads_to_room = leads_to_room
+        self.spawn_x = spawn_x
+        self.spawn_y = spawn_y
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        x = self.x - offset_x
+        y = self.y - offset_y
+        pygame.draw.rect(screen, DOOR_FRAME, (x, y, self.width, self.height))
+        pygame.draw.rect(screen, BLACK, (x + 2, y + 2, self.width - 4, self.height - 4))
+
+
+class Collectible:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.width = COLLECTIBLE_SIZE
+        self.height = COLLECTIBLE_SIZE
+        self.rect = pygame.Rect(x, y, self.width, self.height)
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        x = self.x - offset_x
+        y = self.y - offset_y
+        pygame.draw.rect(screen, YELLOW, (x, y, self.width, self.height))
+        pygame.draw.rect(screen, RED, (x + 2, y + 2, self.width - 4, self.height - 4))
+
+
+class GameObject:
+    # Something the point-and-click modes let the player click on
+    def __init__(self, x, y, width, height, color, name, description=""):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.color = color
+        self.name = name
+        self.description = description
+        self.visible = True
+        self.interactive = True
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        if self.visible:
+            self.draw_shape(screen, self.rect.move(-offset_x, -offset_y))
+
+    def draw_shape(self, screen, rect):
+        pygame.draw.rect(screen, self.color, rect)
+
+    def is_clicked(self, pos):
+        return self.rect.collidepoint(pos) and self.visible and self.interactive
+
+
+class Key(GameObject):
+    def __init__(self, x, y, width=20, height=12):
+        super().__init__(x, y, width, height, YELLOW, "Key", "A golden key. Wonder what it opens?")
+
+    def draw_shape(self, screen, rect):
+        pygame.draw.rect(screen, self.color, rect)
+        # Draw key teeth
+        teeth = pygame.Rect(rect.x + rect.width * 7 // 10, rect.y + rect.height // 4, rect.width // 4, rect.height // 2)
+        pygame.draw.rect(screen, self.color, teeth)
+
+
+class Chest(GameObject):
+    def __init__(self, x, y, width=40, height=30):
+        super().__init__(x, y, width, height, BROWN, "Chest", "A treasure chest.")
+        self.opened = False
+
+    def draw_shape(self, screen, rect):
+        pygame.draw.rect(screen, self.color, rect)
+        lid = rect.height * 2 // 5
+        if not self.opened:
+            # Draw closed lid
+            pygame.draw.rect(screen, CHEST_LID, (rect.x, rect.y, rect.width, lid))
+        else:
+            # Draw open lid (tilted)
+            rise = rect.width * 3 // 8
+            points = [
+                (rect.x, rect.y),
+                (rect.right, rect.y - rise),
+                (rect.right, rect.y - rise + lid),
+                (rect.x, rect.y + lid),
+            ]
+            pygame.draw.polygon(screen, CHEST_LID, points)
+
+
+class LockedDoor(GameObject):
+    def __init__(self, x, y, width, height):
+        super().__init__(x, y, width, height, BROWN, "Locked Door", "A wooden door. It looks locked.")
+        self.locked = True
+
+    def draw_shape(self, screen, rect):
+        pygame.draw.rect(screen, self.color, rect)
+        # Draw door handle
+        handle = (rect.right - rect.width // 4, rect.centery)
+        pygame.draw.circle(screen, YELLOW, handle, max(3, rect.width // 16))
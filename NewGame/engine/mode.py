@@ -0,0 +1,101 @@
+import pygame
+
+from assets import init_mode
+from camera import Camera, ChunkedRoomRenderer
+from engine.config import FPS, SCREEN_HEIGHT, SCREEN_WIDTH
+from gcpacing import GcPacer, HitchDetector
+from profiler import FrameProfiler
+
+
+class Mode:
+    # One game mode on the shared loop. Subclasses fill in handle_event,
+    # update and draw; the loop owns the window, the profiler phases, frame
+    # pacing, GC pacing and cached room rendering, so each of those lands
+    # once for every mode. frame() is a whole frame short of the flip, which
+    # is what the engine benchmark drives.
+    caption = "Game"
+    fps = FPS
+
+    def __init__(self):
+        # Only start the pygame subsystems a windowed game needs
+        init_mode("client")
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption(self.caption)
+        self.clock = pygame.time.Clock()
+        self.profiler = FrameProfiler()
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.room_renderers = {}
+        self.running = False
+        # Full collections wait for loads and doors; see loaded() and transition()
+        self.gc_pacer = GcPacer()
+        self.hitches = HitchDetector(1.0 / self.fps)
+
+    def loaded(self):
+        # Call once a level or a save has finished loading
+        self.gc_pacer.loaded()
+        self.hitches.skip()
+
+    def transition(self):
+        # Call at a room transition or any other natural pause
+        self.gc_pacer.transition()
+        self.hitches.skip()
+
+    def handle_event(self, event):
+        # Return True when the event was used; the rest go to the profiler
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.running = False
+            return True
+        return False
+
+    def update(self, keys):
+        pass
+
+    def draw(self):
+        pass
+
+    def frame(self, events, keys):
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif not self.handle_event(event):
+                self.profiler.handle_event(event)
+        self.profiler.mark("events")
+        self.update(keys)
+        self.draw()
+        self.profiler.draw_overlay(self.screen)
+        self.profiler.mark("draw")
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.profiler.begin_frame()
+            self.frame(pygame.event.get(), pygame.key.get_pressed())
+            pygame.display.flip()
+            self.profiler.mark("flip")
+            self.profiler.end_frame()
+            self.clock.tick(self.fps)
+            self.hitches.tick()
+        self.close()
+        pygame.quit()
+
+    def close(self):
+        self.hitches.close()
+        self.gc_pacer.close()
+
+    def room_renderer(self, room):
+        # Rooms replaced by a load get a fresh renderer
+        renderer = self.room_renderers.get(room.room_id)
+        if renderer is None or renderer.room is not room:
+            renderer = ChunkedRoomRenderer(room)
+            self.room_renderers[room.room_id] = renderer
+        return renderer
+
+    def draw_room(self, room, focus=None):
+        # Cached walls and doors, then the objects and collectibles on
+        # screen; the camera follows focus, a point in the room
+        camera = self.camera
+        camera.set_world(room.width, room.height)
+        if focus is not None:
+            camera.follow(*focus)
+        self.room_renderer(room).draw(self.screen, camera)
+        room.draw_contents(self.screen, camera.get_rect())
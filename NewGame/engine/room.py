@@ -0,0 +1,129 @@
+import random
+
+import pygame
+
+from engine.config import DARK_GREEN, SCREEN_HEIGHT, SCREEN_WIDTH
+from engine.entities import COLLECTIBLE_SIZE, Collectible, Door, Wall
+from grid import build_collision_grid
+from lighting import Light
+
+
+class Room:
+    # One room of any mode: walls, doorways, point-and-click objects,
+    # collectibles and torches. Wall and door rects are also kept in plain
+    # lists in the order they were added, so movement and door checks are a
+    # single Rect.collidelist call instead of a Python loop over objects.
+    def __init__(self, room_id, bg_color=DARK_GREEN, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.room_id = room_id
+        self.bg_color = bg_color
+        self.width = width
+        self.height = height
+        self.walls = []
+        self.wall_rects = []
+        self.doors = []
+        self.door_rects = []
+        self.objects = []  # Point-and-click objects
+        self.collectibles = []
+        self.lights = []
+        self.collision_grid = None
+        self.changes = 0  # Bumped whenever the room's saved state changes
+
+    def add_wall(self, x, y, width, height):
+        wall = Wall(x, y, width, height)
+        self.walls.append(wall)
+        self.wall_rects.append(wall.rect)
+        self.collision_grid = None
+        return wall
+
+    def add_door(self, x, y, width, height, leads_to_room, spawn_x, spawn_y):
+        door = Door(x, y, width, height, leads_to_room, spawn_x, spawn_y)
+        self.doors.append(door)
+        self.door_rects.append(door.rect)
+        return door
+
+    def add_object(self, obj):
+        self.objects.append(obj)
+        return obj
+
+    def add_collectible(self, x, y):
+        collectible = Collectible(x, y)
+        self.collectibles.append(collectible)
+        return collectible
+
+    def add_light(self, x, y, radius, color=None):
+        light = Light(x, y, radius) if color is None else Light(x, y, radius, color)
+        self.lights.append(light)
+        return light
+
+    def get_collision_grid(self):
+        # Walls are static, so the tile grid is built once and cached
+        if self.collision_grid is None:
+            self.collision_grid = build_collision_grid(self.walls, self.width, self.height)
+        return self.collision_grid
+
+    def spawn_random_collectibles(self, count, rng=random, max_attempts=100):
+        # Scatter collectibles where they don't overlap walls, doors or objects
+        blocked = self.wall_rects + self.door_rects + [obj.rect for obj in self.objects]
+        spot = pygame.Rect(0, 0, COLLECTIBLE_SIZE, COLLECTIBLE_SIZE)
+        spawned = 0
+        for _ in range(max_attempts):
+            if spawned == count:
+                break
+            spot.x = rng.randint(30, self.width - 50)
+            spot.y = rng.randint(30, self.height - 50)
+            if spot.collidelist(blocked) == -1:
+                self.add_collectible(spot.x, spot.y)
+                spawned += 1
+        return spawned
+
+    def door_at(self, rect):
+        # The first door rect overlaps, or None
+        index = rect.collidelist(self.door_rects)
+        return self.doors[index] if index != -1 else None
+
+    def take_collectibles(self, rect):
+        # Remove and return every collectible rect overlaps
+        collectibles = self.collectibles
+        if not collectibles:
+            return []
+        hits = rect.collidelistall([collectible.rect for collectible in collectibles])
+        taken = [collectibles[index] for index in hits]
+        for index in reversed(hits):
+            del collectibles[index]
+        self.changes += len(taken)
+        return taken
+
+    def object_at(self, pos):
+        for obj in self.objects:
+            if obj.is_clicked(pos):
+                return obj
+        return None
+
+    def draw_static(self, surface, offset_x=0, offset_y=0, area=None):
+        # Background, walls and doors, optionally only those touching area.
+        # This is what ChunkedRoomRenderer caches, so it only runs when a
+        # chunk is first seen.
+        surface.fill(self.bg_color)
+        for wall in self.walls:
+            if area is None or wall.rect.colliderect(area):
+                wall.draw(surface, offset_x, offset_y)
+        for door in self.doors:
+            if area is None or door.rect.colliderect(area):
+                door.draw(surface, offset_x, offset_y)
+
+    def draw_contents(self, screen, view=None):
+        # Objects and collectibles, which change during play; view is the
+        # camera rect in room coordinates, and anything outside it is skipped
+        offset_x, offset_y = (view.x, view.y) if view is not None else (0, 0)
+        for obj in self.objects:
+            if view is None or view.colliderect(obj.rect):
+                obj.draw(screen, offset_x, offset_y)
+        for collectible in self.collectibles:
+            if view is None or view.colliderect(collectible.rect):
+                collectible.draw(screen, offset_x, offset_y)
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        # Everything, uncached; modes draw through ChunkedRoomRenderer instead
+        self.draw_static(screen, offset_x, offset_y)
+        view = pygame.Rect(offset_x, offset_y, screen.get_width(), screen.get_height())
+        self.draw_contents(screen, view)
@@ -0,0 +1,212 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from grid import TILE_SIZE
+
+# Octant transforms for recursive shadowcasting
+OCTANTS = [
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+]
+
+# Fog alpha for tiles that are visible, explored earlier, and never seen
+FOG_VISIBLE = 0
+FOG_EXPLORED = 160
+FOG_UNSEEN = 255
+
+
+def compute_fov(solid, cols, rows, cx, cy, radius):
+    # Recursive shadowcasting over a row-major list of solid flags. Returns a
+    # bytearray of cols * rows visibility flags; walls that bound the view
+    # are visible themselves.
+    visible = bytearray(cols * rows)
+    if 0 <= cx < cols and 0 <= cy < rows:
+        visible[cy * cols + cx] = 1
+    radius_sq = radius * radius
+
+    def cast(row, start, end, xx, xy, yx, yy):
+        if start < end:
+            return
+        new_start = start
+        for distance in range(row, radius + 1):
+            dx = -distance - 1
+            dy = -distance
+            blocked = False
+            while dx <= 0:
+                dx += 1
+                left_slope = (dx - 0.5) / (dy + 0.5)
+                right_slope = (dx + 0.5) / (dy - 0.5)
+                if start < right_slope:
+                    continue
+                if end > left_slope:
+                    break
+                x = cx + dx * xx + dy * xy
+                y = cy + dx * yx + dy * yy
+                inside = 0 <= x < cols and 0 <= y < rows
+                if inside and dx * dx + dy * dy <= radius_sq:
+                    visible[y * cols + x] = 1
+                wall = not inside or solid[y * cols + x]
+                if blocked:
+                    if wall:
+                        new_start = right_slope
+                    else:
+                        blocked = False
+                        start = new_start
+                elif wall and distance < radius:
+                    blocked = True
+                    cast(distance + 1, start, left_slope, xx, xy, yx, yy)
+                    new_start = right_slope
+            if blocked:
+                break
+
+    for xx, xy, yx, yy in OCTANTS:
+        cast(1, 1.0, 0.0, xx, xy, yx, yy)
+    return visible
+
+
+class FovCache:
+    # Visibility masks keyed by (room, tile, radius). Rooms are static, so a
+    # mask computed once is valid for every player standing on that tile.
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.masks = OrderedDict()
+        self.room_grids = {}
+
+    def set_room_grid(self, room_id, grid):
+        rows, cols = grid.shape
+        self.room_grids[room_id] = (bytes(grid.astype(np.uint8).ravel()), cols, rows)
+        # Drop masks computed against an older grid for this room
+        for key in [key for key in self.masks if key[0] == room_id]:
+            del self.masks[key]
+
+    def get(self, room_id, tx, ty, radius):
+        key = (room_id, tx, ty, radius)
+        mask = self.masks.get(key)
+        if mask is not None:
+            self.masks.move_to_end(key)
+            return mask
+        solid, cols, rows = self.room_grids[room_id]
+        visible = compute_fov(solid, cols, rows, tx, ty, radius)
+        mask = np.frombuffer(bytes(visible), dtype=np.uint8).reshape(rows, cols).astype(bool)
+        mask.flags.writeable = False
+        self.masks[key] = mask
+        if len(self.masks) > self.max_entries:
+            self.masks.popitem(last=False)
+        return mask
+
+
+class PlayerVisibility:
+    # Per-player visibility, recomputed only when a player changes tile
+    def __init__(self, cache, tile_size=TILE_SIZE):
+        self.cache = cache
+        self.tile_size = tile_size
+        self.keys = {}
+        self.masks = {}
+        self.explored = {}
+        self.fog_surfaces = {}  # player -> one pixel per tile
+        self.fog_views = {}  # player -> (tile rect, that part of the fog scaled up)
+
+    def update(self, player_id, room_id, x, y, radius):
+        key = (room_id, int(x // self.tile_size), int(y // self.tile_size), radius)
+        if self.keys.get(player_id) == key:
+            return self.masks[player_id]
+        mask = self.cache.get(*key)
+        self.keys[player_id] = key
+        self.masks[player_id] = mask
+
+        explored_key = (player_id, room_id)
+        explored = self.explored.get(explored_key)
+        if explored is None:
+            explored = np.zeros(mask.shape, dtype=bool)
+            self.explored[explored_key] = explored
+        explored |= mask
+        self.fog_surfaces.pop(player_id, None)
+        self.fog_views.pop(player_id, None)
+        return mask
+
+    def packed(self, player_id):
+        # Bitmask form for replication: one bit per tile, row-major
+        return np.packbits(self.masks[player_id]).tobytes()
+
+    def visible_indices(self, player_id, positions):
+        # Indices of entity positions (N, 2) whose tile this player can see
+        mask = self.masks.get(player_id)
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        if mask is None or len(positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+        rows, cols = mask.shape
+        tx = np.clip((positions[:, 0] // self.tile_size).astype(np.int64), 0, cols - 1)
+        ty = np.clip((positions[:, 1] // self.tile_size).astype(np.int64), 0, rows - 1)
+        return np.nonzero(mask[ty, tx])[0]
+
+    def cull(self, positions, player_ids=None):
+        # Server-side culling: which entities to send to each player. Players
+        # in different rooms see different entities, so player_ids picks
+        # the ones positions are for; by default every player.
+        if player_ids is None:
+            player_ids = self.masks
+        return {player_id: self.visible_indices(player_id, positions) for player_id in player_ids}
+
+    def fog_surface(self, player_id):
+        # The fog at one pixel per tile
+        surface = self.fog_surfaces.get(player_id)
+        if surface is not None:
+            return surface
+        mask = self.masks[player_id]
+        room_id = self.keys[player_id][0]
+        explored = self.explored[(player_id, room_id)]
+        rows, cols = mask.shape
+        alpha = np.full((cols, rows), FOG_UNSEEN, dtype=np.uint8)
+        alpha[explored.T] = FOG_EXPLORED
+        alpha[mask.T] = FOG_VISIBLE
+        surface = pygame.Surface((cols, rows), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 255))
+        pixels = pygame.surfarray.pixels_alpha(surface)
+        pixels[:] = alpha
+        del pixels
+        self.fog_surfaces[player_id] = surface
+        return surface
+
+    def draw_fog(self, screen, player_id, offset_x=0, offset_y=0):
+        # Only the tiles under the camera, plus one around them so the
+        # smoothing at the screen edge matches, are scaled up. The result is
+        # kept until the player changes tile or the camera crosses a tile.
+        mask = self.masks.get(player_id)
+        if mask is None:
+            return
+        rows, cols = mask.shape
+        tile = self.tile_size
+        first_x = max(0, int(offset_x // tile) - 1)
+        first_y = max(0, int(offset_y // tile) - 1)
+        last_x = min(cols, int(-(-(offset_x + screen.get_width()) // tile)) + 1)
+        last_y = min(rows, int(-(-(offset_y + screen.get_height()) // tile)) + 1)
+        if last_x <= first_x or last_y <= first_y:
+            return
+        tiles = (first_x, first_y, last_x - first_x, last_y - first_y)
+        cached = self.fog_views.get(player_id)
+        if cached is None or cached[0] != tiles:
+            small = self.fog_surface(player_id).subsurface(tiles)
+            cached = (tiles, pygame.transform.smoothscale(small, (tiles[2] * tile, tiles[3] * tile)))
+            self.fog_views[player_id] = cached
+        screen.blit(cached[1], (first_x * tile - offset_x, first_y * tile - offset_y))
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(5)
+    grid = rng.random((30, 40)) < 0.15
+    cache = FovCache()
+    cache.set_room_grid(0, grid)
+    start = time.perf_counter()
+    for ty in range(30):
+        for tx in range(40):
+            cache.get(0, tx, ty, 12)
+    cold = (time.perf_counter() - start) / 1200
+    start = time.perf_counter()
+    for ty in range(30):
+        for tx in range(40):
+            cache.get(0, tx, ty, 12)
+    warm = (time.perf_counter() - start) / 1200
+    print(f"radius 12 fov: {cold * 1e6:.0f}us computed, {warm * 1e6:.2f}us cached")
@@ -0,0 +1,171 @@
+import gc
+import sys
+import time
+from collections import deque
+
+# Automatic collection thresholds while playing. With the level frozen the
+# young generations only hold what play allocates, so they are collected
+# less often: at Python's (700, 10) a frame of a few hundred objects runs a
+# young collection nearly every frame and a gen1 pass every ten, which is
+# what sets the 99th percentile. Full collections are put off to loads and
+# room transitions, with the third threshold as a backstop for long
+# stretches without either.
+PLAY_THRESHOLDS = (5000, 100, 1000)
+
+# A frame counts as a hitch when it takes this many frame budgets
+HITCH_FACTOR = 1.5
+
+
+class GcPacer:
+    # Moves garbage collection pauses to moments the player won't notice.
+    # After a level loads, everything it built is collected once and frozen
+    # (gc.freeze), so later collections never walk the rooms, walls and
+    # surfaces that live for the whole level. Room transitions and loads run
+    # a full collection while the screen is changing anyway.
+    def __init__(self, thresholds=PLAY_THRESHOLDS):
+        self.thresholds = thresholds
+        self.default_thresholds = gc.get_threshold()
+        self.frozen = 0
+        gc.set_threshold(*thresholds)
+
+    def loaded(self):
+        # Call once a level (or a save) has finished loading
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+
+    def transition(self):
+        # Call at a room transition or any other natural pause
+        gc.collect()
+
+    def close(self):
+        gc.unfreeze()
+        gc.set_threshold(*self.default_thresholds)
+
+
+class HitchDetector:
+    # Watches frame-to-frame time and reports frames over budget together
+    # with the garbage collections that ran during them, so a hitch can be
+    # told apart from one caused by game code. Call tick() once per frame.
+    def __init__(self, budget=1.0 / 60, factor=HITCH_FACTOR, history=64, out=sys.stderr):
+        self.limit = budget * factor
+        self.out = out
+        self.hitches = deque(maxlen=history)
+        self.frames = 0
+        self.last = None
+        self.collections = []  # (generation, seconds, collected) in the current frame
+        self.totals = [0, 0, 0]  # Collections per generation since this started
+        self.gc_started = 0.0
+        gc.callbacks.append(self.on_gc)
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        else:
+            self.collections.append((info["generation"], time.perf_counter() - self.gc_started, info["collected"]))
+            self.totals[info["generation"]] += 1
+
+    def tick(self):
+        now = time.perf_counter()
+        last = self.last
+        self.last = now
+        self.frames += 1
+        collections = self.collections
+        self.collections = []
+        if last is None or now - last <= self.limit:
+            return None
+        hitch = {
+            "frame": self.frames,
+            "ms": (now - last) * 1000,
+            "gc_ms": sum(seconds for _, seconds, _ in collections) * 1000,
+            "collections": collections,
+            "counts": gc.get_count(),
+            "frozen": gc.get_freeze_count(),
+        }
+        self.hitches.append(hitch)
+        if self.out is not None:
+            runs = " ".join(f"gen{generation} {seconds * 1000:.1f}ms ({collected} freed)"
+                            for generation, seconds, collected in collections) or "none"
+            print(f"hitch: frame {hitch['frame']} took {hitch['ms']:.1f}ms, gc {hitch['gc_ms']:.1f}ms "
+                  f"[{runs}], gen counts {hitch['counts']}, {hitch['frozen']} frozen", file=self.out)
+        return hitch
+
+    def skip(self):
+        # Don't count the next frame; for loads and deliberate pauses
+        self.last = None
+        self.collections = []
+
+    def close(self):
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+
+
+if __name__ == "__main__":
+    import statistics
+
+    class Node:
+        def __init__(self):
+            self.links = [self]
+
+    def build_level(count):
+        # Long-lived level data full of reference cycles
+        return [Node() for _ in range(count)]
+
+    def frame(step, recent):
+        # A frame's worth of objects in cycles, like particles and messages,
+        # that live for a couple of seconds: long enough to reach the oldest
+        # generation before they die
+        garbage = [Node() for _ in range(300)]
+        for a, b in zip(garbage, garbage[1:]):
+            a.links.append(b)
+        recent.append(garbage)
+
+    def measure(paced, thresholds, frames=3000):
+        # Every frame is timed in both runs. Frames where the paced run has a
+        # room transition (and its full collection) are kept apart, so both
+        # runs are compared over the same play frames and the transition
+        # cost is shown on its own.
+        gc.collect()
+        level = build_level(1_000_000)
+        pacer = None
+        if paced:
+            pacer = GcPacer(thresholds)
+            pacer.loaded()
+        detector = HitchDetector(budget=1.0 / 240, out=None)
+        recent = deque(maxlen=120)
+        times = []
+        transitions = []
+        full = 0
+        for step in range(frames):
+            start = time.perf_counter()
+            frame(step, recent)
+            transition = step % 600 == 599
+            if paced and transition:
+                # A room transition every ten seconds at 60fps
+                pacer.transition()
+            elapsed = time.perf_counter() - start
+            if transition:
+                transitions.append(elapsed)
+                detector.skip()
+            else:
+                times.append(elapsed)
+                full += sum(1 for generation, _, _ in detector.collections if generation == 2)
+                detector.tick()
+        detector.close()
+        if pacer is not None:
+            pacer.close()
+        del level
+        gc.collect()
+        times.sort()
+        return (statistics.mean(times) * 1000, times[int(len(times) * 0.99)] * 1000, times[-1] * 1000, full,
+                statistics.mean(transitions) * 1000)
+
+    # A million long-lived level objects and 3000 frames of play: Python's
+    # defaults, pacing with Python's young thresholds, and pacing as played
+    runs = (("default gc", False, None), ("paced, young at defaults", True, (700, 10, 1000)),
+            ("paced", True, PLAY_THRESHOLDS))
+    for label, paced, thresholds in runs:
+        mean, p99, worst, full, transition = measure(paced, thresholds)
+        print(f"{label:24s}: play frames mean {mean:.3f}ms, p99 {p99:.3f}ms, worst {worst:.1f}ms, "
+              f"{full} full collections; transition frames {transition:.1f}ms")
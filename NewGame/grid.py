@@ -0,0 +1,120 @@
+import numpy as np
+
+# Size of one collision tile in pixels. Every wall and door in the rooms
+# lines up with this grid closely enough for raycasts and visibility.
+TILE_SIZE = 20
+
+# A grid's cell table may have this many cells per point before its cells
+# get coarser, and this many at least
+CELLS_PER_POINT = 8
+MIN_CELLS = 4096
+
+
+def build_collision_grid(walls, width, height, tile_size=TILE_SIZE):
+    # Rasterize wall rects into a [rows, cols] bool grid; a tile is solid if
+    # any wall overlaps it
+    cols = -(-width // tile_size)
+    rows = -(-height // tile_size)
+    grid = np.zeros((rows, cols), dtype=bool)
+    for wall in walls:
+        rect = wall.rect
+        left = max(0, rect.left // tile_size)
+        top = max(0, rect.top // tile_size)
+        right = min(cols, -(-rect.right // tile_size))
+        bottom = min(rows, -(-rect.bottom // tile_size))
+        grid[top:bottom, left:right] = True
+    return grid
+
+
+def expand(counts):
+    # For ranges of the given lengths, the range index and the offset within
+    # the range of every element, e.g. [2, 0, 3] -> [0, 0, 2, 2, 2], [0, 1, 0, 1, 2]
+    total = int(counts.sum())
+    ranges = np.repeat(np.arange(len(counts)), counts)
+    return ranges, np.arange(total) - (np.cumsum(counts) - counts)[ranges]
+
+
+class UniformGrid:
+    # Per-tick spatial hash over a batch of points. Points are counting-sorted
+    # into a dense table of the cells their bounding box covers, so a query
+    # is two array lookups per cell instead of a dict of lists. Points spread
+    # too thinly for that table get coarser cells, which only adds
+    # candidates for the caller's exact test to drop.
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.size = cell_size  # Cell size of the last build
+        self.origin_x = 0
+        self.origin_y = 0
+        self.cols = 0
+        self.rows = 0
+        self.order = np.zeros(0, dtype=np.int64)
+        self.starts = np.zeros(1, dtype=np.int64)
+
+    def build(self, positions):
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        count = len(positions)
+        self.size = self.cell_size
+        if count == 0:
+            self.cols = self.rows = 0
+            self.order = np.zeros(0, dtype=np.int64)
+            self.starts = np.zeros(1, dtype=np.int64)
+            return self
+        xs = positions[:, 0]
+        ys = positions[:, 1]
+        while True:
+            cx = np.floor(xs / self.size).astype(np.int64)
+            cy = np.floor(ys / self.size).astype(np.int64)
+            self.origin_x = int(cx.min())
+            self.origin_y = int(cy.min())
+            self.cols = int(cx.max()) - self.origin_x + 1
+            self.rows = int(cy.max()) - self.origin_y + 1
+            if self.cols * self.rows <= max(MIN_CELLS, CELLS_PER_POINT * count):
+                break
+            self.size *= 2
+        cells = (cy - self.origin_y) * self.cols + (cx - self.origin_x)
+        self.order = np.argsort(cells, kind="stable")
+        self.starts = np.zeros(self.cols * self.rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.cols * self.rows), out=self.starts[1:])
+        return self
+
+    def candidate_pairs(self, box_min, box_max):
+        # For each query box return every point in a cell the box overlaps,
+        # as parallel arrays (query index, point index)
+        box_min = np.asarray(box_min, dtype=np.float64).reshape(-1, 2)
+        box_max = np.asarray(box_max, dtype=np.float64).reshape(-1, 2)
+        empty = np.zeros(0, dtype=np.int64)
+        if len(box_min) == 0 or len(self.order) == 0:
+            return empty, empty
+
+        # Boxes clipped to the table; cells past its edges hold no points
+        low_x = np.maximum(np.floor(box_min[:, 0] / self.size).astype(np.int64) - self.origin_x, 0)
+        low_y = np.maximum(np.floor(box_min[:, 1] / self.size).astype(np.int64) - self.origin_y, 0)
+        high_x = np.minimum(np.floor(box_max[:, 0] / self.size).astype(np.int64) - self.origin_x, self.cols - 1)
+        high_y = np.minimum(np.floor(box_max[:, 1] / self.size).astype(np.int64) - self.origin_y, self.rows - 1)
+        span_x = np.maximum(high_x - low_x + 1, 0)
+        span_y = np.maximum(high_y - low_y + 1, 0)
+
+        # Every (query, cell) pair at once, then every (query, point) pair
+        # from the cells' ranges in the table
+        queries, offsets = expand(span_x * span_y)
+        if len(queries) == 0:
+            return empty, empty
+        width = span_x[queries]
+        cells = (low_y[queries] + offsets // width) * self.cols + low_x[queries] + offsets % width
+        starts = self.starts[cells]
+        pairs, offsets = expand(self.starts[cells + 1] - starts)
+        return queries[pairs], self.order[starts[pairs] + offsets]
+
+    def neighbor_pairs(self, positions, radius):
+        # Every pair of the built points closer than radius, once each as (i, j) with i < j
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        i, j = self.candidate_pairs(positions - radius, positions + radius)
+        keep = np.flatnonzero(i < j)
+        i = i[keep]
+        j = j[keep]
+        xs = positions[:, 0]
+        ys = positions[:, 1]
+        dx = xs[j] - xs[i]
+        dy = ys[j] - ys[i]
+        close = np.flatnonzero(dx * dx + dy * dy < radius * radius)
+        return i[close], j[close]
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Furthest back a hit check may rewind, in ticks (250ms at 60 ticks/s)
+MAX_REWIND = 15
+
+
+class PositionHistory:
+    # Fixed-size ring buffer of every tracked entity's position per tick.
+    # Memory is history * capacity * 2 floats no matter how long the match
+    # runs, and rewinding is two row lookups plus one interpolation. Recording
+    # more entities than capacity grows it, doubling so that's rare.
+    def __init__(self, capacity, history=64, max_rewind=MAX_REWIND):
+        self.capacity = capacity
+        self.history = history
+        self.max_rewind = min(max_rewind, history - 1)
+        self.positions = np.zeros((history, capacity, 2), dtype=np.float32)
+        self.alive = np.zeros((history, capacity), dtype=bool)
+        self.ticks = np.full(history, -1, dtype=np.int64)
+        self.latest = -1
+
+    def clear(self):
+        self.ticks[:] = -1
+        self.alive[:] = False
+        self.latest = -1
+
+    def grow(self, capacity):
+        # Entities added now count as not alive in the ticks already recorded
+        positions = np.zeros((self.history, capacity, 2), dtype=np.float32)
+        alive = np.zeros((self.history, capacity), dtype=bool)
+        positions[:, :self.capacity] = self.positions
+        alive[:, :self.capacity] = self.alive
+        self.positions = positions
+        self.alive = alive
+        self.capacity = capacity
+
+    def record(self, tick, positions, alive=None):
+        # positions: (n, 2) for entity ids 0..n-1; missing ids count as not alive
+        row = tick % self.history
+        n = len(positions)
+        if n > self.capacity:
+            self.grow(max(n, self.capacity * 2))
+        self.positions[row, :n] = positions
+        self.alive[row, :n] = True if alive is None else alive
+        self.alive[row, n:] = False
+        self.ticks[row] = tick
+        self.latest = tick
+
+    def positions_at(self, view_tick):
+        # Positions and alive flags as they were at view_tick, which may fall
+        # between recorded ticks. Clamped to the rewind window.
+        if self.latest < 0:
+            return self.positions[0], self.alive[0]
+        view_tick = max(self.latest - self.max_rewind, min(self.latest, view_tick))
+        before = int(np.floor(view_tick))
+        after = min(before + 1, self.latest)
+        row_before = before % self.history
+        row_after = after % self.history
+        if self.ticks[row_before] != before:
+            # Not recorded (e.g. right after a restart): use the newest data
+            row = self.latest % self.history
+            return self.positions[row], self.alive[row]
+        fraction = view_tick - before
+        if fraction == 0 or self.ticks[row_after] != after:
+            return self.positions[row_before], self.alive[row_before]
+        positions = self.positions[row_before] + (self.positions[row_after] - self.positions[row_before]) * fraction
+        return positions, self.alive[row_before] & self.alive[row_after]
+
+    def hits_in_radius(self, view_tick, x, y, radius, count=None):
+        # Entity ids within radius of (x, y) as the attacker saw them
+        positions, alive = self.positions_at(view_tick)
+        if count is not None:
+            positions = positions[:count]
+            alive = alive[:count]
+        delta = positions - np.array((x, y), dtype=np.float32)
+        close = (delta * delta).sum(axis=1) <= radius * radius
+        return np.nonzero(close & alive)[0]
+
+
+if __name__ == "__main__":
+    import time
+
+    # Four players rewinding against 2,000 enemies every tick
+    enemies = 2000
+    history = PositionHistory(enemies, history=64)
+    rng = np.random.default_rng(2)
+    positions = rng.uniform(0, 800, size=(enemies, 2)).astype(np.float32)
+    velocities = rng.uniform(-3, 3, size=(enemies, 2)).astype(np.float32)
+    ticks = 600
+    record_time = 0.0
+    query_time = 0.0
+    for tick in range(ticks):
+        positions += velocities
+        start = time.perf_counter()
+        history.record(tick, positions)
+        record_time += time.perf_counter() - start
+        start = time.perf_counter()
+        for player in range(4):
+            history.hits_in_radius(tick - 6.5, 400, 300, 40)
+        query_time += time.perf_counter() - start
+    print(f"{enemies} entities, {history.positions.nbytes // 1024}KB history: "
+          f"record {record_time / ticks * 1e6:.0f}us/tick, 4 rewound hit checks {query_time / ticks * 1e6:.0f}us/tick")
@@ -0,0 +1,218 @@
+import random
+
+import numpy as np
+
+
+class Entry:
+    # One line of a loot table. item is a name, None for "nothing", or a
+    # nested LootTable whose own odds are folded into this entry's weight.
+    # count is a number or an inclusive (low, high) range; condition is a
+    # function of the roll's context that must be true for the entry to drop.
+    def __init__(self, weight, item, count=1, condition=None):
+        if weight < 0:
+            raise ValueError("loot weights cannot be negative")
+        self.weight = weight
+        self.item = item
+        self.count = count if isinstance(count, tuple) else (count, count)
+        self.condition = condition
+
+
+class AliasSampler:
+    # Vose's alias method: any discrete distribution becomes a column per
+    # outcome, each split between itself and one alias, so a draw is one
+    # uniform number, one column pick and one comparison regardless of how
+    # many outcomes there are.
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        count = len(weights)
+        total = weights.sum()
+        if count == 0 or total <= 0:
+            raise ValueError("a loot table needs at least one entry with weight")
+        scaled = weights * (count / total)
+        self.probability = np.ones(count)
+        self.alias = np.arange(count)
+        small = [i for i in range(count) if scaled[i] < 1.0]
+        large = [i for i in range(count) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Anything left over is 1 up to rounding
+        self.count = count
+        # Plain lists for single draws; indexing NumPy scalars is much slower
+        self._probability = self.probability.tolist()
+        self._alias = self.alias.tolist()
+
+    def draw(self, rng):
+        column = rng.random() * self.count
+        index = int(column)
+        if column - index < self._probability[index]:
+            return index
+        return self._alias[index]
+
+    def draw_many(self, size, generator):
+        # generator is a NumPy Generator
+        columns = generator.integers(0, self.count, size=size)
+        keep = generator.random(size) < self.probability[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+
+class LootTable:
+    # Weighted drops compiled to an alias sampler. Nested tables are
+    # flattened into the parent, so a roll is a single O(1) draw however
+    # deep the tables go. Conditional entries make the compiled table depend
+    # on the context; one sampler is compiled and cached per combination of
+    # condition results actually seen.
+    def __init__(self, name, entries):
+        self.name = name
+        self.entries = [entry if isinstance(entry, Entry) else Entry(*entry) for entry in entries]
+        self.conditions = []
+        self._collect_conditions(self, set())
+        self.compiled = {}
+
+    def _collect_conditions(self, table, seen):
+        if id(table) in seen:
+            raise ValueError(f"loot table {table.name!r} contains itself")
+        seen = seen | {id(table)}
+        for entry in table.entries:
+            if entry.condition is not None and entry.condition not in self.conditions:
+                self.conditions.append(entry.condition)
+            if isinstance(entry.item, LootTable):
+                self._collect_conditions(entry.item, seen)
+
+    def _flatten(self, table, scale, key, outcomes, weights):
+        allowed = [entry for entry in table.entries
+                   if entry.weight > 0 and (entry.condition is None or key[self.conditions.index(entry.condition)])]
+        total = sum(entry.weight for entry in allowed)
+        if total == 0:
+            # Nothing in this table applies; its share goes to its siblings
+            return
+        for entry in allowed:
+            share = scale * entry.weight / total
+            if isinstance(entry.item, LootTable):
+                self._flatten(entry.item, share, key, outcomes, weights)
+            else:
+                outcomes.append((entry.item, entry.count))
+                weights.append(share)
+
+    def compile(self, context=None):
+        if self.conditions:
+            key = tuple([bool(condition(context)) for condition in self.conditions])
+        else:
+            key = ()
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            outcomes = []
+            weights = []
+            self._flatten(self, 1.0, key, outcomes, weights)
+            compiled = (outcomes, AliasSampler(weights))
+            self.compiled[key] = compiled
+        return compiled
+
+    def probabilities(self, context=None):
+        # Chance of each (item, count range) outcome, for checking and tooltips
+        outcomes, sampler = self.compile(context)
+        chances = np.zeros(sampler.count)
+        for column in range(sampler.count):
+            chances[column] += sampler.probability[column]
+            chances[sampler.alias[column]] += 1.0 - sampler.probability[column]
+        return list(zip(outcomes, (chances / sampler.count).tolist()))
+
+    def roll(self, rng, context=None):
+        # One drop as (item, count), item None when nothing dropped
+        outcomes, sampler = self.compile(context)
+        item, (low, high) = outcomes[sampler.draw(rng)]
+        if low == high:
+            return item, low
+        return item, low + int(rng.random() * (high - low + 1))
+
+    def roll_many(self, size, rng, context=None):
+        # Bulk rolls for simulations: outcome indices into outcomes plus
+        # counts, drawn from a NumPy generator seeded off the room's RNG
+        outcomes, sampler = self.compile(context)
+        generator = np.random.default_rng(rng.getrandbits(64))
+        picks = sampler.draw_many(size, generator)
+        low = np.array([count[0] for _, count in outcomes])[picks]
+        high = np.array([count[1] for _, count in outcomes])[picks]
+        counts = generator.integers(low, high + 1)
+        return [item for item, _ in outcomes], picks, counts
+
+
+def room_rng(seed, room_id):
+    # Each room rolls from its own stream, so what drops in one room does
+    # not depend on what was opened elsewhere first
+    return random.Random(seed * 1000003 + room_id)
+
+
+def is_boss_soul(context):
+    return bool(context and context.get("boss"))
+
+
+def deep_climb(context):
+    return bool(context and context.get("floor", 0) >= 3)
+
+
+POTIONS = LootTable("potions", [
+    (6, "health potion"),
+    (3, "sp potion"),
+    (1, "elixir"),
+])
+
+RELICS = LootTable("relics", [
+    (5, "ember charm"),
+    (3, "blink stone"),
+    (1, "flame trail", 1, is_boss_soul),
+])
+
+# Chest rewards; gems are worth score, everything else goes to the inventory
+CHEST_LOOT = LootTable("chest", [
+    (50, "gems", (2, 6)),
+    (25, POTIONS),
+    (10, "key"),
+    (10, RELICS, 1, deep_climb),
+    (15, None),
+])
+
+# What a trapped soul is exchanged for; boss souls unlock the best relics
+SOUL_EXCHANGE = LootTable("soul exchange", [
+    (40, POTIONS),
+    (30, "gems", (5, 15)),
+    (20, RELICS),
+    (10, RELICS, 1, is_boss_soul),
+])
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = room_rng(1, 0)
+    context = {"floor": 4, "boss": True}
+
+    # Throughput against random.choices over the same flattened table
+    outcomes, sampler = CHEST_LOOT.compile(context)
+    weights = [chance for _, chance in CHEST_LOOT.probabilities(context)]
+    draws = 1_000_000
+    start = time.perf_counter()
+    for _ in range(draws):
+        CHEST_LOOT.roll(rng, context)
+    roll_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(draws):
+        sampler.draw(rng)
+    draw_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(draws):
+        rng.choices(range(len(weights)), weights)
+    choices_time = time.perf_counter() - start
+    bulk = 10_000_000
+    start = time.perf_counter()
+    CHEST_LOOT.roll_many(bulk, rng, context)
+    bulk_time = time.perf_counter() - start
+    print(f"{len(outcomes)} chest outcomes: single draws {draws / draw_time / 1e6:.1f}M/s, "
+          f"full rolls with counts {draws / roll_time / 1e6:.1f}M/s, random.choices {draws / choices_time / 1e6:.1f}M/s, bulk {bulk / bulk_time / 1e6:.0f}M/s")
@@ -0,0 +1,225 @@
+from collections import deque
+
+import pygame
+
+# Pixels per room on the map; rooms are CELL - GAP wide with corridors in the gaps
+CELL = 12
+GAP = 4
+
+# Map window drawn on screen, in pixels
+VIEW_WIDTH = 180
+VIEW_HEIGHT = 135
+
+BACKGROUND = (10, 10, 16)
+CORRIDOR = (150, 150, 150)
+UNEXPLORED = (60, 60, 70)
+MARKER = (255, 255, 255)
+LOOT = (255, 255, 0)
+
+# (dx, dy) per wall a door sits in
+SIDES = {"left": (-1, 0), "right": (1, 0), "top": (0, -1), "bottom": (0, 1)}
+
+
+def door_side(room, door):
+    # The wall the door is nearest to
+    distances = {
+        "left": door.rect.left,
+        "right": room.width - door.rect.right,
+        "top": door.rect.top,
+        "bottom": room.height - door.rect.bottom,
+    }
+    return min(distances, key=distances.get)
+
+
+def layout_rooms(rooms):
+    # Place every room on a grid, breadth-first along doors, putting each
+    # neighbour on the side its door is on, or the nearest free cell if
+    # that one is taken. Disconnected parts start past the right edge.
+    cells = {}
+    taken = set()
+
+    def place(room_id, x, y):
+        radius = 0
+        while True:
+            for cx in range(x - radius, x + radius + 1):
+                for cy in range(y - radius, y + radius + 1):
+                    if max(abs(cx - x), abs(cy - y)) == radius and (cx, cy) not in taken:
+                        cells[room_id] = (cx, cy)
+                        taken.add((cx, cy))
+                        return
+            radius += 1
+
+    for start in rooms:
+        if start in cells:
+            continue
+        place(start, max((x for x, _ in taken), default=-2) + 2, 0)
+        queue = deque([start])
+        while queue:
+            room_id = queue.popleft()
+            room = rooms[room_id]
+            x, y = cells[room_id]
+            for door in room.doors:
+                target = door.leads_to_room
+                if target in cells or target not in rooms:
+                    continue
+                dx, dy = SIDES[door_side(room, door)]
+                place(target, x + dx, y + dy)
+                queue.append(target)
+    return cells
+
+
+class Minimap:
+    # Map of explored rooms and the doors between them. The dungeon is laid
+    # out once into a cached surface; exploring or changing a room only
+    # redraws that room's cell and the corridors touching it, and each
+    # frame blits a window of the surface around the current room.
+    def __init__(self, rooms, cell=CELL, view_width=VIEW_WIDTH, view_height=VIEW_HEIGHT):
+        self.cell = cell
+        self.view_width = view_width
+        self.view_height = view_height
+        self.explored = set()
+        self.dirty = set()
+        self.set_rooms(rooms)
+
+    def set_rooms(self, rooms):
+        # A new dungeon: lay it out again and start with nothing explored
+        self.rooms = rooms
+        cells = layout_rooms(rooms)
+        min_x = min((x for x, _ in cells.values()), default=0)
+        min_y = min((y for _, y in cells.values()), default=0)
+        self.cells = {room_id: (x - min_x, y - min_y) for room_id, (x, y) in cells.items()}
+        cols = max((x for x, _ in self.cells.values()), default=0) + 1
+        rows = max((y for _, y in self.cells.values()), default=0) + 1
+        self.surface = pygame.Surface((cols * self.cell, rows * self.cell))
+        self.surface.fill(BACKGROUND)
+        self.explored.clear()
+        self.dirty.clear()
+
+    def explore(self, room_id):
+        if room_id not in self.explored:
+            self.explored.add(room_id)
+            self.dirty.add(room_id)
+            # Neighbours' corridors now lead somewhere known
+            for door in self.rooms[room_id].doors:
+                if door.leads_to_room in self.explored:
+                    self.dirty.add(door.leads_to_room)
+
+    def mark_changed(self, room_id):
+        if room_id in self.explored:
+            self.dirty.add(room_id)
+
+    def cell_rect(self, room_id):
+        x, y = self.cells[room_id]
+        inset = GAP // 2
+        return pygame.Rect(x * self.cell + inset, y * self.cell + inset, self.cell - GAP, self.cell - GAP)
+
+    def draw_room(self, room_id):
+        room = self.rooms[room_id]
+        rect = self.cell_rect(room_id)
+        surface = self.surface
+        pygame.draw.rect(surface, BACKGROUND, rect.inflate(GAP, GAP))
+        pygame.draw.rect(surface, room.bg_color, rect)
+        pygame.draw.rect(surface, CORRIDOR, rect, 1)
+        if getattr(room, "collectibles", None):
+            pygame.draw.rect(surface, LOOT, (rect.centerx - 1, rect.centery - 1, 3, 3))
+        # Corridors run from this room's edge towards each door's neighbour
+        for door in room.doors:
+            target = door.leads_to_room
+            if target not in self.cells:
+                continue
+            dx, dy = SIDES[door_side(room, door)]
+            color = CORRIDOR if target in self.explored else UNEXPLORED
+            start = (rect.centerx + dx * rect.width // 2, rect.centery + dy * rect.height // 2)
+            end = (start[0] + dx * GAP // 2, start[1] + dy * GAP // 2)
+            pygame.draw.line(surface, color, start, end, 2)
+            if target not in self.explored:
+                # Show there is a room behind the door without revealing it
+                pygame.draw.rect(surface, UNEXPLORED, self.cell_rect(target), 1)
+
+    def update(self):
+        for room_id in self.dirty:
+            self.draw_room(room_id)
+        self.dirty.clear()
+
+    def draw(self, screen, x, y, current_room_id):
+        self.update()
+        rect = self.cell_rect(current_room_id)
+        view = pygame.Rect(0, 0, self.view_width, self.view_height)
+        view.center = rect.center
+        pygame.draw.rect(screen, BACKGROUND, (x, y, self.view_width, self.view_height))
+        # Blit only the part of the map that overlaps the window
+        area = view.clip(self.surface.get_rect())
+        screen.blit(self.surface, (x + area.x - view.x, y + area.y - view.y), area)
+        pygame.draw.rect(screen, MARKER, rect.move(x - view.x, y - view.y).inflate(2, 2), 1)
+        pygame.draw.rect(screen, CORRIDOR, (x, y, self.view_width, self.view_height), 1)
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import time
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    class BenchDoor:
+        def __init__(self, x, y, width, height, leads_to_room):
+            self.rect = pygame.Rect(x, y, width, height)
+            self.leads_to_room = leads_to_room
+
+    class BenchRoom:
+        def __init__(self, room_id):
+            self.room_id = room_id
+            self.width = 800
+            self.height = 600
+            self.bg_color = (40, 40, 70)
+            self.doors = []
+            self.collectibles = [None]
+
+    # A 64x64 maze of rooms: a spanning tree plus a few loops
+    size = 64
+    rng = random.Random(7)
+    rooms = {i: BenchRoom(i) for i in range(size * size)}
+    sides = {(1, 0): (780, 260, 20, 80), (-1, 0): (0, 260, 20, 80),
+             (0, 1): (350, 580, 100, 20), (0, -1): (350, 0, 100, 20)}
+
+    def connect(a, b, dx, dy):
+        rooms[a].doors.append(BenchDoor(*sides[(dx, dy)], b))
+        rooms[b].doors.append(BenchDoor(*sides[(-dx, -dy)], a))
+
+    seen = {0}
+    stack = [0]
+    while stack:
+        room_id = stack[-1]
+        x, y = room_id % size, room_id // size
+        options = [(dx, dy) for dx, dy in sides
+                   if 0 <= x + dx < size and 0 <= y + dy < size and (y + dy) * size + x + dx not in seen]
+        if not options:
+            stack.pop()
+            continue
+        dx, dy = rng.choice(options)
+        other = (y + dy) * size + x + dx
+        connect(room_id, other, dx, dy)
+        seen.add(other)
+        stack.append(other)
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 600))
+    start = time.perf_counter()
+    minimap = Minimap(rooms)
+    layout_time = time.perf_counter() - start
+    order = list(rooms)
+    rng.shuffle(order)
+    frames = 0
+    start = time.perf_counter()
+    for room_id in order:
+        # Explore one new room every frame, the worst case
+        minimap.explore(room_id)
+        minimap.draw(screen, 610, 10, room_id)
+        frames += 1
+    explore_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        minimap.draw(screen, 610, 10, order[-1])
+    steady_time = time.perf_counter() - start
+    print(f"{len(rooms)} rooms: layout {layout_time * 1000:.1f}ms, frame exploring a room "
+          f"{explore_time / frames * 1e6:.0f}us, frame with nothing new {steady_time / 1000 * 1e6:.0f}us")
@@ -0,0 +1,213 @@
+import asyncio
+import struct
+import time
+
+from sessions import ATTACK_KEY, ENEMIES_PER_ROOM, MOVE_KEYS, PLAYERS_PER_MATCH, TICK_RATE, Match, SessionHost
+
+# Every message is a u16 length prefix followed by a u8 message type
+FRAME = struct.Struct("<HB")
+
+# Client -> server
+MSG_JOIN = 1
+MSG_INPUT = 2
+# Held keys as a bitmask over INPUT_KEYS, client sequence, tick of the newest
+# snapshot the client has, which is what its attacks were aimed at
+INPUT = struct.Struct("<BII")
+
+# Server -> client
+MSG_WELCOME = 1
+MSG_SNAPSHOT = 2
+WELCOME = struct.Struct("<IB")  # match id, player index
+SNAPSHOT = struct.Struct("<IdBH")  # tick, server send time (time.time()), player count, enemy count
+SNAPSHOT_PLAYER = struct.Struct("<bhh")  # room, x, y
+SNAPSHOT_ENEMY = struct.Struct("<hh")
+
+# Bit order of the held-keys mask in INPUT messages
+INPUT_KEYS = MOVE_KEYS + (ATTACK_KEY,)
+
+# Stop sending snapshots to a client whose socket buffer backs up past this
+MAX_PENDING_BYTES = 64 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def keys_from_mask(mask):
+    return [key for bit, key in enumerate(INPUT_KEYS) if mask & (1 << bit)]
+
+
+def mask_from_keys(keys):
+    mask = 0
+    for bit, key in enumerate(INPUT_KEYS):
+        if key in keys:
+            mask |= 1 << bit
+    return mask
+
+
+def pack_message(kind, payload=b""):
+    return FRAME.pack(len(payload) + 1, kind) + payload
+
+
+async def read_message(reader):
+    header = await reader.readexactly(2)
+    (length,) = struct.unpack("<H", header)
+    if length == 0:
+        # Not even a message type
+        raise ProtocolError("empty frame")
+    body = await reader.readexactly(length)
+    return body[0], body[1:]
+
+
+class GameServer:
+    # Hosts matches from a SessionHost over TCP. Clients send JOIN, then
+    # their held keys every tick; after each match tick every client in it
+    # gets a snapshot of all players plus the enemies its player can see.
+    # shards, a shards.RoomShards, moves enemy simulation to worker processes.
+    def __init__(self, host="127.0.0.1", port=0, tick_rate=TICK_RATE, enemies_per_room=ENEMIES_PER_ROOM,
+                 shards=None):
+        self.host = host
+        self.port = port
+        self.enemies_per_room = enemies_per_room
+        self.session_host = SessionHost(tick_rate, shards=shards)
+        self.session_host.on_tick = self.replicate
+        self.clients = {}  # match -> [writer or None per player slot]
+        self.open_match = None
+        self.matches_started = 0
+        self.server = None
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+        self.snapshots_dropped = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    def join(self, writer):
+        # Fill matches four players at a time
+        if self.open_match is None or None not in self.clients[self.open_match]:
+            match = Match(self.matches_started, seed=self.matches_started, enemies_per_room=self.enemies_per_room)
+            self.matches_started += 1
+            self.session_host.add_match(match)
+            self.clients[match] = [None] * PLAYERS_PER_MATCH
+            self.open_match = match
+        match = self.open_match
+        index = self.clients[match].index(None)
+        self.clients[match][index] = writer
+        return match, index
+
+    async def handle_client(self, reader, writer):
+        match = None
+        index = None
+        try:
+            kind, _ = await read_message(reader)
+            if kind != MSG_JOIN:
+                return
+            match, index = self.join(writer)
+            writer.write(pack_message(MSG_WELCOME, WELCOME.pack(match.match_id, index)))
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == MSG_INPUT:
+                    if len(payload) != INPUT.size:
+                        raise ProtocolError(f"INPUT payload of {len(payload)} bytes")
+                    mask, _, view_tick = INPUT.unpack(payload)
+                    match.set_input(index, keys_from_mask(mask), view_tick)
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            # A client that hangs up or sends garbage is dropped from its match
+            pass
+        finally:
+            if match is not None:
+                self.leave(match, index)
+            writer.close()
+
+    def leave(self, match, index):
+        writers = self.clients[match]
+        writers[index] = None
+        match.set_input(index, ())
+        # The last client out ends the match; newcomers start a fresh one
+        if all(writer is None for writer in writers):
+            self.session_host.remove_match(match)
+            del self.clients[match]
+            if self.open_match is match:
+                self.open_match = None
+
+    def replicate(self, match):
+        writers = self.clients.get(match)
+        if not writers:
+            return
+        now = time.time()
+        players = b"".join(SNAPSHOT_PLAYER.pack(match.player_rooms[i], int(player.x), int(player.y))
+                           for i, player in enumerate(match.players))
+        recipients = {}  # room -> [player index]
+        for index, writer in enumerate(writers):
+            if writer is None:
+                continue
+            if writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                self.snapshots_dropped += 1
+                continue
+            recipients.setdefault(match.player_rooms[index], []).append(index)
+        for room_id, indices in recipients.items():
+            # Only the enemies in the recipient's room that it can see are sent
+            alive = [enemy for enemy in match.enemies[room_id] if enemy.alive]
+            packed = [SNAPSHOT_ENEMY.pack(int(enemy.x), int(enemy.y)) for enemy in alive]
+            visible = match.visibility.cull([(enemy.x, enemy.y) for enemy in alive], indices)
+            for index in indices:
+                seen = visible[index].tolist()
+                payload = SNAPSHOT.pack(match.tick_count, now, len(match.players), len(seen)) + players + b"".join(
+                    packed[i] for i in seen)
+                payload = pack_message(MSG_SNAPSHOT, payload)
+                writers[index].write(payload)
+                self.bytes_sent += len(payload)
+                self.snapshots_sent += 1
+
+    async def run(self, duration=None):
+        if self.server is None:
+            await self.start()
+        try:
+            await self.session_host.run(duration)
+        finally:
+            self.server.close()
+            for writers in self.clients.values():
+                for writer in writers:
+                    if writer is not None:
+                        writer.close()
+
+    def stats(self):
+        times = sorted(self.session_host.period_times)
+        def percentile(p):
+            return times[min(len(times) - 1, int(len(times) * p))] if times else 0.0
+        return {
+            "matches": self.matches_started,
+            "tick_p50": percentile(0.5),
+            "tick_p99": percentile(0.99),
+            "bytes_sent": self.bytes_sent,
+            "snapshots_sent": self.snapshots_sent,
+            "snapshots_dropped": self.snapshots_dropped,
+        }
+
+
+def serve_process(connection, tick_rate, enemies_per_room, duration):
+    # Entry point for running a server in its own process: sends back the
+    # port once listening, then the stats once the run is over
+    async def main():
+        server = GameServer(tick_rate=tick_rate, enemies_per_room=enemies_per_room)
+        connection.send(await server.start())
+        await server.run(duration)
+        connection.send(server.stats())
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    import sys
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 7777
+
+    async def main():
+        server = GameServer(port=port)
+        await server.start()
+        print(f"listening on {server.host}:{server.port}")
+        await server.run()
+
+    asyncio.run(main())
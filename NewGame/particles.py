@@ -0,0 +1,258 @@
+import math
+
+import numpy as np
+import pygame
+
+# Particle kinds: (color, radius in pixels, gravity per frame, drag per frame)
+KINDS = {
+    "flame": ((255, 140, 0), 4, -0.05, 0.94),
+    "spark": ((255, 255, 120), 2, 0.0, 0.90),
+    "smoke": ((90, 90, 90), 6, -0.02, 0.97),
+    "blood": ((200, 0, 0), 3, 0.15, 0.92),
+    "magic": ((160, 60, 255), 3, 0.0, 0.95),
+}
+KIND_NAMES = list(KINDS)
+KIND_INDEX = {name: i for i, name in enumerate(KIND_NAMES)}
+
+# Particles fade through this many pre-rendered sprites per kind
+FADE_STEPS = 8
+# Transparent background of the sprites; no particle uses this color
+SPRITE_KEY = (255, 0, 255)
+# Largest sprite radius, for culling against the screen edges
+SPRITE_REACH = max(radius for _, radius, _, _ in KINDS.values())
+# Particles are drawn on a grid of 2x2 pixel cells
+CELL_BITS = 1
+
+
+class ParticleSystem:
+    # Particles live in flat NumPy arrays, packed so the live ones are
+    # always [0:count). Updating is a handful of array operations no
+    # matter how many particles exist.
+    def __init__(self, capacity=65536, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.int16)
+        self.rng = np.random.default_rng(seed)
+
+        gravity = [KINDS[name][2] for name in KIND_NAMES]
+        drag = [KINDS[name][3] for name in KIND_NAMES]
+        self.kind_gravity = np.array(gravity, dtype=np.float32)
+        self.kind_drag = np.array(drag, dtype=np.float32)
+        self.sprites = None
+        self.sprite_corners = None
+
+    def build_sprites(self):
+        # A few cached sprites per kind, one per fade step, indexed kind * FADE_STEPS + step.
+        # The circles are flat, so a colorkey and one alpha for the whole
+        # sprite look the same as per-pixel alpha and blit several times faster.
+        self.sprites = []
+        offsets = []
+        for name in KIND_NAMES:
+            color, radius, _, _ = KINDS[name]
+            for step in range(FADE_STEPS):
+                fraction = (step + 1) / FADE_STEPS
+                size = max(1, int(round(radius * (0.4 + 0.6 * fraction))))
+                surface = pygame.Surface((size * 2, size * 2))
+                surface.fill(SPRITE_KEY)
+                pygame.draw.circle(surface, color, (size, size), size)
+                surface.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+                surface.set_alpha(int(255 * fraction), pygame.RLEACCEL)
+                self.sprites.append(surface)
+                offsets.append(size)
+        # From a cell's corner to the corner of a sprite centered in it
+        self.sprite_corners = np.array(offsets, dtype=np.int64) - (1 << CELL_BITS >> 1)
+
+    def spawn(self, x, y, count, kind="spark", speed=3.0, spread=math.tau, angle=0.0, life=30, jitter=0.5):
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return 0
+        start = self.count
+        end = start + count
+        rng = self.rng
+
+        angles = angle + (rng.random(count, dtype=np.float32) - 0.5) * spread
+        speeds = speed * (1.0 - jitter + rng.random(count, dtype=np.float32) * jitter)
+        self.pos[start:end, 0] = x
+        self.pos[start:end, 1] = y
+        self.vel[start:end, 0] = np.cos(angles) * speeds
+        self.vel[start:end, 1] = np.sin(angles) * speeds
+        lives = life * (1.0 - jitter * 0.5 + rng.random(count, dtype=np.float32) * jitter)
+        self.life[start:end] = lives
+        self.max_life[start:end] = lives
+        self.kind[start:end] = KIND_INDEX[kind]
+        self.count = end
+        return count
+
+    def burst(self, x, y, count, kind="spark", speed=3.0, life=30):
+        return self.spawn(x, y, count, kind, speed=speed, life=life)
+
+    def ring(self, x, y, radius, count, kind="magic", life=20):
+        # Particles placed on a circle drifting outwards, e.g. for AOE attacks
+        spawned = self.spawn(x, y, count, kind, speed=1.0, life=life, jitter=0.2)
+        if spawned:
+            start = self.count - spawned
+            angles = np.arctan2(self.vel[start:self.count, 1], self.vel[start:self.count, 0])
+            self.pos[start:self.count, 0] += np.cos(angles) * radius
+            self.pos[start:self.count, 1] += np.sin(angles) * radius
+        return spawned
+
+    def update(self, frames=1.0):
+        n = self.count
+        if n == 0:
+            return
+        pos = self.pos[:n]
+        vel = self.vel[:n]
+        kind = self.kind[:n]
+
+        # Drag compounds once per frame the step covers
+        vel *= (self.kind_drag ** frames)[kind][:, None]
+        vel[:, 1] += self.kind_gravity[kind] * frames
+        pos += vel * frames
+        self.life[:n] -= frames
+
+        # Keep the survivors packed at the front: the ones left past the new
+        # count move into the holes before it, so the cost follows how many
+        # particles died, not how many are alive
+        alive = self.life[:n] > 0
+        survivors = int(np.count_nonzero(alive))
+        if survivors != n:
+            holes = np.flatnonzero(~alive[:survivors])
+            movers = np.flatnonzero(alive[survivors:]) + survivors
+            for array in (self.pos, self.vel, self.life, self.max_life, self.kind):
+                array[holes] = array[movers]
+            self.count = survivors
+
+    def clear(self):
+        self.count = 0
+
+    def export(self):
+        # Copies of the live particles, for drawing from another thread
+        n = self.count
+        return self.pos[:n].copy(), self.life[:n].copy(), self.max_life[:n].copy(), self.kind[:n].copy()
+
+    def load(self, exported):
+        pos, life, max_life, kind = exported
+        n = min(len(pos), self.capacity)
+        self.pos[:n] = pos[:n]
+        self.life[:n] = life[:n]
+        self.max_life[:n] = max_life[:n]
+        self.kind[:n] = kind[:n]
+        self.count = n
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        n = self.count
+        if n == 0:
+            return
+        if self.sprites is None:
+            self.build_sprites()
+
+        # Each particle's fade step from its remaining life, and the draw cell it is centered in
+        step = (self.life[:n] * FADE_STEPS / self.max_life[:n]).astype(np.int32)
+        np.minimum(step, FADE_STEPS - 1, out=step)
+        xs = self.pos[:n, 0].astype(np.int32)
+        ys = self.pos[:n, 1].astype(np.int32)
+        xs -= int(offset_x)
+        ys -= int(offset_y)
+        xs >>= CELL_BITS
+        ys >>= CELL_BITS
+        kind = self.kind[:n]
+
+        # Only particles whose sprite touches the screen are drawn, which
+        # also keeps the coordinates well inside the 20 bits each gets in the
+        # keys below
+        width, height = screen.get_size()
+        low = -(SPRITE_REACH >> CELL_BITS) - 1
+        right = (width + SPRITE_REACH) >> CELL_BITS
+        bottom = (height + SPRITE_REACH) >> CELL_BITS
+        if xs.min() < low or ys.min() < low or xs.max() > right or ys.max() > bottom:
+            visible = (xs >= low) & (xs <= right) & (ys >= low) & (ys <= bottom)
+            step = step[visible]
+            xs = xs[visible]
+            ys = ys[visible]
+            kind = kind[visible]
+            if len(kind) == 0:
+                return
+
+        # Particles of one kind in the same cell are blitted once, with the
+        # most opaque sprite among them; dense effects collapse to far fewer
+        # blits, and each blit costs about as much as the rest of the frame's
+        # work per particle. Sorting puts the freshest of each group last.
+        keys = ((kind.astype(np.int64) << 44) | ((xs + 0x80000).astype(np.int64) << 24)
+                | ((ys + 0x80000).astype(np.int64) << 4) | step)
+        keys.sort()
+        groups = keys >> 4
+        keys = keys[np.concatenate((groups[1:] != groups[:-1], [True]))]
+        index = (keys >> 44) * FADE_STEPS + (keys & 0xF)
+        corner = self.sprite_corners[index]
+        xs = ((((keys >> 24) & 0xFFFFF) - 0x80000) << CELL_BITS) - corner
+        ys = ((((keys >> 4) & 0xFFFFF) - 0x80000) << CELL_BITS) - corner
+        screen.blits(zip(map(self.sprites.__getitem__, index.tolist()), zip(xs.tolist(), ys.tolist())), False)
+
+
+class Emitter:
+    # Spawns a steady stream of particles at a moving point, e.g. a flame trail
+    def __init__(self, system, kind="flame", rate=2.0, speed=1.0, spread=math.tau, life=25):
+        self.system = system
+        self.kind = kind
+        self.rate = rate  # Particles per frame, may be fractional
+        self.speed = speed
+        self.spread = spread
+        self.life = life
+        self.active = True
+        self.carry = 0.0
+
+    def update(self, x, y, angle=0.0):
+        if not self.active:
+            return
+        self.carry += self.rate
+        count = int(self.carry)
+        if count:
+            self.carry -= count
+            self.system.spawn(x, y, count, self.kind, self.speed, self.spread, angle, self.life)
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    screen = pygame.display.set_mode((800, 600))
+
+    # Eight emitters feeding about 50,000 live particles
+    system = ParticleSystem(capacity=65536, seed=1)
+    emitters = [Emitter(system, KIND_NAMES[i % len(KIND_NAMES)], rate=105, life=60) for i in range(8)]
+    for frame in range(120):
+        for i, emitter in enumerate(emitters):
+            emitter.update(100 + i * 80, 300)
+        system.update()
+
+    frames = 120
+    update_time = 0.0
+    draw_time = 0.0
+    live = 0
+    for frame in range(frames):
+        for i, emitter in enumerate(emitters):
+            emitter.update(100 + i * 80, 300)
+        start = time.perf_counter()
+        system.update()
+        update_time += time.perf_counter() - start
+        screen.fill((0, 0, 0))
+        start = time.perf_counter()
+        system.draw(screen)
+        draw_time += time.perf_counter() - start
+        live += system.count
+
+    # The same particles with the camera scrolled a room's width away
+    start = time.perf_counter()
+    for frame in range(frames):
+        system.draw(screen, 100000, 0)
+    offscreen_time = time.perf_counter() - start
+
+    print(f"avg live particles: {live // frames}")
+    print(f"update: {update_time / frames * 1000:.2f}ms/frame  draw: {draw_time / frames * 1000:.2f}ms/frame  "
+          f"draw off screen: {offscreen_time / frames * 1000:.2f}ms/frame")
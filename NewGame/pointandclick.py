@@ -1,94 +1,27 @@
 import pygame
-import sys
 
-# Initialize Pygame
-pygame.init()
+from assets import get_font
+from engine import Chest, Key, LockedDoor, Mode, Room
+from engine.config import BLACK, GRAY, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE, YELLOW
 
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 60
+WALL_COLOR = (220, 220, 220)
+FLOOR_COLOR = (200, 200, 200)
+FLOOR_Y = 500
 
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-BLUE = (0, 100, 200)
-GREEN = (0, 150, 0)
-RED = (200, 0, 0)
-BROWN = (139, 69, 19)
-YELLOW = (255, 255, 0)
-GRAY = (128, 128, 128)
+class Scene(Room):
+    # The single screen: a back wall with a strip of floor, drawn once into
+    # the cached static layer behind the objects
+    def draw_static(self, surface, offset_x=0, offset_y=0, area=None):
+        super().draw_static(surface, offset_x, offset_y, area)
+        pygame.draw.rect(surface, FLOOR_COLOR, (-offset_x, FLOOR_Y - offset_y, self.width, self.height - FLOOR_Y))
 
-class GameObject:
-    def __init__(self, x, y, width, height, color, name, description=""):
-        self.rect = pygame.Rect(x, y, width, height)
-        self.color = color
-        self.name = name
-        self.description = description
-        self.visible = True
-        self.interactive = True
-        
-    def draw(self, screen):
-        if self.visible:
-            pygame.draw.rect(screen, self.color, self.rect)
-            
-    def is_clicked(self, pos):
-        return self.rect.collidepoint(pos) and self.visible and self.interactive
-
-class Door(GameObject):
-    def __init__(self, x, y, width, height):
-        super().__init__(x, y, width, height, BROWN, "Door", "A wooden door. It looks locked.")
-        self.locked = True
-        
-    def draw(self, screen):
-        if self.visible:
-            pygame.draw.rect(screen, self.color, self.rect)
-            # Draw door handle
-            handle_x = self.rect.x + self.rect.width - 20
-            handle_y = self.rect.y + self.rect.height // 2
-            pygame.draw.circle(screen, YELLOW, (handle_x, handle_y), 5)
-
-class Key(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 30, 15, YELLOW, "Key", "A golden key. Wonder what it opens?")
-        
-    def draw(self, screen):
-        if self.visible:
-            # Draw key shape
-            pygame.draw.rect(screen, self.color, self.rect)
-            # Draw key teeth
-            teeth_rect = pygame.Rect(self.rect.x + 20, self.rect.y + 5, 8, 5)
-            pygame.draw.rect(screen, self.color, teeth_rect)
-
-class Chest(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 60, 40, BROWN, "Chest", "A treasure chest.")
-        self.opened = False
-        
-    def draw(self, screen):
-        if self.visible:
-            pygame.draw.rect(screen, self.color, self.rect)
-            if not self.opened:
-                # Draw closed lid
-                lid_rect = pygame.Rect(self.rect.x, self.rect.y, self.rect.width, 15)
-                pygame.draw.rect(screen, (100, 50, 0), lid_rect)
-            else:
-                # Draw open lid (tilted)
-                points = [
-                    (self.rect.x, self.rect.y),
-                    (self.rect.x + self.rect.width, self.rect.y - 20),
-                    (self.rect.x + self.rect.width, self.rect.y - 5),
-                    (self.rect.x, self.rect.y + 15)
-                ]
-                pygame.draw.polygon(screen, (100, 50, 0), points)
-
-class PointClickGame:
+class PointClickGame(Mode):
+    caption = "Point & Click Adventure Demo"
+    
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Point & Click Adventure Demo")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 24)
-        self.small_font = pygame.font.Font(None, 18)
+        super().__init__()
+        self.font = get_font(24)
+        self.small_font = get_font(18)
         
         # Game state
         self.inventory = []
@@ -96,16 +29,11 @@ class PointClickGame:
         self.message_timer = 0
         
         # Create game objects
-        self.objects = [
-            Door(350, 200, 80, 120),
-            Key(150, 400),
-            Chest(600, 350)
-        ]
-        
-        # Find specific objects for easy reference
-        self.door = self.objects[0]
-        self.key = self.objects[1]
-        self.chest = self.objects[2]
+        self.scene = Scene(0, WALL_COLOR)
+        self.door = self.scene.add_object(LockedDoor(350, 200, 80, 120))
+        self.key = self.scene.add_object(Key(150, 400, 30, 15))
+        self.chest = self.scene.add_object(Chest(600, 350, 60, 40))
+        self.loaded()
         
     def handle_click(self, pos):
         # Check inventory clicks first
@@ -118,10 +46,9 @@ class PointClickGame:
                 return
         
         # Check object clicks
-        for obj in self.objects:
-            if obj.is_clicked(pos):
-                self.interact_with_object(obj)
-                break
+        obj = self.scene.object_at(pos)
+        if obj is not None:
+            self.interact_with_object(obj)
                 
     def interact_with_object(self, obj):
         if obj == self.key:
@@ -211,42 +138,18 @@ class PointClickGame:
             text = font.render(instruction, True, color)
             self.screen.blit(text, (10, 80 + i * 20))
             
-    def draw_scene(self):
-        # Draw background
-        self.screen.fill(WHITE)
-        
-        # Draw simple room
-        # Floor
-        pygame.draw.rect(self.screen, (200, 200, 200), (0, 500, SCREEN_WIDTH, 100))
-        # Walls
-        pygame.draw.rect(self.screen, (220, 220, 220), (0, 0, SCREEN_WIDTH, 500))
-        
-        # Draw objects
-        for obj in self.objects:
-            obj.draw(self.screen)
-            
-    def run(self):
-        running = True
-        
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  # Left click
-                        self.handle_click(event.pos)
-                        
-            # Draw everything
-            self.draw_scene()
-            self.draw_inventory()
-            self.draw_ui()
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
-            
-        pygame.quit()
-        sys.exit()
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left click
+                self.handle_click(event.pos)
+            return True
+        return super().handle_event(event)
+    
+    def draw(self):
+        self.draw_room(self.scene)
+        self.draw_inventory()
+        self.draw_ui()
 
 if __name__ == "__main__":
     game = PointClickGame()
-    game.run()
\ No newline at end of file
+    game.run()
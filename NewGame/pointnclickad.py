@@ -1,369 +1,160 @@
 import pygame
-import sys
 import random
 
-# Initialize Pygame
-pygame.init()
+from assets import get_font
+from engine import Chest, Key, LockedDoor, Mode, Player, Room
+from engine.config import BLACK, DARK_GREEN, GRAY, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE, YELLOW
+from loot import CHEST_LOOT, room_rng
+from runhistory import RunHistory
+from savegame import Autosaver, SaveError, WorldCodec, load_world
+from telemetry import DOOR, INTERACT, PICKUP, TelemetryLog
+from timers import TimerWheel
 
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 60
-
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-BLUE = (0, 100, 200)
-GREEN = (0, 150, 0)
-RED = (200, 0, 0)
-BROWN = (139, 69, 19)
-YELLOW = (255, 255, 0)
-GRAY = (128, 128, 128)
-DARK_GREEN = (0, 128, 0)
+PLAYER_SPEED = 3
+PLAYER_COLOR = (0, 100, 200)
 PURPLE = (100, 0, 100)
 
-class Player:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = 25
-        self.height = 25
-        self.speed = 3
-        self.rect = pygame.Rect(x, y, self.width, self.height)
+SAVE_PATH = "adventure.sav"
+
+# How to rebuild each point-and-click object from a save file
+SAVE_OBJECTS = {
+    "Key": Key,
+    "Chest": Chest,
+    "LockedDoor": LockedDoor,
+}
+
+def build_rooms():
+    # Build the rooms; needs no display, so servers and tools can use it
+    rooms = {}
+    wall_thickness = 20
     
-    def update(self, keys, room_walls):
-        old_x, old_y = self.x, self.y
-        
-        # Movement with WASD and arrow keys
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.x -= self.speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.x += self.speed
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            self.y -= self.speed
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            self.y += self.speed
-        
-        # Update rect for collision detection
-        self.rect.x = self.x
-        self.rect.y = self.y
-        
-        # Check collision with room walls
-        collision = False
-        for wall in room_walls:
-            if self.rect.colliderect(wall.rect):
-                collision = True
-                break
-        
-        # If collision, revert to old position
-        if collision:
-            self.x, self.y = old_x, old_y
-            self.rect.x = self.x
-            self.rect.y = self.y
+    # Room 0 - Starting room with point-and-click elements
+    room0 = Room(0, DARK_GREEN)
+    # Create borders with door gaps
+    room0.add_wall(0, 0, SCREEN_WIDTH, wall_thickness)
+    room0.add_wall(0, SCREEN_HEIGHT - wall_thickness, 350, wall_thickness)
+    room0.add_wall(450, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH - 450, wall_thickness)
+    room0.add_wall(0, 0, wall_thickness, SCREEN_HEIGHT)
+    room0.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, 280)
+    room0.add_wall(SCREEN_WIDTH - wall_thickness, 340, wall_thickness, SCREEN_HEIGHT - 340)
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, BLUE, (self.x, self.y, self.width, self.height))
-        # Draw a simple face
-        pygame.draw.circle(screen, WHITE, (int(self.x + 6), int(self.y + 8)), 2)
-        pygame.draw.circle(screen, WHITE, (int(self.x + 19), int(self.y + 8)), 2)
-
-class Wall:
-    def __init__(self, x, y, width, height):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.rect = pygame.Rect(x, y, width, height)
+    # Add interior walls
+    room0.add_wall(200, 150, 60, 60)
+    room0.add_wall(500, 100, 40, 80)
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, BROWN, (self.x, self.y, self.width, self.height))
-
-class Door:
-    def __init__(self, x, y, width, height, leads_to_room, spawn_x, spawn_y):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.rect = pygame.Rect(x, y, width, height)
-        self.leads_to_room = leads_to_room
-        self.spawn_x = spawn_x
-        self.spawn_y = spawn_y
+    # Add point-and-click objects
+    room0.add_object(Key(150, 300))
+    room0.add_object(Chest(600, 250))
+    room0.add_object(LockedDoor(350, 180, 60, 80))
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, (50, 50, 50), (self.x, self.y, self.width, self.height))
-        pygame.draw.rect(screen, BLACK, (self.x + 2, self.y + 2, self.width - 4, self.height - 4))
-
-class GameObject:
-    def __init__(self, x, y, width, height, color, name, description=""):
-        self.rect = pygame.Rect(x, y, width, height)
-        self.color = color
-        self.name = name
-        self.description = description
-        self.visible = True
-        self.interactive = True
-        
-    def draw(self, screen):
-        if self.visible:
-            pygame.draw.rect(screen, self.color, self.rect)
-            
-    def is_clicked(self, pos):
-        return self.rect.collidepoint(pos) and self.visible and self.interactive
-
-class Key(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 20, 12, YELLOW, "Key", "A golden key. Wonder what it opens?")
-        
-    def draw(self, screen):
-        if self.visible:
-            # Draw key shape
-            pygame.draw.rect(screen, self.color, self.rect)
-            # Draw key teeth
-            teeth_rect = pygame.Rect(self.rect.x + 14, self.rect.y + 3, 5, 6)
-            pygame.draw.rect(screen, self.color, teeth_rect)
-
-class Chest(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 40, 30, BROWN, "Chest", "A treasure chest.")
-        self.opened = False
-        
-    def draw(self, screen):
-        if self.visible:
-            pygame.draw.rect(screen, self.color, self.rect)
-            if not self.opened:
-                # Draw closed lid
-                lid_rect = pygame.Rect(self.rect.x, self.rect.y, self.rect.width, 12)
-                pygame.draw.rect(screen, (100, 50, 0), lid_rect)
-            else:
-                # Draw open lid (tilted)
-                points = [
-                    (self.rect.x, self.rect.y),
-                    (self.rect.x + self.rect.width, self.rect.y - 15),
-                    (self.rect.x + self.rect.width, self.rect.y - 3),
-                    (self.rect.x, self.rect.y + 12)
-                ]
-                pygame.draw.polygon(screen, (100, 50, 0), points)
-
-class LockedDoor(GameObject):
-    def __init__(self, x, y, width, height):
-        super().__init__(x, y, width, height, BROWN, "Locked Door", "A wooden door. It looks locked.")
-        self.locked = True
-        
-    def draw(self, screen):
-        if self.visible:
-            pygame.draw.rect(screen, self.color, self.rect)
-            # Draw door handle
-            handle_x = self.rect.x + self.rect.width - 12
-            handle_y = self.rect.y + self.rect.height // 2
-            pygame.draw.circle(screen, YELLOW, (handle_x, handle_y), 3)
-
-class Collectible:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = 12
-        self.height = 12
-        self.rect = pygame.Rect(x, y, self.width, self.height)
+    # Add doors to other rooms
+    room0.add_door(SCREEN_WIDTH - wall_thickness, 280, wall_thickness, 60, 1, 30, 300)
+    room0.add_door(350, SCREEN_HEIGHT - wall_thickness, 100, wall_thickness, 2, 400, 50)
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, YELLOW, (self.x, self.y, self.width, self.height))
-        pygame.draw.rect(screen, RED, (self.x + 2, self.y + 2, self.width - 4, self.height - 4))
-
-class Room:
-    def __init__(self, room_id, bg_color=DARK_GREEN):
-        self.room_id = room_id
-        self.walls = []
-        self.doors = []
-        self.objects = []  # Point-and-click objects
-        self.collectibles = []  # Moving collectibles
-        self.bg_color = bg_color
-        
-    def add_door(self, x, y, width, height, leads_to_room, spawn_x, spawn_y):
-        door = Door(x, y, width, height, leads_to_room, spawn_x, spawn_y)
-        self.doors.append(door)
-        return door
+    room0.spawn_random_collectibles(3)
+    rooms[0] = room0
     
-    def add_wall(self, x, y, width, height):
-        wall = Wall(x, y, width, height)
-        self.walls.append(wall)
-        return wall
+    # Room 1 - Puzzle room
+    room1 = Room(1, PURPLE)
+    room1.add_wall(0, 0, 300, wall_thickness)
+    room1.add_wall(380, 0, SCREEN_WIDTH - 380, wall_thickness)
+    room1.add_wall(0, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH, wall_thickness)
+    room1.add_wall(0, 0, wall_thickness, 280)
+    room1.add_wall(0, 340, wall_thickness, SCREEN_HEIGHT - 340)
+    room1.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, SCREEN_HEIGHT)
     
-    def add_object(self, obj):
-        self.objects.append(obj)
-        return obj
+    # Add maze-like walls
+    room1.add_wall(100, 200, 150, 20)
+    room1.add_wall(400, 120, 20, 150)
+    room1.add_wall(150, 80, 80, 40)
     
-    def add_collectible(self, x, y):
-        collectible = Collectible(x, y)
-        self.collectibles.append(collectible)
-        return collectible
+    # Add objects
+    room1.add_object(Key(500, 400))
+    room1.add_object(Chest(100, 100))
     
-    def spawn_random_collectibles(self, count):
-        attempts = 0
-        spawned = 0
-        max_attempts = 100
-        
-        while spawned < count and attempts < max_attempts:
-            x = random.randint(30, SCREEN_WIDTH - 50)
-            y = random.randint(30, SCREEN_HEIGHT - 50)
-            
-            # Check if position is valid (not on walls, doors, or objects)
-            temp_rect = pygame.Rect(x, y, 12, 12)
-            collision = False
-            
-            for wall in self.walls:
-                if temp_rect.colliderect(wall.rect):
-                    collision = True
-                    break
-            
-            if not collision:
-                for door in self.doors:
-                    if temp_rect.colliderect(door.rect):
-                        collision = True
-                        break
-            
-            if not collision:
-                for obj in self.objects:
-                    if temp_rect.colliderect(obj.rect):
-                        collision = True
-                        break
-            
-            if not collision:
-                self.add_collectible(x, y)
-                spawned += 1
-            
-            attempts += 1
+    room1.add_door(0, 280, wall_thickness, 60, 0, SCREEN_WIDTH - 50, 300)
+    room1.add_door(300, 0, 80, wall_thickness, 3, 350, SCREEN_HEIGHT - 50)
+    room1.spawn_random_collectibles(4)
+    rooms[1] = room1
     
-    def draw(self, screen):
-        # Draw background
-        screen.fill(self.bg_color)
-        
-        # Draw walls
-        for wall in self.walls:
-            wall.draw(screen)
-        
-        # Draw doors
-        for door in self.doors:
-            door.draw(screen)
-        
-        # Draw point-and-click objects
-        for obj in self.objects:
-            obj.draw(screen)
-        
-        # Draw collectibles
-        for collectible in self.collectibles:
-            collectible.draw(screen)
+    # Room 2 - Collection room
+    room2 = Room(2, (0, 100, 100))
+    room2.add_wall(0, 0, 350, wall_thickness)
+    room2.add_wall(450, 0, SCREEN_WIDTH - 450, wall_thickness)
+    room2.add_wall(0, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH, wall_thickness)
+    room2.add_wall(0, 0, wall_thickness, SCREEN_HEIGHT)
+    room2.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, SCREEN_HEIGHT)
+    
+    room2.add_wall(200, 200, 120, 20)
+    room2.add_wall(400, 300, 60, 80)
+    
+    room2.add_object(Chest(150, 350))
+    room2.add_object(Key(650, 150))
+    
+    room2.add_door(350, 0, 100, wall_thickness, 0, 400, SCREEN_HEIGHT - 50)
+    room2.spawn_random_collectibles(6)
+    rooms[2] = room2
+    
+    # Room 3 - Final room
+    room3 = Room(3, (100, 100, 0))
+    room3.add_wall(0, 0, SCREEN_WIDTH, wall_thickness)
+    room3.add_wall(0, SCREEN_HEIGHT - wall_thickness, 300, wall_thickness)
+    room3.add_wall(380, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH - 380, wall_thickness)
+    room3.add_wall(0, 0, wall_thickness, SCREEN_HEIGHT)
+    room3.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, SCREEN_HEIGHT)
+    
+    room3.add_wall(150, 150, 200, 20)
+    room3.add_wall(450, 200, 20, 100)
+    
+    room3.add_object(Chest(400, 300))
+    room3.add_object(LockedDoor(200, 250, 50, 70))
+    
+    room3.add_door(300, SCREEN_HEIGHT - wall_thickness, 80, wall_thickness, 1, 350, 50)
+    room3.spawn_random_collectibles(5)
+    rooms[3] = room3
+    
+    return rooms
 
-class HybridGame:
+class HybridGame(Mode):
+    caption = "Hybrid Point & Click + Top-Down Adventure"
+    
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Hybrid Point & Click + Top-Down Adventure")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 24)
-        self.small_font = pygame.font.Font(None, 18)
+        super().__init__()
+        self.font = get_font(24)
+        self.small_font = get_font(18)
         
         # Game state
-        self.player = Player(100, 100)
+        self.player = Player(100, 100, PLAYER_SPEED, PLAYER_COLOR)
         self.rooms = {}
         self.current_room_id = 0
         self.inventory = []
         self.score = 0
+        self.timers = TimerWheel()
+        # Saved with the game; each room's loot stream is derived from it
+        self.loot_seed = random.randrange(1 << 32)
+        self.loot_rngs = {}
         self.message = "Use WASD/Arrows to move, click objects to interact!"
-        self.message_timer = 300
+        self.message_timer = self.timers.call_later(300, self.hide_message)
         
         # Create rooms
         self.create_rooms()
         self.current_room = self.rooms[0]
         
-    def create_rooms(self):
-        wall_thickness = 20
-        
-        # Room 0 - Starting room with point-and-click elements
-        room0 = Room(0, DARK_GREEN)
-        # Create borders with door gaps
-        room0.add_wall(0, 0, SCREEN_WIDTH, wall_thickness)
-        room0.add_wall(0, SCREEN_HEIGHT - wall_thickness, 350, wall_thickness)
-        room0.add_wall(450, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH - 450, wall_thickness)
-        room0.add_wall(0, 0, wall_thickness, SCREEN_HEIGHT)
-        room0.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, 280)
-        room0.add_wall(SCREEN_WIDTH - wall_thickness, 340, wall_thickness, SCREEN_HEIGHT - 340)
+        # Saving: F5 saves everything, F9 loads, changed rooms autosave in the background
+        self.save_codec = WorldCodec(Room, SAVE_OBJECTS)
+        self.autosaver = Autosaver(self.save_codec, SAVE_PATH)
         
-        # Add interior walls
-        room0.add_wall(200, 150, 60, 60)
-        room0.add_wall(500, 100, 40, 80)
+        # Pickups and room clear times go to the local run history
+        self.run_history = RunHistory()
+        self.run_id = self.run_history.start_run("adventure")
+        self.room_entered = 0.0
+        self.telemetry = TelemetryLog()
+        self.loaded()
         
-        # Add point-and-click objects
-        room0.add_object(Key(150, 300))
-        room0.add_object(Chest(600, 250))
-        room0.add_object(LockedDoor(350, 180, 60, 80))
-        
-        # Add doors to other rooms
-        room0.add_door(SCREEN_WIDTH - wall_thickness, 280, wall_thickness, 60, 1, 30, 300)
-        room0.add_door(350, SCREEN_HEIGHT - wall_thickness, 100, wall_thickness, 2, 400, 50)
-        
-        room0.spawn_random_collectibles(3)
-        self.rooms[0] = room0
-        
-        # Room 1 - Puzzle room
-        room1 = Room(1, PURPLE)
-        room1.add_wall(0, 0, 300, wall_thickness)
-        room1.add_wall(380, 0, SCREEN_WIDTH - 380, wall_thickness)
-        room1.add_wall(0, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH, wall_thickness)
-        room1.add_wall(0, 0, wall_thickness, 280)
-        room1.add_wall(0, 340, wall_thickness, SCREEN_HEIGHT - 340)
-        room1.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, SCREEN_HEIGHT)
-        
-        # Add maze-like walls
-        room1.add_wall(100, 200, 150, 20)
-        room1.add_wall(400, 120, 20, 150)
-        room1.add_wall(150, 80, 80, 40)
-        
-        # Add objects
-        room1.add_object(Key(500, 400))
-        room1.add_object(Chest(100, 100))
-        
-        room1.add_door(0, 280, wall_thickness, 60, 0, SCREEN_WIDTH - 50, 300)
-        room1.add_door(300, 0, 80, wall_thickness, 3, 350, SCREEN_HEIGHT - 50)
-        room1.spawn_random_collectibles(4)
-        self.rooms[1] = room1
-        
-        # Room 2 - Collection room
-        room2 = Room(2, (0, 100, 100))
-        room2.add_wall(0, 0, 350, wall_thickness)
-        room2.add_wall(450, 0, SCREEN_WIDTH - 450, wall_thickness)
-        room2.add_wall(0, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH, wall_thickness)
-        room2.add_wall(0, 0, wall_thickness, SCREEN_HEIGHT)
-        room2.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, SCREEN_HEIGHT)
-        
-        room2.add_wall(200, 200, 120, 20)
-        room2.add_wall(400, 300, 60, 80)
-        
-        room2.add_object(Chest(150, 350))
-        room2.add_object(Key(650, 150))
-        
-        room2.add_door(350, 0, 100, wall_thickness, 0, 400, SCREEN_HEIGHT - 50)
-        room2.spawn_random_collectibles(6)
-        self.rooms[2] = room2
-        
-        # Room 3 - Final room
-        room3 = Room(3, (100, 100, 0))
-        room3.add_wall(0, 0, SCREEN_WIDTH, wall_thickness)
-        room3.add_wall(0, SCREEN_HEIGHT - wall_thickness, 300, wall_thickness)
-        room3.add_wall(380, SCREEN_HEIGHT - wall_thickness, SCREEN_WIDTH - 380, wall_thickness)
-        room3.add_wall(0, 0, wall_thickness, SCREEN_HEIGHT)
-        room3.add_wall(SCREEN_WIDTH - wall_thickness, 0, wall_thickness, SCREEN_HEIGHT)
-        
-        room3.add_wall(150, 150, 200, 20)
-        room3.add_wall(450, 200, 20, 100)
-        
-        room3.add_object(Chest(400, 300))
-        room3.add_object(LockedDoor(200, 250, 50, 70))
-        
-        room3.add_door(300, SCREEN_HEIGHT - wall_thickness, 80, wall_thickness, 1, 350, 50)
-        room3.spawn_random_collectibles(5)
-        self.rooms[3] = room3
+    def create_rooms(self):
+        self.rooms = build_rooms()
         
     def handle_click(self, pos):
-        current_room = self.rooms[self.current_room_id]
-        
         # Check inventory clicks first
         inv_y = SCREEN_HEIGHT - 60
         for i, item in enumerate(self.inventory):
@@ -374,15 +165,18 @@ class HybridGame:
                 return
         
         # Check object clicks
-        for obj in current_room.objects:
-            if obj.is_clicked(pos):
-                self.interact_with_object(obj)
-                break
+        obj = self.current_room.object_at(pos)
+        if obj is not None:
+            self.interact_with_object(obj)
                 
     def interact_with_object(self, obj):
+        current_room = self.rooms[self.current_room_id]
+        self.telemetry.log(INTERACT, self.current_room_id, current_room.objects.index(obj), obj.rect.x, obj.rect.y)
+        
         if isinstance(obj, Key) and obj.visible:
             self.inventory.append("key")
             obj.visible = False
+            current_room.changes += 1
             self.show_message("You picked up a key!")
             
         elif isinstance(obj, LockedDoor):
@@ -394,11 +188,27 @@ class HybridGame:
         elif isinstance(obj, Chest):
             if not obj.opened:
                 obj.opened = True
-                self.score += 50
-                self.show_message("You opened the chest! +50 points!")
+                current_room.changes += 1
+                item, count = CHEST_LOOT.roll(self.loot_rng(), {"floor": self.current_room_id})
+                if item is None:
+                    self.show_message("You opened the chest... it's empty.")
+                elif item == "gems":
+                    self.score += 10 * count
+                    self.run_history.pickup(self.run_id, self.current_room_id, 10 * count)
+                    self.show_message(f"You opened the chest! {count} gems, +{10 * count} points!")
+                else:
+                    self.inventory.extend([item] * count)
+                    self.show_message(f"You opened the chest and found a {item}!")
             else:
                 self.show_message("The chest is already open.")
                 
+    def loot_rng(self):
+        rng = self.loot_rngs.get(self.current_room_id)
+        if rng is None:
+            rng = room_rng(self.loot_seed, self.current_room_id)
+            self.loot_rngs[self.current_room_id] = rng
+        return rng
+        
     def use_item(self, item):
         current_room = self.rooms[self.current_room_id]
         
@@ -414,6 +224,7 @@ class HybridGame:
                     if distance < 80:
                         obj.locked = False
                         obj.description = "An unlocked door."
+                        current_room.changes += 1
                         self.inventory.remove("key")
                         self.show_message("You unlocked the door!")
                         return
@@ -424,36 +235,65 @@ class HybridGame:
             
     def show_message(self, text):
         self.message = text
-        self.message_timer = 180
+        self.message_timer.cancel()
+        self.message_timer = self.timers.call_later(180, self.hide_message)
+    
+    def hide_message(self):
+        self.message = None
         
     def check_door_transitions(self):
-        player_rect = self.player.rect
-        current_room = self.rooms[self.current_room_id]
-        
-        for door in current_room.doors:
-            if player_rect.colliderect(door.rect):
-                # Transition to new room
-                self.current_room_id = door.leads_to_room
-                self.current_room = self.rooms[self.current_room_id]
-                
-                # Move player to spawn position
-                self.player.x = door.spawn_x
-                self.player.y = door.spawn_y
-                self.player.rect.x = self.player.x
-                self.player.rect.y = self.player.y
-                
-                self.show_message(f"Entered Room {self.current_room_id}")
-                break
+        current_room = self.current_room
+        door = current_room.door_at(self.player.rect)
+        if door is None:
+            return
+        # Transition to new room
+        self.current_room_id = door.leads_to_room
+        self.current_room = self.rooms[self.current_room_id]
+        
+        # Move player to spawn position
+        self.player.place(door.spawn_x, door.spawn_y)
+        self.room_entered = self.run_history.elapsed(self.run_id)
+        self.telemetry.log(DOOR, current_room.room_id, door.leads_to_room, door.spawn_x, door.spawn_y)
+        self.transition()
+        
+        self.show_message(f"Entered Room {self.current_room_id}")
+    
+    def save_game(self):
+        self.autosaver.save_full(self)
+        self.show_message("Game saved!")
+    
+    def load_game(self):
+        self.autosaver.flush()
+        try:
+            rooms, state = load_world(self.save_codec, SAVE_PATH)
+        except (OSError, SaveError):
+            self.show_message("No saved game to load.")
+            return
+        self.rooms = rooms
+        self.current_room_id = state["current_room_id"]
+        self.current_room = self.rooms[self.current_room_id]
+        self.score = state["score"]
+        self.inventory = state["inventory"]
+        # Chests roll the same way they would have in the saved game
+        self.loot_seed = state["loot_seed"]
+        self.loot_rngs = {}
+        self.player.place(int(state["player_x"]), int(state["player_y"]))
+        self.autosaver.mark_saved(self.rooms)
+        self.loaded()
+        self.show_message("Game loaded!")
     
     def handle_collectibles(self):
-        current_room = self.rooms[self.current_room_id]
-        player_rect = self.player.rect
-        
-        for collectible in current_room.collectibles[:]:
-            if player_rect.colliderect(collectible.rect):
-                current_room.collectibles.remove(collectible)
-                self.score += 10
-                self.show_message("Collected gem! +10 points")
+        current_room = self.current_room
+        taken = current_room.take_collectibles(self.player.rect)
+        for collectible in taken:
+            self.score += 10
+            self.show_message("Collected gem! +10 points")
+            self.run_history.pickup(self.run_id, self.current_room_id, 10)
+            self.telemetry.log(PICKUP, self.current_room_id, 10, collectible.x, collectible.y)
+        if taken and not current_room.collectibles:
+            # Time from walking in to picking up the last gem
+            seconds = self.run_history.elapsed(self.run_id) - self.room_entered
+            self.run_history.room_cleared(self.run_id, self.current_room_id, seconds)
         
     def draw_inventory(self):
         # Draw inventory background
@@ -482,7 +322,7 @@ class HybridGame:
                 
     def draw_ui(self):
         # Draw message
-        if self.message_timer > 0:
+        if self.message:
             msg_surface = self.font.render(self.message, True, WHITE)
             msg_rect = msg_surface.get_rect()
             msg_rect.centerx = SCREEN_WIDTH // 2
@@ -494,8 +334,6 @@ class HybridGame:
             pygame.draw.rect(self.screen, WHITE, bg_rect, 2)
             self.screen.blit(msg_surface, msg_rect)
             
-            self.message_timer -= 1
-            
         # Draw score and room info
         score_text = self.font.render(f"Score: {self.score}", True, WHITE)
         self.screen.blit(score_text, (SCREEN_WIDTH - 120, 10))
@@ -503,45 +341,53 @@ class HybridGame:
         room_text = self.small_font.render(f"Room {self.current_room_id}", True, WHITE)
         self.screen.blit(room_text, (SCREEN_WIDTH - 80, 35))
         
-    def run(self):
-        running = True
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F5:
+                self.save_game()
+                return True
+            if event.key == pygame.K_F9:
+                self.load_game()
+                return True
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left click
+                self.handle_click(event.pos)
+            return True
+        return super().handle_event(event)
+    
+    def update(self, keys):
+        self.telemetry.stamp()
+        self.timers.tick()
         
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  # Left click
-                        self.handle_click(event.pos)
-            
-            # Get pressed keys for movement
-            keys = pygame.key.get_pressed()
-            
-            # Update player
-            current_room = self.rooms[self.current_room_id]
-            self.player.update(keys, current_room.walls)
-            
-            # Check for room transitions
-            self.check_door_transitions()
-            
-            # Handle collectibles
-            self.handle_collectibles()
-            
-            # Draw everything
-            current_room.draw(self.screen)
-            self.player.draw(self.screen)
-            self.draw_inventory()
-            self.draw_ui()
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
-            
-        pygame.quit()
-        sys.exit()
+        # Update player
+        self.player.update(keys, self.current_room.wall_rects)
+        self.profiler.mark("update")
+        
+        # Check for room transitions
+        self.check_door_transitions()
+        self.profiler.mark("collisions")
+        
+        # Handle collectibles
+        self.handle_collectibles()
+        self.profiler.mark("collectibles")
+        
+        # Queue changed rooms for the background autosave
+        self.autosaver.update(self)
+    
+    def draw(self):
+        self.draw_room(self.current_room, self.player.rect.center)
+        self.player.draw(self.screen)
+        self.draw_inventory()
+        self.draw_ui()
+    
+    def close(self):
+        self.autosaver.update(self, force=True)
+        self.autosaver.close()
+        self.run_history.end_run(self.run_id, self.score, 0, "quit")
+        self.run_history.close()
+        self.telemetry.close()
+        super().close()
 
 if __name__ == "__main__":
     game = HybridGame()
-    game.run()
\ No newline at end of file
+    game.run()
@@ -0,0 +1,167 @@
+import json
+import time
+from array import array
+
+import pygame
+
+from assets import get_font
+
+# Phases every game loop reports, in the order they run inside a frame
+PHASES = ("events", "update", "collisions", "collectibles", "draw", "flip")
+
+# One color per phase for the overlay graph
+PHASE_COLORS = {
+    "events": (200, 200, 200),
+    "update": (0, 150, 255),
+    "collisions": (255, 80, 80),
+    "collectibles": (255, 220, 0),
+    "draw": (0, 200, 100),
+    "flip": (180, 0, 180),
+}
+
+TOGGLE_KEY = pygame.K_F3
+DUMP_KEY = pygame.K_F4
+FRAME_BUDGET = 1.0 / 60
+
+
+class FrameProfiler:
+    def __init__(self, phases=PHASES, capacity=240, enabled=False):
+        self.phases = phases
+        self.phase_index = {name: i for i, name in enumerate(phases)}
+        self.capacity = capacity
+        self.enabled = enabled
+        self.show_overlay = False
+        # Set when the overlay switched recording on, so hiding it switches it back off
+        self.overlay_recording = False
+
+        # Fixed-size ring buffer: one row of phase timings per frame
+        self.timings = array("d", [0.0]) * (capacity * len(phases))
+        self.frame_starts = array("d", [0.0]) * capacity
+        self.frames_recorded = 0
+        self.row = 0
+        self.last_mark = 0.0
+        self.font = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.row = self.frames_recorded % self.capacity
+        self.frame_starts[self.row] = now
+        start = self.row * len(self.phases)
+        for i in range(start, start + len(self.phases)):
+            self.timings[i] = 0.0
+        self.last_mark = now
+
+    def mark(self, phase):
+        # Record the time spent since the previous mark against this phase
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.timings[self.row * len(self.phases) + self.phase_index[phase]] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.frames_recorded += 1
+
+    def toggle(self):
+        # The overlay needs timings, so showing it records if nothing else
+        # already is; recording switched on elsewhere outlives the overlay
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay and not self.enabled:
+            self.enabled = True
+            self.overlay_recording = True
+            self.frames_recorded = 0
+        elif not self.show_overlay and self.overlay_recording:
+            self.enabled = False
+            self.overlay_recording = False
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == TOGGLE_KEY:
+            self.toggle()
+            return True
+        if event.key == DUMP_KEY:
+            self.dump_trace("frame_trace.json")
+            return True
+        return False
+
+    def recent_frames(self):
+        # Yield (start, [phase timings]) for the recorded frames, oldest first
+        count = min(self.frames_recorded, self.capacity)
+        first = self.frames_recorded - count
+        n = len(self.phases)
+        for frame in range(first, first + count):
+            row = frame % self.capacity
+            yield self.frame_starts[row], self.timings[row * n:(row + 1) * n]
+
+    def averages(self):
+        totals = [0.0] * len(self.phases)
+        count = 0
+        for _, row in self.recent_frames():
+            for i, value in enumerate(row):
+                totals[i] += value
+            count += 1
+        if count == 0:
+            return totals
+        return [total / count for total in totals]
+
+    def draw_overlay(self, screen, x=10, y=None, height=80):
+        if not self.show_overlay:
+            return
+        if self.font is None:
+            self.font = get_font(18)
+        if y is None:
+            y = screen.get_height() - height - 110
+
+        # Background panel
+        panel = pygame.Surface((self.capacity + 130, height + 20), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 160))
+        screen.blit(panel, (x - 5, y - 10))
+
+        # Stacked bar per frame, one pixel column each, scaled so two budgets fill the graph
+        scale = height / (FRAME_BUDGET * 2)
+        column = x
+        for _, row in self.recent_frames():
+            bottom = y + height
+            for phase, value in zip(self.phases, row):
+                bar = int(value * scale)
+                if bar <= 0:
+                    continue
+                top = max(y, bottom - bar)
+                pygame.draw.line(screen, PHASE_COLORS.get(phase, (255, 255, 255)), (column, bottom), (column, top))
+                bottom = top
+            column += 1
+
+        # Frame budget line
+        budget_y = y + height - int(FRAME_BUDGET * scale)
+        pygame.draw.line(screen, (255, 255, 255), (x, budget_y), (x + self.capacity, budget_y))
+
+        # Legend with average milliseconds per phase
+        for i, (phase, value) in enumerate(zip(self.phases, self.averages())):
+            text = self.font.render(f"{phase} {value * 1000:.2f}ms", True, PHASE_COLORS.get(phase, (255, 255, 255)))
+            screen.blit(text, (x + self.capacity + 8, y - 6 + i * 14))
+
+    def dump_trace(self, path):
+        # Chrome trace event format, readable by chrome://tracing and Perfetto
+        events = []
+        for start, row in self.recent_frames():
+            ts = start
+            for phase, value in zip(self.phases, row):
+                if value > 0:
+                    events.append({
+                        "name": phase,
+                        "cat": "frame",
+                        "ph": "X",
+                        "ts": ts * 1e6,
+                        "dur": value * 1e6,
+                        "pid": 1,
+                        "tid": 1,
+                    })
+                ts += value
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
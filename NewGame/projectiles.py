@@ -0,0 +1,218 @@
+import math
+
+import numpy as np
+import pygame
+
+from grid import TILE_SIZE, UniformGrid
+
+# Projectile kinds: (color, radius, speed in pixels per frame, lifetime in frames)
+KINDS = {
+    "arrow": ((230, 230, 200), 3, 14.0, 45),
+    "bolt": ((160, 60, 255), 5, 9.0, 60),
+}
+KIND_NAMES = list(KINDS)
+KIND_INDEX = {name: i for i, name in enumerate(KIND_NAMES)}
+
+
+def raycast_grid(start, delta, grid, tile_size=TILE_SIZE):
+    # Batched DDA traversal: walk every segment start -> start + delta through
+    # the tiles it crosses and return the fraction of the segment travelled
+    # before the first solid tile (np.inf where nothing was hit). Every tile
+    # along the way is visited, so fast projectiles cannot skip thin walls.
+    rows, cols = grid.shape
+    x0 = start[:, 0] / tile_size
+    y0 = start[:, 1] / tile_size
+    dx = delta[:, 0] / tile_size
+    dy = delta[:, 1] / tile_size
+    ix = np.floor(x0).astype(np.int64)
+    iy = np.floor(y0).astype(np.int64)
+
+    def solid(cx, cy):
+        outside = (cx < 0) | (cy < 0) | (cx >= cols) | (cy >= rows)
+        result = outside.copy()
+        inside = ~outside
+        result[inside] = grid[cy[inside], cx[inside]]
+        return result
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step_x = np.sign(dx).astype(np.int64)
+        step_y = np.sign(dy).astype(np.int64)
+        t_delta_x = np.where(dx != 0, np.abs(1.0 / dx), np.inf)
+        t_delta_y = np.where(dy != 0, np.abs(1.0 / dy), np.inf)
+        t_max_x = np.where(dx > 0, (ix + 1 - x0) / dx, np.where(dx < 0, (ix - x0) / dx, np.inf))
+        t_max_y = np.where(dy > 0, (iy + 1 - y0) / dy, np.where(dy < 0, (iy - y0) / dy, np.inf))
+
+    hit_t = np.full(len(start), np.inf)
+    hit_t[solid(ix, iy)] = 0.0
+    active = np.isinf(hit_t) & (np.minimum(t_max_x, t_max_y) <= 1.0)
+    while active.any():
+        idx = np.nonzero(active)[0]
+        along_x = t_max_x[idx] < t_max_y[idx]
+        t = np.where(along_x, t_max_x[idx], t_max_y[idx])
+        ix[idx] += np.where(along_x, step_x[idx], 0)
+        iy[idx] += np.where(along_x, 0, step_y[idx])
+        t_max_x[idx] += np.where(along_x, t_delta_x[idx], 0.0)
+        t_max_y[idx] += np.where(along_x, 0.0, t_delta_y[idx])
+        hit = solid(ix[idx], iy[idx])
+        hit_t[idx[hit]] = t[hit]
+        active[idx] = ~hit & (np.minimum(t_max_x[idx], t_max_y[idx]) <= 1.0)
+    return hit_t
+
+
+class ProjectileSystem:
+    # Arrows and spells stored in packed arrays, advanced a tick at a time
+    # as one batch: wall hits by grid raycast, enemy hits by swept circle
+    # tests against a per-tick uniform grid of targets.
+    def __init__(self, capacity=8192, tile_size=TILE_SIZE):
+        self.capacity = capacity
+        self.tile_size = tile_size
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.radius = np.zeros(capacity, dtype=np.float64)
+        self.damage = np.zeros(capacity, dtype=np.float64)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.owner = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int16)
+        self.target_grid = UniformGrid(64)
+        self.wall_hits = np.zeros((0, 2))
+
+    def fire(self, x, y, angle, kind="arrow", owner=0, damage=1.0, speed=None):
+        if self.count >= self.capacity:
+            return False
+        _, radius, default_speed, life = KINDS[kind]
+        speed = default_speed if speed is None else speed
+        i = self.count
+        self.pos[i] = (x, y)
+        self.vel[i] = (math.cos(angle) * speed, math.sin(angle) * speed)
+        self.radius[i] = radius
+        self.damage[i] = damage
+        self.life[i] = life
+        self.owner[i] = owner
+        self.kind[i] = KIND_INDEX[kind]
+        self.count += 1
+        return True
+
+    def update(self, grid, target_positions=None, target_radii=None):
+        # Advance every projectile by one tick. Returns parallel arrays
+        # (target index, damage, owner) for each enemy hit this tick.
+        n = self.count
+        empty = np.zeros(0, dtype=np.int64)
+        self.wall_hits = np.zeros((0, 2))
+        if n == 0:
+            return empty, np.zeros(0), empty
+
+        start = self.pos[:n]
+        delta = self.vel[:n]
+        wall_t = raycast_grid(start, delta, grid, self.tile_size)
+        # A segment only travels as far as the first wall it meets
+        travel = np.minimum(wall_t, 1.0)
+
+        hit_target = np.full(n, -1, dtype=np.int64)
+        if target_positions is not None and len(target_positions):
+            targets = np.asarray(target_positions, dtype=np.float64).reshape(-1, 2)
+            radii = np.broadcast_to(np.asarray(target_radii, dtype=np.float64), (len(targets),))
+            # Columns rather than [n, 2] rows: NumPy runs these several times faster
+            x, y = start[:, 0], start[:, 1]
+            vx, vy = delta[:, 0], delta[:, 1]
+            reach = self.radius[:n] + radii.max()
+            end_x = x + vx * travel
+            end_y = y + vy * travel
+            low = np.column_stack((np.minimum(x, end_x) - reach, np.minimum(y, end_y) - reach))
+            high = np.column_stack((np.maximum(x, end_x) + reach, np.maximum(y, end_y) + reach))
+            self.target_grid.cell_size = max(32.0, (float(np.abs(delta).max()) + 2 * float(reach.max())) / 2)
+            self.target_grid.build(targets)
+            proj, target = self.target_grid.candidate_pairs(low, high)
+            if len(proj):
+                # Swept circle test: closest approach of each segment to each candidate
+                dx = vx[proj]
+                dy = vy[proj]
+                to_x = targets[:, 0][target] - x[proj]
+                to_y = targets[:, 1][target] - y[proj]
+                length_sq = np.maximum(vx * vx + vy * vy, 1e-9)[proj]
+                u = np.clip((to_x * dx + to_y * dy) / length_sq, 0.0, travel[proj])
+                to_x -= dx * u
+                to_y -= dy * u
+                limit = self.radius[proj] + radii[target]
+                touching = to_x * to_x + to_y * to_y <= limit * limit
+                proj, target, u = proj[touching], target[touching], u[touching]
+                if len(proj):
+                    # First target along each projectile's path wins
+                    order = np.lexsort((u, proj))
+                    proj, target, u = proj[order], target[order], u[order]
+                    first = np.flatnonzero(np.concatenate(([True], proj[1:] != proj[:-1])))
+                    hit_target[proj[first]] = target[first]
+                    travel[proj[first]] = u[first]
+
+        self.pos[:n] += delta * travel[:, None]
+        self.life[:n] -= 1
+
+        struck = hit_target >= 0
+        walled = ~struck & (wall_t <= 1.0)
+        self.wall_hits = self.pos[:n][walled].copy()
+        result = (hit_target[struck], self.damage[:n][struck].copy(), self.owner[:n][struck].copy())
+
+        # Compact surviving projectiles to the front
+        alive = ~struck & ~walled & (self.life[:n] > 0)
+        survivors = int(np.count_nonzero(alive))
+        if survivors != n:
+            for array in (self.pos, self.vel, self.radius, self.damage, self.life, self.owner, self.kind):
+                array[:survivors] = array[:n][alive]
+            self.count = survivors
+        return result
+
+    def clear(self):
+        self.count = 0
+
+    def export(self):
+        # Copies of what draw() needs, for drawing from another thread
+        n = self.count
+        return self.pos[:n].copy(), self.vel[:n].copy(), self.kind[:n].copy()
+
+    def load(self, exported):
+        pos, vel, kind = exported
+        n = min(len(pos), self.capacity)
+        self.pos[:n] = pos[:n]
+        self.vel[:n] = vel[:n]
+        self.kind[:n] = kind[:n]
+        self.count = n
+
+    def draw(self, screen, offset_x=0, offset_y=0):
+        for i in range(self.count):
+            color, radius, _, _ = KINDS[KIND_NAMES[self.kind[i]]]
+            x = self.pos[i, 0] - offset_x
+            y = self.pos[i, 1] - offset_y
+            vx, vy = self.vel[i]
+            speed = math.hypot(vx, vy) or 1.0
+            tail = (x - vx / speed * radius * 3, y - vy / speed * radius * 3)
+            pygame.draw.line(screen, color, (int(tail[0]), int(tail[1])), (int(x), int(y)), max(1, radius // 2 + 1))
+
+
+if __name__ == "__main__":
+    import time
+
+    from grid import build_collision_grid
+
+    class BenchWall:
+        def __init__(self, x, y, width, height):
+            self.rect = pygame.Rect(x, y, width, height)
+
+    rng = np.random.default_rng(3)
+    walls = [BenchWall(0, 0, 800, 20), BenchWall(0, 580, 800, 20), BenchWall(0, 0, 20, 600), BenchWall(780, 0, 20, 600)]
+    for _ in range(12):
+        walls.append(BenchWall(int(rng.integers(40, 700)), int(rng.integers(40, 500)), 20, int(rng.integers(40, 160))))
+    grid = build_collision_grid(walls, 800, 600)
+
+    system = ProjectileSystem(capacity=8192)
+    targets = rng.uniform(40, 560, size=(500, 2))
+    ticks = 200
+    elapsed = 0.0
+    hits = 0
+    for tick in range(ticks):
+        while system.count < 5000:
+            system.fire(rng.uniform(40, 760), rng.uniform(40, 560), rng.uniform(0, math.tau), "arrow")
+        start = time.perf_counter()
+        struck, _, _ = system.update(grid, targets, 15)
+        elapsed += time.perf_counter() - start
+        hits += len(struck)
+    print(f"5000 projectiles, 500 targets: {elapsed / ticks * 1000:.2f}ms/tick, {hits / ticks:.0f} hits/tick")
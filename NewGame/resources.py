@@ -0,0 +1,256 @@
+from stats import consumed_soul_modifiers, split_soul_modifiers
+
+# Gameplay events; each is published as (kind, player, amount, detail)
+DAMAGE_TAKEN = "damage_taken"  # amount: damage
+KILL = "kill"  # amount: enemies killed
+ITEM_USED = "item_used"  # detail: item name
+ATTACK = "attack"
+SOUL_CONSUMED = "soul_consumed"  # detail: the dead player whose soul was taken
+SPLIT = "split"  # detail: the player who takes over the second half
+
+# Class resources from the README: (name, maximum, starting value)
+CLASS_RESOURCES = {
+    "Tank": ("rage", 100, 0),
+    "Cleric": ("soul", 100, 0),
+    "Mage": ("mana", 150, 150),
+    "Archer": ("accuracy", 100, 100),
+}
+
+RAGE_PER_DAMAGE = 0.5
+SOUL_PER_KILL = 15
+MANA_PER_SPELLBOOK = 50
+MANA_PER_SPELL = 10  # Mage: spells cost more mana
+ACCURACY_PER_SHOT = 20
+# Accuracy comes back over time when not attacking: after ACCURACY_DELAY
+# ticks without a shot, ACCURACY_REGEN every ACCURACY_INTERVAL ticks
+ACCURACY_DELAY = 30
+ACCURACY_INTERVAL = 15
+ACCURACY_REGEN = 10
+
+
+class EventBus:
+    # In-process publish/subscribe. publish() only appends to a list;
+    # dispatch(), called once per tick, hands each subscriber every event of
+    # its kind from that tick in a single call. Events published while
+    # dispatching go out on the next tick.
+    def __init__(self):
+        self.subscribers = {}
+        self.pending = []
+
+    def subscribe(self, kind, handler):
+        # handler(events) gets a list of (kind, player, amount, detail)
+        self.subscribers.setdefault(kind, []).append(handler)
+
+    def publish(self, kind, player, amount=0, detail=None):
+        self.pending.append((kind, player, amount, detail))
+
+    def dispatch(self):
+        events = self.pending
+        if not events:
+            return 0
+        self.pending = []
+        batches = {}
+        for event in events:
+            batches.setdefault(event[0], []).append(event)
+        for kind, batch in batches.items():
+            for handler in self.subscribers.get(kind, ()):
+                handler(batch)
+        return len(events)
+
+    def clear(self):
+        self.pending = []
+
+
+class Bar:
+    def __init__(self, maximum, value=None):
+        self.maximum = maximum
+        self.value = maximum if value is None else value
+
+    def gain(self, amount):
+        self.value = min(self.maximum, self.value + amount)
+
+    def spend(self, amount):
+        if self.value < amount:
+            return False
+        self.value -= amount
+        return True
+
+    @property
+    def full(self):
+        return self.value >= self.maximum
+
+
+class ResourceSystem:
+    # Class resources and SP bars per player, changed only by the events
+    # that affect them. Nothing is polled: a tick costs one handler call per
+    # event kind that occurred plus one dictionary lookup per event, however
+    # many players and bars exist. Accuracy, the one resource that comes
+    # back with time, runs off a timer started by the shot that spent it.
+    def __init__(self, bus, timers):
+        self.bus = bus
+        self.timers = timers
+        self.bars = {}  # player -> {name: Bar}
+        self.merged = {}  # player -> {bar name: name in the soul's own bars} while carrying a soul
+        self.regen_timers = {}
+        bus.subscribe(DAMAGE_TAKEN, self.on_damage)
+        bus.subscribe(KILL, self.on_kill)
+        bus.subscribe(ITEM_USED, self.on_item)
+        bus.subscribe(ATTACK, self.on_attack)
+        bus.subscribe(SOUL_CONSUMED, self.on_soul_consumed)
+        bus.subscribe(SPLIT, self.on_split)
+
+    def add_player(self, player, player_class, max_sp=None):
+        bars = {"sp": Bar(max_sp if max_sp is not None else getattr(player, "max_sp", 100))}
+        if player_class in CLASS_RESOURCES:
+            name, maximum, value = CLASS_RESOURCES[player_class]
+            bars[name] = Bar(maximum, value)
+        self.bars[player] = bars
+        return bars
+
+    def remove_player(self, player):
+        self.bars.pop(player, None)
+        self.merged.pop(player, None)
+        timer = self.regen_timers.pop(player, None)
+        if timer is not None:
+            timer.cancel()
+
+    def get(self, player, name):
+        bar = self.bars.get(player, {}).get(name)
+        return bar.value if bar is not None else None
+
+    def spend(self, player, name, amount):
+        bar = self.bars.get(player, {}).get(name)
+        return bar is not None and bar.spend(amount)
+
+    def on_damage(self, events):
+        for _, player, amount, _ in events:
+            rage = self.bars.get(player, {}).get("rage")
+            if rage is not None:
+                rage.gain(amount * RAGE_PER_DAMAGE)
+
+    def on_kill(self, events):
+        for _, player, amount, _ in events:
+            soul = self.bars.get(player, {}).get("soul")
+            if soul is not None:
+                soul.gain(amount * SOUL_PER_KILL)
+
+    def on_item(self, events):
+        for _, player, _, item in events:
+            mana = self.bars.get(player, {}).get("mana")
+            if mana is not None and item == "spellbook":
+                mana.gain(MANA_PER_SPELLBOOK)
+
+    def on_attack(self, events):
+        for _, player, _, _ in events:
+            bars = self.bars.get(player)
+            if bars is None:
+                continue
+            if "mana" in bars:
+                bars["mana"].spend(MANA_PER_SPELL)
+            if "accuracy" in bars:
+                bars["accuracy"].value = max(0, bars["accuracy"].value - ACCURACY_PER_SHOT)
+                # Every shot pushes the regeneration back
+                timer = self.regen_timers.get(player)
+                if timer is not None:
+                    timer.cancel()
+                self.regen_timers[player] = self.timers.call_every(
+                    ACCURACY_INTERVAL, self.regain_accuracy, player, delay=ACCURACY_DELAY)
+
+    def regain_accuracy(self, player):
+        accuracy = self.bars[player]["accuracy"]
+        accuracy.gain(ACCURACY_REGEN)
+        if accuracy.full:
+            self.regen_timers.pop(player).cancel()
+
+    def on_soul_consumed(self, events):
+        # The living player takes on the dead player's class: both class
+        # resources and both SP bars, with both classes' power reduced
+        for _, player, _, dead in events:
+            bars = self.bars.get(player)
+            taken = self.bars.get(dead)
+            if bars is None or taken is None or player in self.merged:
+                continue
+            names = {}
+            for name, bar in taken.items():
+                merged_name = name if name not in bars else name + "2"
+                bars[merged_name] = bar
+                names[merged_name] = name
+            self.merged[player] = names
+            self.remove_player(dead)
+            stats = getattr(player, "stats", None)
+            if stats is not None:
+                stats.add_many(consumed_soul_modifiers())
+
+    def on_split(self, events):
+        # A merged player splits into two halves: the bars that came with the
+        # soul go to the other half and both SP bars are halved, while both
+        # halves get their class power at its maximum
+        for _, player, _, other in events:
+            names = self.merged.pop(player, None)
+            if names is None:
+                continue
+            bars = self.bars[player]
+            second = {name: bars.pop(merged_name) for merged_name, name in names.items()}
+            for half in (bars, second):
+                sp = half["sp"]
+                sp.maximum //= 2
+                sp.value = min(sp.value // 2, sp.maximum)
+            self.bars[other] = second
+            for half in (player, other):
+                stats = getattr(half, "stats", None)
+                if stats is not None:
+                    stats.remove_source("soul")
+                    stats.add_many(split_soul_modifiers())
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from timers import TimerWheel
+
+    # 10,000 players with about 300 gameplay events per tick, against
+    # polling every player's resources each tick to see what changed
+    class Dummy:
+        pass
+
+    rng = random.Random(8)
+    timers = TimerWheel()
+    bus = EventBus()
+    system = ResourceSystem(bus, timers)
+    classes = list(CLASS_RESOURCES)
+    players = [Dummy() for _ in range(10000)]
+    for i, player in enumerate(players):
+        system.add_player(player, classes[i % 4], 100)
+    kinds = [(DAMAGE_TAKEN, 12, None), (KILL, 1, None), (ITEM_USED, 0, "spellbook"), (ATTACK, 0, None)]
+    ticks = 300
+    start = time.perf_counter()
+    events = 0
+    for _ in range(ticks):
+        for _ in range(300):
+            kind, amount, detail = rng.choice(kinds)
+            bus.publish(kind, rng.choice(players), amount, detail)
+        events += bus.dispatch()
+        timers.tick()
+    event_time = time.perf_counter() - start
+
+    # Same players and bars, checked every tick the way a polling update would
+    flags = {player: [False] * 4 for player in players}
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for player in players:
+            bars = system.bars[player]
+            pending = flags[player]
+            for name, bar in bars.items():
+                if pending[0] and name == "rage":
+                    bar.gain(6)
+                if pending[1] and name == "soul":
+                    bar.gain(SOUL_PER_KILL)
+                if pending[2] and name == "mana":
+                    bar.gain(MANA_PER_SPELLBOOK)
+                if pending[3] and name == "accuracy" and not bar.full:
+                    bar.gain(ACCURACY_REGEN)
+    poll_time = time.perf_counter() - start
+
+    print(f"{len(players)} players: {events / ticks:.0f} events/tick dispatched in "
+          f"{event_time / ticks * 1000:.2f}ms/tick, polling every bar {poll_time / ticks * 1000:.2f}ms/tick")
@@ -0,0 +1,261 @@
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+HISTORY_PATH = "runs.db"
+
+# Event kinds
+KILL = 1
+PICKUP = 2
+
+# Runs that count on the leaderboard and in class stats; a quit run has a
+# score but wasn't played out
+SCORED = "result IN ('win', 'dead')"
+
+# How often the writer wakes to commit whatever has been recorded
+BATCH_WAIT = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    player_class TEXT,
+    started REAL NOT NULL,
+    seconds REAL,
+    score INTEGER,
+    kills INTEGER,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS room_clears (
+    run_id INTEGER NOT NULL,
+    room_id INTEGER NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    room_id INTEGER NOT NULL,
+    time REAL NOT NULL,
+    value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_leaderboard ON runs (game, score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_class ON runs (game, player_class, score DESC);
+CREATE INDEX IF NOT EXISTS room_clears_fastest ON room_clears (room_id, seconds);
+CREATE INDEX IF NOT EXISTS events_by_run ON events (run_id, kind);
+"""
+
+# Recorded rows carry provisional run ids; the writer connection's run_ids
+# table maps them to the ids SQLite assigned, so the statements look them up
+# as they go. Rows of a run that never got stored are skipped.
+RUN_IDS = "CREATE TEMP TABLE run_ids (provisional INTEGER PRIMARY KEY, stored INTEGER NOT NULL)"
+INSERT_RUN = "INSERT INTO runs (game, player_class, started) VALUES (?, ?, ?)"
+MAP_RUN = "INSERT INTO run_ids (provisional, stored) VALUES (?, ?)"
+FINISH_RUN = ("UPDATE runs SET seconds = ?, score = ?, kills = ?, result = ? "
+              "WHERE id = (SELECT stored FROM run_ids WHERE provisional = ?)")
+INSERT_CLEAR = ("INSERT INTO room_clears (run_id, room_id, seconds) "
+                "SELECT stored, ?2, ?3 FROM run_ids WHERE provisional = ?1")
+INSERT_EVENT = ("INSERT INTO events (run_id, kind, room_id, time, value) "
+                "SELECT stored, ?2, ?3, ?4, ?5 FROM run_ids WHERE provisional = ?1")
+
+
+class RunHistory:
+    # Finished runs, room clear times, kills and pickups in a local SQLite
+    # database. Recording only appends a tuple to a deque; a writer thread
+    # with its own connection wakes every batch_wait seconds (or on flush),
+    # takes everything queued and inserts it in one transaction, so the game
+    # loop never waits on disk or a lock. Queries run on the caller's
+    # connection against WAL, so they don't block the writer.
+    #
+    # Several histories may share a database, so SQLite assigns the run ids.
+    # start_run hands out a provisional id right away, and the writer maps
+    # it to the stored one when it inserts the run's row. Writer errors are
+    # printed to out as they happen and raised by flush().
+    def __init__(self, path=HISTORY_PATH, batch_wait=BATCH_WAIT, out=sys.stderr):
+        self.path = path
+        self.batch_wait = batch_wait
+        self.out = out
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.next_run_id = 1
+        self.run_starts = {}
+        self.pending = deque()
+        self.wake = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    def start_run(self, game, player_class=None):
+        run_id = self.next_run_id
+        self.next_run_id += 1
+        self.run_starts[run_id] = time.perf_counter()
+        self.pending.append((INSERT_RUN, (run_id, game, player_class, time.time())))
+        return run_id
+
+    def elapsed(self, run_id):
+        return time.perf_counter() - self.run_starts[run_id]
+
+    def kill(self, run_id, room_id=0, value=1):
+        self.pending.append((INSERT_EVENT, (run_id, KILL, room_id, self.elapsed(run_id), value)))
+
+    def pickup(self, run_id, room_id=0, value=1):
+        self.pending.append((INSERT_EVENT, (run_id, PICKUP, room_id, self.elapsed(run_id), value)))
+
+    def room_cleared(self, run_id, room_id, seconds):
+        self.pending.append((INSERT_CLEAR, (run_id, room_id, seconds)))
+
+    def end_run(self, run_id, score, kills, result):
+        seconds = self.elapsed(run_id)
+        del self.run_starts[run_id]
+        self.pending.append((FINISH_RUN, (seconds, score, kills, result, run_id)))
+
+    def writer(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(RUN_IDS)
+        running = True
+        while running:
+            self.wake.wait(self.batch_wait)
+            self.wake.clear()
+            pending = self.pending
+            batch = [pending.popleft() for _ in range(len(pending))]
+            # Runs of the same statement go to executemany together, keeping
+            # their order relative to the other statements
+            waiting = []
+            groups = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiting.append(item)
+                elif groups and groups[-1][0] == item[0]:
+                    groups[-1][1].append(item[1])
+                else:
+                    groups.append((item[0], [item[1]]))
+            try:
+                with connection:
+                    for statement, rows in groups:
+                        if statement == INSERT_RUN:
+                            for row in rows:
+                                stored = connection.execute(statement, row[1:]).lastrowid
+                                connection.execute(MAP_RUN, (row[0], stored))
+                        else:
+                            connection.executemany(statement, rows)
+            except sqlite3.Error as error:
+                self.error = error
+                if self.out is not None:
+                    lost = sum(len(rows) for _, rows in groups)
+                    print(f"run history: {lost} records not written: {error}", file=self.out)
+            for event in waiting:
+                event.set()
+        connection.close()
+
+    def flush(self):
+        # Wait until everything recorded so far is committed, then raise
+        # the latest error the writer hit since the last flush, if any
+        done = threading.Event()
+        self.pending.append(done)
+        self.wake.set()
+        done.wait()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        self.pending.append(None)
+        self.wake.set()
+        self.thread.join()
+        self.connection.close()
+
+    def top_runs(self, count=10, game=None, player_class=None):
+        # (id, player_class, score, kills, seconds) best score first
+        query = "SELECT id, player_class, score, kills, seconds FROM runs WHERE " + SCORED
+        params = []
+        if game is not None:
+            query += " AND game = ?"
+            params.append(game)
+        if player_class is not None:
+            query += " AND player_class = ?"
+            params.append(player_class)
+        query += " ORDER BY score DESC LIMIT ?"
+        params.append(count)
+        return self.connection.execute(query, params).fetchall()
+
+    def class_stats(self, game):
+        # player_class -> (runs, wins, best score, mean score, mean kills)
+        rows = self.connection.execute(
+            "SELECT player_class, COUNT(*), SUM(result = 'win'), MAX(score), AVG(score), AVG(kills) "
+            "FROM runs WHERE game = ? AND " + SCORED + " GROUP BY player_class", (game,))
+        return {row[0]: row[1:] for row in rows}
+
+    def fastest_clears(self, room_id, count=10):
+        # (run_id, seconds) for the quickest clears of one room
+        return self.connection.execute(
+            "SELECT run_id, seconds FROM room_clears WHERE room_id = ? ORDER BY seconds LIMIT ?",
+            (room_id, count)).fetchall()
+
+    def run_events(self, run_id, kind=None):
+        # (kind, room_id, time, value) in the order they happened
+        if kind is None:
+            rows = self.connection.execute(
+                "SELECT kind, room_id, time, value FROM events WHERE run_id = ? ORDER BY rowid", (run_id,))
+        else:
+            rows = self.connection.execute(
+                "SELECT kind, room_id, time, value FROM events WHERE run_id = ? AND kind = ? ORDER BY rowid",
+                (run_id, kind))
+        return rows.fetchall()
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+
+    # A million-odd kills and pickups across 50,000 runs, then leaderboard queries
+    rng = random.Random(5)
+    classes = ["Tank", "Cleric", "Mage", "Archer", None]
+    with tempfile.TemporaryDirectory() as directory:
+        history = RunHistory(os.path.join(directory, "bench.db"))
+        runs = 50000
+        events_per_run = 24
+        start = time.perf_counter()
+        for _ in range(runs):
+            run_id = history.start_run("tower", rng.choice(classes))
+            for i in range(events_per_run):
+                if i % 3:
+                    history.kill(run_id, i % 4)
+                else:
+                    history.pickup(run_id, i % 4, 10)
+            history.room_cleared(run_id, rng.randrange(4), rng.uniform(5, 120))
+            history.end_run(run_id, rng.randrange(100000), events_per_run, rng.choice(("win", "dead")))
+        record_time = time.perf_counter() - start
+        history.flush()
+        write_time = time.perf_counter() - start
+        rows = runs * (events_per_run + 3)
+
+        queries = 1000
+        start = time.perf_counter()
+        for i in range(queries):
+            history.top_runs(10, "tower", classes[i % 4])
+        top_time = time.perf_counter() - start
+        start = time.perf_counter()
+        best = history.top_runs(10, "tower")
+        overall_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for room_id in range(queries):
+            history.fastest_clears(room_id % 4)
+        clear_time = time.perf_counter() - start
+        start = time.perf_counter()
+        stats = history.class_stats("tower")
+        stats_time = time.perf_counter() - start
+        assert best[0][2] == max(score for _, _, score, _, _ in history.top_runs(runs, "tower"))
+        assert len(history.run_events(best[0][0])) == events_per_run
+        history.close()
+    print(f"{rows} rows: recording {record_time / rows * 1e9:.0f}ns/row on the game thread, "
+          f"all committed after {write_time:.2f}s ({rows / write_time / 1e6:.2f}M rows/s)")
+    print(f"top 10 per class {top_time / queries * 1e6:.0f}us, top 10 overall {overall_time * 1e6:.0f}us, "
+          f"fastest room clears {clear_time / queries * 1e6:.0f}us, class stats {stats_time * 1000:.1f}ms "
+          f"over {len(stats)} classes")
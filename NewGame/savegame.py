@@ -0,0 +1,403 @@
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+# File layout: header, then records. Every record is
+#   type (u8) | payload length (u32) | crc32 of payload (u32) | payload
+# A full save holds one game record and one record per room. The journal
+# next to it holds records appended by autosave; on load they are applied
+# in order over the full save, so the newest copy of each room wins.
+MAGIC = b"SBSV"
+JOURNAL_MAGIC = b"SBJL"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHI")  # magic, version, record count (0 in journals)
+RECORD = struct.Struct("<BII")
+GAME_STATE = struct.Struct("<iffi")  # current room, player x, player y, score
+LOOT_SEED = struct.Struct("<I")  # after GAME_STATE, then the inventory
+ROOM_HEADER = struct.Struct("<iBBBHHHHHH")  # id, rgb, width, height, then item counts
+DOOR = struct.Struct("<hhhhihh")
+OBJECT = struct.Struct("<BhhhhB")  # type, rect, flags
+OBJECT_TEXT = struct.Struct("<H")  # description length, then the UTF-8 description
+
+RECORD_GAME = 1
+RECORD_ROOM = 2
+
+# Object flag bits
+VISIBLE = 1
+INTERACTIVE = 2
+OPENED = 4
+LOCKED = 8
+
+# Compact the journal into a fresh full save once it grows past this
+JOURNAL_LIMIT = 4 * 1024 * 1024
+
+
+class SaveError(Exception):
+    pass
+
+
+class WorldCodec:
+    # Encodes rooms and game state to bytes and back. The game supplies its
+    # own Room class and a factory per point-and-click object type, so the
+    # format doesn't depend on any one game module.
+    def __init__(self, room_class, object_factories):
+        self.room_class = room_class
+        self.object_names = list(object_factories)
+        self.object_types = {name: i for i, name in enumerate(self.object_names)}
+        self.object_factories = object_factories
+
+    def encode_game(self, game):
+        return self.encode_state({
+            "current_room_id": game.current_room_id,
+            "player_x": game.player.x,
+            "player_y": game.player.y,
+            "score": game.score,
+            "inventory": game.inventory,
+            "loot_seed": game.loot_seed,
+        })
+
+    def encode_state(self, state):
+        # The game record from a state dict as decode_game returns it
+        inventory = "\n".join(state["inventory"]).encode("utf-8")
+        return (GAME_STATE.pack(state["current_room_id"], state["player_x"], state["player_y"], state["score"])
+                + LOOT_SEED.pack(state["loot_seed"]) + inventory)
+
+    def decode_game(self, payload):
+        current_room_id, x, y, score = GAME_STATE.unpack_from(payload)
+        (loot_seed,) = LOOT_SEED.unpack_from(payload, GAME_STATE.size)
+        inventory = payload[GAME_STATE.size + LOOT_SEED.size:].decode("utf-8")
+        return {
+            "current_room_id": current_room_id,
+            "player_x": x,
+            "player_y": y,
+            "score": score,
+            "inventory": inventory.split("\n") if inventory else [],
+            "loot_seed": loot_seed,
+        }
+
+    def encode_room(self, room):
+        walls = array("h")
+        for wall in room.walls:
+            walls.extend((wall.x, wall.y, wall.width, wall.height))
+        collectibles = array("h")
+        for collectible in room.collectibles:
+            collectibles.extend((collectible.x, collectible.y))
+        parts = [ROOM_HEADER.pack(room.room_id, *room.bg_color, getattr(room, "width", 0), getattr(room, "height", 0),
+                                  len(room.walls), len(room.doors), len(room.objects), len(room.collectibles)),
+                 walls.tobytes()]
+        for door in room.doors:
+            parts.append(DOOR.pack(door.x, door.y, door.width, door.height, door.leads_to_room,
+                                   door.spawn_x, door.spawn_y))
+        for obj in room.objects:
+            flags = (VISIBLE if obj.visible else 0) | (INTERACTIVE if obj.interactive else 0)
+            flags |= (OPENED if getattr(obj, "opened", False) else 0) | (LOCKED if getattr(obj, "locked", False) else 0)
+            rect = obj.rect
+            text = obj.description.encode("utf-8")
+            parts.append(OBJECT.pack(self.object_types[type(obj).__name__], rect.x, rect.y, rect.width, rect.height, flags))
+            parts.append(OBJECT_TEXT.pack(len(text)) + text)
+        parts.append(collectibles.tobytes())
+        return b"".join(parts)
+
+    def decode_room(self, payload):
+        (room_id, r, g, b, width, height,
+         wall_count, door_count, object_count, collectible_count) = ROOM_HEADER.unpack_from(payload)
+        room = self.room_class(room_id, (r, g, b))
+        if width:
+            room.width = width
+            room.height = height
+        offset = ROOM_HEADER.size
+
+        walls = array("h")
+        walls.frombytes(payload[offset:offset + wall_count * 8])
+        offset += wall_count * 8
+        for i in range(0, len(walls), 4):
+            room.add_wall(walls[i], walls[i + 1], walls[i + 2], walls[i + 3])
+
+        for _ in range(door_count):
+            room.add_door(*DOOR.unpack_from(payload, offset))
+            offset += DOOR.size
+
+        for _ in range(object_count):
+            kind, x, y, w, h, flags = OBJECT.unpack_from(payload, offset)
+            offset += OBJECT.size
+            obj = self.object_factories[self.object_names[kind]](x, y, w, h)
+            obj.visible = bool(flags & VISIBLE)
+            obj.interactive = bool(flags & INTERACTIVE)
+            if hasattr(obj, "opened"):
+                obj.opened = bool(flags & OPENED)
+            if hasattr(obj, "locked"):
+                obj.locked = bool(flags & LOCKED)
+            (length,) = OBJECT_TEXT.unpack_from(payload, offset)
+            offset += OBJECT_TEXT.size
+            obj.description = payload[offset:offset + length].decode("utf-8")
+            offset += length
+            room.add_object(obj)
+
+        collectibles = array("h")
+        collectibles.frombytes(payload[offset:offset + collectible_count * 4])
+        for i in range(0, len(collectibles), 2):
+            room.add_collectible(collectibles[i], collectibles[i + 1])
+        return room
+
+
+def pack_record(kind, payload):
+    return RECORD.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(data, offset):
+    # Yield (type, payload) until the data ends or a torn/corrupt record is found
+    end = len(data)
+    while offset + RECORD.size <= end:
+        kind, length, crc = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return
+        yield kind, payload
+        offset = start + length
+
+
+def records_end(data, offset):
+    # Offset just past the last intact record; anything after it is a torn write
+    for _, payload in read_records(data, offset):
+        offset += RECORD.size + len(payload)
+    return offset
+
+
+def encode_world(codec, game):
+    return encode_records(codec, codec.encode_game(game), game.rooms)
+
+
+def encode_records(codec, state, rooms):
+    # A full save from an encoded game record and the rooms
+    records = [pack_record(RECORD_GAME, state)]
+    for room in rooms.values():
+        records.append(pack_record(RECORD_ROOM, codec.encode_room(room)))
+    return HEADER.pack(MAGIC, VERSION, len(records)) + b"".join(records)
+
+
+def write_atomic(path, data):
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def journal_path(path):
+    return path + ".journal"
+
+
+def save_world(codec, game, path):
+    write_atomic(path, encode_world(codec, game))
+    # The full save supersedes anything journaled so far
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
+
+
+def load_world(codec, path):
+    # Returns (rooms, game state dict) from the full save plus its journal
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise SaveError(f"{path} is truncated")
+    magic, version, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SaveError(f"{path} is not a save file")
+    if version != VERSION:
+        raise SaveError(f"{path} has an unknown version ({version})")
+
+    payloads = {}
+    state = None
+    sources = [data]
+    if os.path.exists(journal_path(path)):
+        with open(journal_path(path), "rb") as f:
+            journal = f.read()
+        if len(journal) >= HEADER.size and journal[:4] == JOURNAL_MAGIC:
+            journal_version = HEADER.unpack_from(journal)[1]
+            if journal_version != VERSION:
+                raise SaveError(f"{journal_path(path)} has an unknown version ({journal_version})")
+            sources.append(journal)
+    for source in sources:
+        for kind, payload in read_records(source, HEADER.size):
+            if kind == RECORD_GAME:
+                state = payload
+            elif kind == RECORD_ROOM:
+                payloads[struct.unpack_from("<i", payload)[0]] = payload
+    if state is None:
+        raise SaveError(f"{path} has no game state")
+
+    # Rooms are decoded once each, after the journal has picked the newest copy
+    rooms = {room_id: codec.decode_room(payload) for room_id, payload in payloads.items()}
+    return rooms, codec.decode_game(state)
+
+
+class Autosaver:
+    # Incremental autosave: every interval, rooms whose change counter moved
+    # since the last save are encoded on the game thread (a few small byte
+    # strings) and handed to a writer thread that appends them to the journal.
+    # Disk I/O never happens on the game loop.
+    def __init__(self, codec, path, interval=10.0):
+        self.codec = codec
+        self.path = path
+        self.interval = interval
+        self.saved_changes = {}
+        self.last_save = time.perf_counter()
+        self.queue = queue.Queue()
+        self.error = None
+        # The journal left by an earlier run is checked before the first append
+        self.journal_checked = False
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    def mark_saved(self, rooms):
+        self.saved_changes = {room_id: room.changes for room_id, room in rooms.items()}
+
+    def save_full(self, game):
+        self.queue.put(("full", encode_world(self.codec, game)))
+        self.mark_saved(game.rooms)
+        self.last_save = time.perf_counter()
+
+    def update(self, game, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_save < self.interval:
+            return 0
+        self.last_save = now
+        if not os.path.exists(self.path) and self.queue.empty():
+            self.save_full(game)
+            return len(game.rooms)
+
+        records = [pack_record(RECORD_GAME, self.codec.encode_game(game))]
+        for room_id, room in game.rooms.items():
+            if self.saved_changes.get(room_id) != room.changes:
+                records.append(pack_record(RECORD_ROOM, self.codec.encode_room(room)))
+                self.saved_changes[room_id] = room.changes
+        self.queue.put(("append", b"".join(records)))
+        return len(records) - 1
+
+    def writer(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            kind, data = item
+            try:
+                if kind == "full":
+                    write_atomic(self.path, data)
+                    if os.path.exists(journal_path(self.path)):
+                        os.remove(journal_path(self.path))
+                else:
+                    if not self.journal_checked:
+                        self.repair_journal()
+                        self.journal_checked = True
+                    journal = journal_path(self.path)
+                    new_file = not os.path.exists(journal)
+                    with open(journal, "ab") as f:
+                        if new_file:
+                            f.write(HEADER.pack(JOURNAL_MAGIC, VERSION, 0))
+                        f.write(data)
+                    if os.path.getsize(journal) > JOURNAL_LIMIT:
+                        self.compact()
+            except OSError as error:
+                self.error = error
+                # A failed append may have left part of a record behind
+                self.journal_checked = False
+            finally:
+                self.queue.task_done()
+
+    def repair_journal(self):
+        # A crash mid-append leaves a torn record at the end of the journal.
+        # Loading stops there, so anything appended after it would never be
+        # read: cut the journal back to its last intact record. A journal
+        # that isn't ours, or has no save to apply to, is dropped.
+        journal = journal_path(self.path)
+        if not os.path.exists(journal):
+            return
+        with open(journal, "rb") as f:
+            data = f.read()
+        if (len(data) < HEADER.size or data[:4] != JOURNAL_MAGIC or HEADER.unpack_from(data)[1] != VERSION
+                or not os.path.exists(self.path)):
+            os.remove(journal)
+            return
+        end = records_end(data, HEADER.size)
+        if end < len(data):
+            with open(journal, "r+b") as f:
+                f.truncate(end)
+
+    def compact(self):
+        # Fold the journal into a new full save, off the game thread
+        rooms, state = load_world(self.codec, self.path)
+        write_atomic(self.path, encode_records(self.codec, self.codec.encode_state(state), rooms))
+        os.remove(journal_path(self.path))
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    import pointnclickad
+    from pointnclickad import SAVE_OBJECTS, Room
+
+    class BenchGame:
+        pass
+
+    # A 1,000-room dungeon made from copies of the adventure's four rooms
+    template = pointnclickad.build_rooms()
+    game = BenchGame()
+    game.rooms = {}
+    for copy in range(250):
+        for room_id, source in template.items():
+            new_id = copy * 4 + room_id
+            room = Room(new_id, source.bg_color)
+            for wall in source.walls:
+                room.add_wall(wall.x, wall.y, wall.width, wall.height)
+            for door in source.doors:
+                room.add_door(door.x, door.y, door.width, door.height, copy * 4 + door.leads_to_room,
+                              door.spawn_x, door.spawn_y)
+            for obj in source.objects:
+                room.add_object(SAVE_OBJECTS[type(obj).__name__](obj.rect.x, obj.rect.y, obj.rect.width, obj.rect.height))
+            for collectible in source.collectibles:
+                room.add_collectible(collectible.x, collectible.y)
+            game.rooms[new_id] = room
+    game.player = pointnclickad.Player(100, 100)
+    game.current_room_id = 0
+    game.inventory = ["key"]
+    game.score = 120
+    game.loot_seed = 1
+
+    codec = WorldCodec(Room, SAVE_OBJECTS)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "world.sav")
+        start = time.perf_counter()
+        save_world(codec, game, path)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        rooms, state = load_world(codec, path)
+        load_time = time.perf_counter() - start
+        print(f"1000 rooms, {os.path.getsize(path) // 1024}KB: save {save_time * 1000:.1f}ms, load {load_time * 1000:.1f}ms")
+
+        autosaver = Autosaver(codec, path)
+        autosaver.mark_saved(game.rooms)
+        for room_id in range(0, 1000, 100):
+            game.rooms[room_id].collectibles.clear()
+            game.rooms[room_id].changes += 1
+        start = time.perf_counter()
+        written = autosaver.update(game, force=True)
+        queued = time.perf_counter() - start
+        autosaver.flush()
+        autosaver.close()
+        rooms, state = load_world(codec, path)
+        assert all(not rooms[room_id].collectibles for room_id in range(0, 1000, 100))
+        print(f"autosave: {written} changed rooms queued in {queued * 1e6:.0f}us on the game thread")
@@ -0,0 +1,328 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+import pygame
+
+import gamedemo
+import towergame
+from fov import FovCache, PlayerVisibility
+from lagcomp import PositionHistory
+from timers import TimerWheel
+
+TICK_RATE = 30
+PLAYERS_PER_MATCH = 4
+ENEMIES_PER_ROOM = 6
+
+# Share of each tick period the host may spend simulating matches
+CPU_BUDGET = 0.8
+
+MOVE_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+ATTACK_KEY = pygame.K_SPACE
+ATTACK_RANGE = 40
+ATTACK_DELAY = 15  # ticks
+
+# Every match is built from gamedemo's room layout, so one cache of sight
+# masks serves all of them
+FOV_CACHE = FovCache()
+
+
+class InputState:
+    # Stands in for pygame.key.get_pressed() on a headless server
+    def __init__(self):
+        self.held = set()
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class Match:
+    # One headless four-player game built from gamedemo's rooms and players
+    # and towergame's enemies. Only rooms with a player in them are simulated.
+    def __init__(self, match_id, seed=None, enemies_per_room=ENEMIES_PER_ROOM):
+        self.match_id = match_id
+        self.rng = random.Random(seed)
+        self.rooms = gamedemo.build_rooms(self.rng)
+        for room_id, room in self.rooms.items():
+            if room_id not in FOV_CACHE.room_grids:
+                FOV_CACHE.set_room_grid(room_id, room.get_collision_grid())
+        # What each player can see, for culling their snapshots
+        self.visibility = PlayerVisibility(FOV_CACHE)
+        self.players = []
+        self.inputs = []
+        self.player_rooms = []
+        self.scores = []
+        self.timers = TimerWheel()
+        self.attack_timers = []
+        # Tick of the newest snapshot each player had when they sent their input
+        self.view_ticks = []
+        for i in range(PLAYERS_PER_MATCH):
+            self.players.append(gamedemo.Player(380 + i * 30, 300))
+            self.inputs.append(InputState())
+            self.player_rooms.append(0)
+            self.scores.append(0)
+            self.attack_timers.append(None)
+            self.view_ticks.append(None)
+        self.enemies = {}
+        # Enemy positions per room for the last few ticks, so a hit is checked
+        # against what the attacker saw; only active rooms are recorded, the
+        # rest don't move
+        self.histories = {}
+        for room_id, room in self.rooms.items():
+            self.enemies[room_id] = [self.spawn_enemy(room) for _ in range(enemies_per_room)]
+            self.histories[room_id] = PositionHistory(max(1, enemies_per_room))
+        self.tick_count = 0
+        # Every room starts with its spawn positions on record
+        self.active_rooms = set(self.rooms)
+        self.record_positions()
+        self.active_rooms = set()
+        self.latencies = deque(maxlen=TICK_RATE * 10)
+        self.skipped = 0
+
+    def spawn_enemy(self, room, attempts=100):
+        # Anywhere in the room clear of its walls, from the match's own rng
+        enemy = towergame.Enemy(0, 0, self.timers, self.rng, (room.width, room.height), room.wall_rects)
+        for _ in range(attempts):
+            enemy.x = self.rng.randint(60, room.width - 60)
+            enemy.y = self.rng.randint(60, room.height - 60)
+            if enemy.get_rect().collidelist(room.wall_rects) == -1:
+                break
+        return enemy
+
+    def set_input(self, player_index, held_keys, view_tick=None):
+        # view_tick: the snapshot tick the client acked; None checks hits at the present
+        self.inputs[player_index].held = set(held_keys)
+        self.view_ticks[player_index] = view_tick
+
+    def tick(self):
+        self.tick_players()
+        self.step_enemies()
+        self.record_positions()
+
+    def tick_players(self):
+        # Everything but the enemies, which a sharded host steps in its workers
+        self.timers.tick()
+        self.active_rooms = set()
+        for i, player in enumerate(self.players):
+            room = self.rooms[self.player_rooms[i]]
+            player.update(self.inputs[i], room.wall_rects)
+            self.check_door_transitions(i)
+            self.handle_collectibles(i)
+            self.player_attack(i)
+            self.visibility.update(i, self.player_rooms[i], player.rect.centerx, player.rect.centery,
+                                   player.sight_radius)
+            self.active_rooms.add(self.player_rooms[i])
+        self.tick_count += 1
+
+    def step_enemies(self):
+        for room_id in self.active_rooms:
+            for enemy in self.enemies[room_id]:
+                enemy.update()
+
+    def record_positions(self):
+        # After the enemies moved, so tick_count matches the snapshot sent next
+        for room_id in self.active_rooms:
+            enemies = self.enemies[room_id]
+            self.histories[room_id].record(self.tick_count, [(enemy.x, enemy.y) for enemy in enemies],
+                                           [enemy.alive for enemy in enemies])
+
+    def check_door_transitions(self, player_index):
+        player = self.players[player_index]
+        door = self.rooms[self.player_rooms[player_index]].door_at(player.rect)
+        if door is not None:
+            self.player_rooms[player_index] = door.leads_to_room
+            player.place(door.spawn_x, door.spawn_y)
+
+    def handle_collectibles(self, player_index):
+        room = self.rooms[self.player_rooms[player_index]]
+        taken = room.take_collectibles(self.players[player_index].rect)
+        self.scores[player_index] += 10 * len(taken)
+
+    def player_attack(self, player_index):
+        timer = self.attack_timers[player_index]
+        if (timer is not None and timer.active) or not self.inputs[player_index][ATTACK_KEY]:
+            return
+        self.attack_timers[player_index] = self.timers.call_later(ATTACK_DELAY)
+        player = self.players[player_index]
+        center_x = player.x + player.width // 2
+        center_y = player.y + player.height // 2
+        # Rewind the room's enemies to the attacker's view, then kill at the present
+        room_id = self.player_rooms[player_index]
+        view_tick = self.view_ticks[player_index]
+        enemies = self.enemies[room_id]
+        hits = self.histories[room_id].hits_in_radius(self.tick_count if view_tick is None else view_tick,
+                                                      center_x, center_y, ATTACK_RANGE, len(enemies))
+        for index in hits.tolist():
+            enemy = enemies[index]
+            if enemy.alive:
+                enemy.alive = False
+                self.scores[player_index] += 100
+
+    def latency_percentiles(self):
+        if not self.latencies:
+            return 0.0, 0.0
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+class SessionHost:
+    # Runs many matches in one asyncio process. Each tick period the host
+    # walks the matches round-robin, starting after the last one it reached,
+    # until the CPU budget for the period is spent; matches it doesn't reach
+    # count a skipped tick and go first next period. With shards (a
+    # shards.RoomShards) the enemies of every match ticked in a period are
+    # stepped together in worker processes after all their players have moved.
+    def __init__(self, tick_rate=TICK_RATE, cpu_budget=CPU_BUDGET, shards=None):
+        self.tick_rate = tick_rate
+        self.period = 1.0 / tick_rate
+        self.cpu_budget = cpu_budget
+        self.shards = shards
+        self.matches = []
+        self.next_index = 0
+        self.running = False
+        self.periods = 0
+        self.busy_time = 0.0
+        self.period_times = deque(maxlen=tick_rate * 60)
+        self.on_tick = None  # Optional callback(match) after each match tick, e.g. bots or replication
+
+    def add_match(self, match):
+        if self.shards is not None:
+            self.shards.adopt(match)
+        self.matches.append(match)
+        return match
+
+    def remove_match(self, match):
+        index = self.matches.index(match)
+        self.matches.pop(index)
+        if self.shards is not None:
+            self.shards.release(match)
+        if self.next_index > index:
+            self.next_index -= 1
+
+    async def run_period(self, deadline):
+        period_start = time.perf_counter()
+        budget_end = period_start + self.period * self.cpu_budget
+        count = len(self.matches)
+        ticked = 0
+        stepped = []
+        while ticked < count:
+            match = self.matches[self.next_index % count]
+            if self.shards is None:
+                match.tick()
+                self.finish_tick(match, deadline)
+            else:
+                match.tick_players()
+                stepped.append(match)
+            self.next_index = (self.next_index + 1) % count
+            ticked += 1
+            if time.perf_counter() >= budget_end:
+                break
+            # Let network tasks run between matches
+            await asyncio.sleep(0)
+        if stepped:
+            self.shards.step(stepped)
+            for match in stepped:
+                match.record_positions()
+                self.finish_tick(match, deadline)
+        for i in range(count - ticked):
+            self.matches[(self.next_index + i) % count].skipped += 1
+        elapsed = time.perf_counter() - period_start
+        self.busy_time += elapsed
+        self.period_times.append(elapsed)
+        self.periods += 1
+
+    def finish_tick(self, match, deadline):
+        if self.on_tick is not None:
+            self.on_tick(match)
+        # Latency: how long after this period's deadline the match's tick finished
+        match.latencies.append(time.perf_counter() - deadline)
+
+    async def run(self, duration=None):
+        self.running = True
+        deadline = time.perf_counter()
+        end = None if duration is None else deadline + duration
+        while self.running and (end is None or deadline < end):
+            if self.matches:
+                await self.run_period(deadline)
+            deadline += self.period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Fell behind: don't try to catch up with a burst of periods
+                deadline = time.perf_counter()
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def report(self):
+        rows = []
+        for match in self.matches:
+            p50, p99 = match.latency_percentiles()
+            rows.append((match.match_id, match.tick_count, match.skipped, p50, p99))
+        return rows
+
+    def utilization(self):
+        if not self.periods:
+            return 0.0
+        return self.busy_time / (self.periods * self.period)
+
+
+def random_bot_inputs(match):
+    # Wander: each player changes direction now and then
+    rng = match.rng
+    for i in range(PLAYERS_PER_MATCH):
+        if rng.random() < 0.05:
+            match.set_input(i, rng.sample(MOVE_KEYS, rng.randint(0, 2)))
+
+
+async def load_test(tick_rate=TICK_RATE, seconds=3.0, start=4, limit=4096):
+    # Double the number of matches until one period can no longer tick them
+    # all, then bisect to the largest count that runs every match every tick.
+    async def trial(count):
+        host = SessionHost(tick_rate)
+        host.on_tick = random_bot_inputs
+        for match_id in range(count):
+            host.add_match(Match(match_id, seed=match_id))
+        await host.run(seconds)
+        skipped = sum(match.skipped for match in host.matches)
+        worst_p99 = max(match.latency_percentiles()[1] for match in host.matches)
+        ok = skipped == 0 and worst_p99 < host.period
+        print(f"{count:5d} matches: utilization {host.utilization() * 100:5.1f}%, "
+              f"worst p99 tick latency {worst_p99 * 1000:6.2f}ms, skipped ticks {skipped}")
+        return ok
+
+    good = 0
+    count = start
+    while count <= limit and await trial(count):
+        good = count
+        count *= 2
+    # The doubling can overshoot the limit; nothing past it was tried
+    bad = min(count, limit + 1)
+    while bad - good > max(1, good // 8):
+        middle = (good + bad) // 2
+        if await trial(middle):
+            good = middle
+        else:
+            bad = middle
+    print(f"one core sustains about {good} concurrent {PLAYERS_PER_MATCH}-player matches at {tick_rate} Hz")
+    return good
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--load-test" in sys.argv:
+        asyncio.run(load_test())
+    else:
+        host = SessionHost()
+        host.on_tick = random_bot_inputs
+        for match_id in range(16):
+            host.add_match(Match(match_id, seed=match_id))
+        asyncio.run(host.run(5.0))
+        for match_id, ticks, skipped, p50, p99 in host.report():
+            print(f"match {match_id:3d}: {ticks} ticks, {skipped} skipped, "
+                  f"latency p50 {p50 * 1000:.2f}ms p99 {p99 * 1000:.2f}ms")
+        print(f"host utilization {host.utilization() * 100:.1f}%")
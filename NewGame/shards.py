@@ -0,0 +1,201 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Columns of the shared enemy table
+X, Y, ALIVE = range(3)
+COLUMNS = 3
+
+
+class SharedEnemy:
+    # Coordinator-side view of an enemy a shard worker owns: position and
+    # alive flag live in its row of the shared table. The coordinator only
+    # touches it between steps and the worker only during one, so there is
+    # never more than one writer.
+    __slots__ = ("table", "slot", "size")
+
+    def __init__(self, table, slot, size):
+        self.table = table
+        self.slot = slot
+        self.size = size
+
+    @property
+    def x(self):
+        return float(self.table[self.slot, X])
+
+    @property
+    def y(self):
+        return float(self.table[self.slot, Y])
+
+    @property
+    def alive(self):
+        return bool(self.table[self.slot, ALIVE])
+
+    @alive.setter
+    def alive(self, value):
+        # A kill by a player; the worker picks it up before its next step
+        self.table[self.slot, ALIVE] = value
+
+
+def attach(name, capacity):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((capacity, COLUMNS), dtype=np.float64, buffer=block.buf)
+
+
+def shard_worker(conn, name, capacity):
+    block, table = attach(name, capacity)
+    # (match id, room id) -> (slots, [towergame.Enemy]) for the rooms this worker owns
+    rooms = {}
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == "step":
+                start = time.perf_counter()
+                for key in message[1]:
+                    slots, enemies = rooms[key]
+                    for enemy, alive in zip(enemies, table[slots, ALIVE].tolist()):
+                        enemy.alive = alive != 0
+                        enemy.update()
+                    table[slots, X] = [enemy.x for enemy in enemies]
+                    table[slots, Y] = [enemy.y for enemy in enemies]
+                conn.send(time.perf_counter() - start)
+            elif message[0] == "adopt":
+                rooms.update(message[1])
+            elif message[0] == "release":
+                for key in message[1]:
+                    rooms.pop(key, None)
+            else:
+                break
+    finally:
+        del table
+        block.close()
+
+
+class RoomShards:
+    # Steps the enemies of a SessionHost's matches in worker processes. Each
+    # room of an adopted match is dealt to one worker, which keeps the real
+    # towergame.Enemy objects and runs their update; the match keeps
+    # SharedEnemy views for hit checks and replication. Every tick the host
+    # sends each worker the active rooms it owns, so a player walking through
+    # a door hands the simulation of the room they enter to that room's worker.
+    def __init__(self, workers=None, capacity=65536):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = capacity
+        self.block = shared_memory.SharedMemory(create=True, size=capacity * COLUMNS * 8)
+        self.table = np.ndarray((capacity, COLUMNS), dtype=np.float64, buffer=self.block.buf)
+        self.table[:] = 0
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.owners = {}  # (match id, room id) -> worker index
+        self.match_slots = {}  # match id -> slots to free on release
+        self.next_worker = 0
+
+        context = multiprocessing.get_context("spawn")
+        self.connections = []
+        self.processes = []
+        for _ in range(self.workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=shard_worker, args=(child, self.block.name, capacity), daemon=True)
+            process.start()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.last_worker_times = []
+
+    def adopt(self, match):
+        # Hand the match's enemies to the workers, room by room
+        if sum(len(enemies) for enemies in match.enemies.values()) > len(self.free_slots):
+            raise ValueError("shared enemy table is full")
+        batches = [{} for _ in range(self.workers)]
+        slots = []
+        for room_id, enemies in match.enemies.items():
+            key = (match.match_id, room_id)
+            worker = self.next_worker
+            self.next_worker = (worker + 1) % self.workers
+            self.owners[key] = worker
+            owned = []
+            views = []
+            for enemy in enemies:
+                slot = self.free_slots.pop()
+                self.table[slot] = (enemy.x, enemy.y, enemy.alive)
+                owned.append(slot)
+                views.append(SharedEnemy(self.table, slot, enemy.size))
+            slots.extend(owned)
+            batches[worker][key] = (np.array(owned, dtype=np.int64), enemies)
+            match.enemies[room_id] = views
+        self.match_slots[match.match_id] = slots
+        for connection, batch in zip(self.connections, batches):
+            if batch:
+                connection.send(("adopt", batch))
+
+    def release(self, match):
+        keys = [(match.match_id, room_id) for room_id in match.enemies]
+        for connection in self.connections:
+            connection.send(("release", keys))
+        for key in keys:
+            self.owners.pop(key, None)
+        self.free_slots.extend(self.match_slots.pop(match.match_id, ()))
+
+    def step(self, matches):
+        # One enemy tick for the active rooms of every given match, all
+        # workers in parallel; returns once each has finished
+        batches = [[] for _ in range(self.workers)]
+        for match in matches:
+            for room_id in match.active_rooms:
+                key = (match.match_id, room_id)
+                batches[self.owners[key]].append(key)
+        for connection, batch in zip(self.connections, batches):
+            connection.send(("step", batch))
+        self.last_worker_times = [connection.recv() for connection in self.connections]
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.connections = []
+        self.processes = []
+        del self.table
+        self.block.close()
+        self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from sessions import Match, SessionHost, random_bot_inputs
+
+    # Every match ticked every period with a dense horde, so the period time
+    # is the cost of simulating them all
+    matches = 64
+    enemies_per_room = 200
+    periods = 60
+
+    async def bench(shards):
+        host = SessionHost(cpu_budget=float("inf"), shards=shards)
+        host.on_tick = random_bot_inputs
+        for match_id in range(matches):
+            host.add_match(Match(match_id, seed=match_id, enemies_per_room=enemies_per_room))
+        await host.run_period(time.perf_counter())
+        start = time.perf_counter()
+        for _ in range(periods):
+            await host.run_period(time.perf_counter())
+        return (time.perf_counter() - start) / periods
+
+    cores = os.cpu_count() or 1
+    print(f"{matches} matches, {enemies_per_room} enemies/room, {cores} cores")
+    print(f"in process: {asyncio.run(bench(None)) * 1000:6.1f}ms/period")
+    for workers in sorted({1, 2, 4, cores} & set(range(1, cores + 1))):
+        with RoomShards(workers) as shards:
+            elapsed = asyncio.run(bench(shards))
+        print(f"{workers} workers: {elapsed * 1000:6.1f}ms/period")
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+def freeze(values, dtype=np.float32):
+    array = np.array(values, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+class Snapshot:
+    # Read-only copy of what the renderer needs from one simulation tick.
+    # positions: name -> (n, 2) arrays that are interpolated between ticks
+    # when both snapshots have the same entities; state: everything else.
+    __slots__ = ("tick", "time", "positions", "state")
+
+    def __init__(self, tick, time, positions, state):
+        object.__setattr__(self, "tick", tick)
+        object.__setattr__(self, "time", time)
+        object.__setattr__(self, "positions", {name: freeze(value) for name, value in positions.items()})
+        object.__setattr__(self, "state", state)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("snapshots are immutable")
+
+
+class SnapshotBuffer:
+    # The simulation publishes a snapshot per tick and the renderer reads
+    # the last two. Publishing replaces one tuple reference, so a reader
+    # always gets a consistent pair without taking a lock.
+    def __init__(self):
+        self.pair = (None, None)
+
+    def publish(self, snapshot):
+        self.pair = (self.pair[1], snapshot)
+
+    def latest(self):
+        return self.pair
+
+    def clear(self):
+        self.pair = (None, None)
+
+
+def blend_factor(previous, current, now, delay):
+    # How far between the two snapshots to draw, rendering `delay` seconds
+    # in the past so there is usually a newer snapshot to move towards
+    if previous is None or current.time <= previous.time:
+        return 1.0
+    alpha = (now - delay - previous.time) / (current.time - previous.time)
+    return min(1.0, max(0.0, alpha))
+
+
+def interpolate(previous, current, name, alpha):
+    now = current.positions[name]
+    if previous is None or alpha >= 1.0:
+        return now
+    before = previous.positions.get(name)
+    if before is None or before.shape != now.shape:
+        # Entities came or went this tick; nothing to blend with
+        return now
+    return before + (now - before) * alpha
+
+
+class SimulationThread(threading.Thread):
+    # Calls step() at a fixed rate and publishes capture() after each one,
+    # stamped with the tick's scheduled time so spacing stays even
+    def __init__(self, step, capture, buffer, rate):
+        super().__init__(daemon=True)
+        self.step = step
+        self.capture = capture
+        self.buffer = buffer
+        self.period = 1.0 / rate
+        self.stopped = threading.Event()
+        self.tick_times = deque(maxlen=600)
+
+    def run(self):
+        scheduled = time.perf_counter()
+        while not self.stopped.is_set():
+            start = time.perf_counter()
+            self.step()
+            self.buffer.publish(self.capture(scheduled))
+            self.tick_times.append(time.perf_counter() - start)
+            scheduled += self.period
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                self.stopped.wait(delay)
+            else:
+                # Fell behind: skip ahead instead of bursting ticks
+                scheduled = time.perf_counter()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
@@ -0,0 +1,193 @@
+import heapq
+import itertools
+
+# Modifier kinds
+ADD = "add"
+MULTIPLY = "multiply"
+
+# Stats every character has, before class adjustments
+BASE_STATS = {
+    "max_hp": 100,
+    "max_sp": 100,
+    "power": 10,
+    "speed": 5,
+    "attack_range": 40,
+    "attack_delay": 30,  # Frames between attacks
+    "sight_radius": 12,  # Tiles
+    "threat": 1.0,  # Multiplier on threat this character generates
+}
+
+# Class stats from the README: Tank big attack + HP, Cleric high damage but
+# next to no HP, Mage AOE, Archer long range + far vision but slow attacks.
+# Enemies prefer to attack the Tank, so it generates extra threat.
+CLASS_STATS = {
+    "Tank": {"max_hp": 200, "power": 14, "speed": 4, "attack_range": 45, "threat": 2.5},
+    "Cleric": {"max_hp": 40, "power": 18, "attack_range": 40},
+    "Mage": {"max_sp": 150, "power": 12, "attack_range": 90},
+    "Archer": {"power": 11, "attack_range": 250, "attack_delay": 50, "sight_radius": 20},
+}
+
+# Stats that stay whole numbers after modifiers are applied
+INTEGER_STATS = {"max_hp", "max_sp", "attack_range", "attack_delay", "sight_radius"}
+
+
+def class_stats(player_class=None):
+    stats = dict(BASE_STATS)
+    if player_class is not None:
+        stats.update(CLASS_STATS[player_class])
+    return stats
+
+
+class Modifier:
+    def __init__(self, stat, kind, value, source=None, duration=None):
+        self.stat = stat
+        self.kind = kind
+        self.value = value
+        self.source = source
+        self.duration = duration  # Frames, or None for permanent
+        self.expires_at = None
+        self.timer = None
+        self.active = False
+
+
+class StatBlock:
+    # Aggregates base stats and stacked modifiers and writes the results
+    # straight onto the owner, so reads like player.speed stay plain
+    # attribute lookups. Only stats whose modifiers change are recomputed.
+    # Timed modifiers expire through a TimerWheel when one is given, or
+    # through tick() otherwise.
+    def __init__(self, owner, base_stats, timers=None):
+        self.owner = owner
+        self.timers = timers
+        self.base = dict(base_stats)
+        self.modifiers = {stat: [] for stat in self.base}
+        self.expiring = []
+        self.sequence = itertools.count()
+        self.now = 0
+        for stat in self.base:
+            self.recompute(stat)
+
+    def recompute(self, stat):
+        flat = 0
+        scale = 1.0
+        for modifier in self.modifiers[stat]:
+            if modifier.kind == ADD:
+                flat += modifier.value
+            else:
+                scale *= modifier.value
+        value = (self.base[stat] + flat) * scale
+        if stat in INTEGER_STATS:
+            value = int(round(value))
+        setattr(self.owner, stat, value)
+
+    def set_base(self, stat, value):
+        self.base[stat] = value
+        self.modifiers.setdefault(stat, [])
+        self.recompute(stat)
+
+    def schedule(self, modifier):
+        if self.timers is not None:
+            modifier.timer = self.timers.call_later(modifier.duration, self.remove, modifier)
+        else:
+            modifier.expires_at = self.now + modifier.duration
+            heapq.heappush(self.expiring, (modifier.expires_at, next(self.sequence), modifier))
+
+    def add(self, modifier):
+        self.modifiers[modifier.stat].append(modifier)
+        modifier.active = True
+        if modifier.duration is not None:
+            self.schedule(modifier)
+        self.recompute(modifier.stat)
+        return modifier
+
+    def add_many(self, modifiers):
+        # Recompute each touched stat once, however many modifiers it gains
+        touched = set()
+        for modifier in modifiers:
+            self.modifiers[modifier.stat].append(modifier)
+            modifier.active = True
+            if modifier.duration is not None:
+                self.schedule(modifier)
+            touched.add(modifier.stat)
+        for stat in touched:
+            self.recompute(stat)
+
+    def remove(self, modifier):
+        if not modifier.active:
+            return
+        modifier.active = False
+        if modifier.timer is not None:
+            modifier.timer.cancel()
+        self.modifiers[modifier.stat].remove(modifier)
+        self.recompute(modifier.stat)
+
+    def remove_source(self, source):
+        touched = set()
+        for stat, modifiers in self.modifiers.items():
+            kept = [m for m in modifiers if m.source != source]
+            if len(kept) != len(modifiers):
+                for modifier in modifiers:
+                    if modifier.source == source:
+                        modifier.active = False
+                        if modifier.timer is not None:
+                            modifier.timer.cancel()
+                self.modifiers[stat] = kept
+                touched.add(stat)
+        for stat in touched:
+            self.recompute(stat)
+
+    def tick(self, frames=1):
+        # Expire temporary modifiers; cost depends on how many expire, not how many exist
+        self.now += frames
+        touched = set()
+        while self.expiring and self.expiring[0][0] <= self.now:
+            _, _, modifier = heapq.heappop(self.expiring)
+            if modifier.active:
+                modifier.active = False
+                self.modifiers[modifier.stat].remove(modifier)
+                touched.add(modifier.stat)
+        for stat in touched:
+            self.recompute(stat)
+
+
+# Soul mechanic modifiers from the README
+def consumed_soul_modifiers(source="soul"):
+    # Both classes at once, but the power of both is greatly reduced
+    return [
+        Modifier("power", MULTIPLY, 0.5, source),
+        Modifier("attack_range", MULTIPLY, 0.75, source),
+    ]
+
+
+def split_soul_modifiers(source="split"):
+    # Both halves get maximum class power but half HP and SP
+    return [
+        Modifier("max_hp", MULTIPLY, 0.5, source),
+        Modifier("max_sp", MULTIPLY, 0.5, source),
+        Modifier("power", MULTIPLY, 1.5, source),
+    ]
+
+
+if __name__ == "__main__":
+    import time
+
+    class Dummy:
+        pass
+
+    # Read cost with dozens of active modifiers
+    dummy = Dummy()
+    block = StatBlock(dummy, class_stats("Tank"))
+    for i in range(48):
+        block.add(Modifier("power", ADD, 1, source=i % 4))
+        block.add(Modifier("speed", MULTIPLY, 1.01, source=i % 4, duration=100 + i))
+    start = time.perf_counter()
+    total = 0
+    for _ in range(1000000):
+        total += dummy.speed
+    read_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(200):
+        block.tick()
+    tick_time = time.perf_counter() - start
+    print(f"1M speed reads: {read_time * 1000:.1f}ms, 200 ticks: {tick_time * 1000:.2f}ms")
+    print(f"speed={dummy.speed:.2f} power={dummy.power}")
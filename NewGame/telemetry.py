@@ -0,0 +1,232 @@
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+TELEMETRY_DIR = "telemetry"
+
+# File layout: header, then fixed-size records back to back
+MAGIC = b"SBTL"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, record size
+RECORD = struct.Struct("<dHHiff")  # unix time, kind, room, value, x, y
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("kind", "<u2"), ("room", "<u2"), ("value", "<i4"),
+                         ("x", "<f4"), ("y", "<f4")])
+
+# Event kinds
+HIT = 1  # value: enemy index
+PLAYER_DEATH = 2  # value: enemy index
+PICKUP = 3  # value: points
+DOOR = 4  # value: room entered
+INTERACT = 5  # value: index in the room's objects
+
+KIND_NAMES = {HIT: "hit", PLAYER_DEATH: "player death", PICKUP: "pickup", DOOR: "door", INTERACT: "interact"}
+
+# Ring buffer size in records, how often it is written out, and when files rotate
+CAPACITY = 1 << 16
+FLUSH_INTERVAL = 0.25
+FILE_LIMIT = 16 * 1024 * 1024
+KEEP_FILES = 8
+
+
+class TelemetryLog:
+    # Append-only event log. log() stores one record's fields into
+    # preallocated column lists and bumps a counter: no packing, no clock
+    # read, no locks, no I/O. Records carry the time of the last stamp(),
+    # which the game calls once a frame. A writer thread gathers everything
+    # between its position and the counter into a RECORD_DTYPE array every
+    # flush_interval and appends it to the current file, starting a new file
+    # past file_limit bytes and deleting the oldest past keep_files. If the
+    # ring fills before the writer catches up, records are dropped and
+    # counted rather than stalling the game; the writer is woken early once
+    # the ring is half full.
+    def __init__(self, directory=TELEMETRY_DIR, capacity=CAPACITY, flush_interval=FLUSH_INTERVAL,
+                 file_limit=FILE_LIMIT, keep_files=KEEP_FILES):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.file_limit = file_limit
+        self.keep_files = keep_files
+        self.times = [0.0] * capacity
+        self.kinds = [0] * capacity
+        self.rooms = [0] * capacity
+        self.values = [0] * capacity
+        self.xs = [0.0] * capacity
+        self.ys = [0.0] * capacity
+        self.columns = (self.times, self.kinds, self.rooms, self.values, self.xs, self.ys)
+        self.half = capacity >> 1
+        self.now = time.time()
+        self.written = 0  # Records logged; only the game thread moves this
+        self.saved = 0  # Records copied out; only the writer moves this
+        self.dropped = 0
+        self.file = None
+        self.file_number = 0
+        self.error = None
+        self.wake = threading.Event()
+        self.stopped = False
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    def stamp(self, now=None):
+        # Time for the records logged until the next stamp
+        self.now = time.time() if now is None else now
+
+    def log(self, kind, room=0, value=0, x=0.0, y=0.0):
+        written = self.written
+        queued = written - self.saved
+        if queued >= self.capacity:
+            self.dropped += 1
+            return
+        i = written % self.capacity
+        self.times[i] = self.now
+        self.kinds[i] = kind
+        self.rooms[i] = room
+        self.values[i] = value
+        self.xs[i] = x
+        self.ys[i] = y
+        self.written = written + 1
+        if queued == self.half:
+            # Half full: don't wait for the next interval
+            self.wake.set()
+
+    def writer(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            stopping = self.stopped
+            try:
+                self.write_out()
+            except OSError as error:
+                self.error = error
+            except OverflowError as error:
+                # A field out of range for its column; the queued records can't be written
+                self.error = error
+                self.saved = self.written
+            if stopping:
+                break
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_out(self):
+        written = self.written
+        saved = self.saved
+        if written == saved:
+            return
+        count = written - saved
+        start = saved % self.capacity
+        end = start + count
+        records = np.empty(count, dtype=RECORD_DTYPE)
+        for name, column in zip(RECORD_DTYPE.names, self.columns):
+            # The unread span may wrap past the end of the ring
+            span = column[start:end] if end <= self.capacity else column[start:] + column[:end - self.capacity]
+            records[name] = np.fromiter(span, RECORD_DTYPE[name], count)
+        if self.file is None or self.file.tell() >= self.file_limit:
+            self.rotate()
+        self.file.write(records.tobytes())
+        self.file.flush()
+        self.saved = written
+
+    def rotate(self):
+        if self.file is not None:
+            self.file.close()
+        existing = log_files(self.directory)
+        if existing:
+            self.file_number = max(self.file_number, int(os.path.basename(existing[-1])[10:16]))
+        self.file_number += 1
+        self.file = open(os.path.join(self.directory, f"telemetry-{self.file_number:06d}.bin"), "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        for old in existing[:max(0, len(existing) + 1 - self.keep_files)]:
+            os.remove(old)
+
+    def flush(self):
+        # Write out everything logged so far; for tests and shutdown
+        while self.saved != self.written and self.thread.is_alive():
+            self.wake.set()
+            time.sleep(0.001)
+
+    def close(self):
+        self.stopped = True
+        self.wake.set()
+        self.thread.join()
+
+
+def log_files(directory=TELEMETRY_DIR):
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith("telemetry-") and name.endswith(".bin"))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or size != RECORD.size:
+            raise ValueError(f"{path} is not a telemetry log")
+        data = f.read()
+    # A record cut short by a crash is left off
+    usable = len(data) - len(data) % RECORD.size
+    return np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+
+
+def read_telemetry(directory=TELEMETRY_DIR, kind=None):
+    # Every record still on disk, oldest first, as one structured array;
+    # records["time"], records["x"] etc. are plain NumPy columns
+    parts = [read_file(path) for path in log_files(directory)]
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+    if kind is not None:
+        records = records[records["kind"] == kind]
+    return records
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    if len(sys.argv) > 1:
+        # python telemetry.py <directory>: summarize a recorded log
+        records = read_telemetry(sys.argv[1])
+        for kind, count in zip(*np.unique(records["kind"], return_counts=True)):
+            print(f"{KIND_NAMES.get(int(kind), kind)}: {count}")
+        sys.exit()
+
+    # A burst that fits in half the ring, the cost a game frame sees, then
+    # two million events in frames of 256. Between frames the game waits for
+    # the next one, which is when the writer gets to run; log_time is only
+    # the time spent in the frames.
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory)
+        log.stamp()
+        burst = CAPACITY // 2 - 1
+        start = time.perf_counter()
+        for i in range(burst):
+            log.log(HIT, 1, i, 1.5, 2.5)
+        burst_time = time.perf_counter() - start
+        log.close()
+        assert len(read_telemetry(directory)) == burst
+
+    count = 2_000_000
+    frame = 256
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, file_limit=4 * 1024 * 1024, keep_files=1000)
+        log_time = 0.0
+        for first in range(0, count, frame):
+            time.sleep(0)
+            log.stamp()
+            start = time.perf_counter()
+            for i in range(first, min(first + frame, count)):
+                log.log(HIT, i & 0xFFFF, i, 1.5, 2.5)
+            log_time += time.perf_counter() - start
+        log.close()
+        start = time.perf_counter()
+        records = read_telemetry(directory)
+        read_time = time.perf_counter() - start
+        files = len(log_files(directory))
+        assert len(records) == count - log.dropped
+        if not log.dropped:
+            assert (records["value"] == np.arange(count)).all()
+        print(f"burst of {burst}: {burst_time / burst * 1e9:.0f}ns/event; sustained {count} events: "
+              f"{log_time / count * 1e9:.0f}ns/event, {log.dropped} dropped, {files} files, "
+              f"read back in {read_time * 1000:.0f}ms")
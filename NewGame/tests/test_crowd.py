@@ -0,0 +1,55 @@
+import numpy as np
+import pygame
+
+from crowd import CrowdSteering
+from grid import UniformGrid, build_collision_grid
+
+RADIUS = 15
+
+
+class Wall:
+    def __init__(self, x, y, width, height):
+        self.rect = pygame.Rect(x, y, width, height)
+
+
+def chase(count, steering, speed=2.0, seed=3):
+    # count enemies chasing the middle of a walled arena until all arrive;
+    # returns their final positions
+    side = 960
+    walls = [Wall(0, 0, side, 20), Wall(0, side - 20, side, 20),
+             Wall(0, 0, 20, side), Wall(side - 20, 0, 20, side)]
+    collision_grid = build_collision_grid(walls, side, side)
+    positions = np.random.default_rng(seed).uniform(40, side - 40, (count, 2))
+    target = np.array([side / 2, side / 2])
+    crowd = CrowdSteering()
+    for _ in range(side // 2 // int(speed) + 100):
+        towards = target - positions
+        length = np.maximum(np.sqrt((towards * towards).sum(axis=1)), 1e-9)
+        steps = towards / length[:, None] * np.minimum(speed, length)[:, None]
+        if steering:
+            steps = crowd.steer(positions, steps, RADIUS, collision_grid, [target], 20)
+        positions += steps
+    return positions
+
+
+def overlapping_pairs(positions):
+    # Pairs of bodies overlapping by more than a quarter of a radius
+    i, _ = UniformGrid(2 * RADIUS).build(positions).neighbor_pairs(positions, 2 * RADIUS - RADIUS / 4)
+    return len(i)
+
+
+def test_steered_enemies_do_not_pile_up_on_their_target():
+    count = 300
+    steered = overlapping_pairs(chase(count, True))
+    piled = overlapping_pairs(chase(count, False))
+    assert steered <= count // 100
+    assert piled > count * 10
+
+
+def test_neighbor_pairs_come_once_each():
+    positions = np.random.default_rng(1).uniform(0, 200, (500, 2))
+    i, j = UniformGrid(20).build(positions).neighbor_pairs(positions, 20)
+    assert (i < j).all()
+    delta = positions[:, None, :] - positions[None, :, :]
+    close = np.triu((delta * delta).sum(axis=2) < 400, 1)
+    assert sorted(zip(i.tolist(), j.tolist())) == list(zip(*np.nonzero(close)))
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from loot import CHEST_LOOT, SOUL_EXCHANGE, AliasSampler, Entry, LootTable, room_rng
+
+
+def chi_square_limit(outcomes):
+    # 99.9th percentile of chi-square, good enough for up to a dozen degrees of freedom
+    return 3.3 * (outcomes - 1) + 10
+
+
+def chi_square(observed, expected):
+    return float((((observed - expected) ** 2) / expected).sum())
+
+
+def flat_odds(table, key):
+    # Odds worked out straight from the weights, to check the alias table against
+    outcomes = []
+    weights = []
+    table._flatten(table, 1.0, key, outcomes, weights)
+    return np.array(weights)
+
+
+def test_compiled_odds_match_weights():
+    context = {"floor": 4, "boss": True}
+    expected = flat_odds(SOUL_EXCHANGE, (True,))
+    assert np.allclose(expected, [chance for _, chance in SOUL_EXCHANGE.probabilities(context)])
+
+
+def test_bulk_draws_follow_odds():
+    context = {"floor": 4, "boss": True}
+    size = 500_000
+    _, picks, counts = SOUL_EXCHANGE.roll_many(size, room_rng(1, 0), context)
+    expected = flat_odds(SOUL_EXCHANGE, (True,))
+    observed = np.bincount(picks, minlength=len(expected))
+    assert chi_square(observed, expected * size) < chi_square_limit(len(expected))
+    assert (counts >= 1).all() and counts.max() <= 15
+
+
+def test_single_draws_follow_odds():
+    context = {"floor": 4, "boss": True}
+    size = 200_000
+    rng = room_rng(1, 0)
+    expected = flat_odds(SOUL_EXCHANGE, (True,))
+    _, sampler = SOUL_EXCHANGE.compile(context)
+    observed = np.zeros(len(expected))
+    for _ in range(size):
+        observed[sampler.draw(rng)] += 1
+    assert chi_square(observed, expected * size) < chi_square_limit(len(expected))
+
+
+def test_nested_tables_fold_into_parent():
+    # Potions are 40% of exchanges, elixirs a tenth of those
+    chances = dict((item, chance) for (item, _), chance in SOUL_EXCHANGE.probabilities({"boss": True}))
+    assert abs(chances["elixir"] - 0.04) < 1e-9
+
+
+def test_conditions_gate_entries():
+    ordinary = [item for (item, _), _ in SOUL_EXCHANGE.probabilities({"boss": False})]
+    boss = [item for (item, _), _ in SOUL_EXCHANGE.probabilities({"boss": True})]
+    assert "flame trail" not in ordinary
+    assert "flame trail" in boss
+
+
+def test_same_seed_and_room_same_drops():
+    first = [CHEST_LOOT.roll(room_rng(9, 2)) for _ in range(5)]
+    assert first == [CHEST_LOOT.roll(room_rng(9, 2)) for _ in range(5)]
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0]])
+def test_alias_sampler_rejects_empty_weights(weights):
+    with pytest.raises(ValueError):
+        AliasSampler(weights)
+
+
+def test_table_cannot_contain_itself():
+    table = LootTable("loop", [(1, "gold")])
+    table.entries.append(Entry(1, table))
+    with pytest.raises(ValueError):
+        table._collect_conditions(table, set())
@@ -0,0 +1,36 @@
+import asyncio
+import struct
+
+import pytest
+
+from netserver import INPUT, MSG_INPUT, MSG_JOIN, MSG_WELCOME, GameServer, pack_message, read_message
+
+
+async def drop_after(payload):
+    # Join, send payload, and report whether the server hung up and freed the
+    # slot without an error escaping its handler
+    errors = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+    server = GameServer()
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(pack_message(MSG_JOIN))
+        kind, _ = await read_message(reader)
+        assert kind == MSG_WELCOME
+        writer.write(payload)
+        closed = await asyncio.wait_for(reader.read(), 2.0) == b""
+        writer.close()
+        await asyncio.sleep(0)
+        return closed and not server.clients and not errors
+    finally:
+        server.server.close()
+
+
+@pytest.mark.parametrize("payload", [
+    struct.pack("<H", 0),
+    pack_message(MSG_INPUT, INPUT.pack(1, 1, 0)[:-1]),
+    pack_message(MSG_INPUT, INPUT.pack(1, 1, 0) + b"\0"),
+], ids=["empty frame", "short input", "long input"])
+def test_bad_messages_drop_the_client(payload):
+    assert asyncio.run(drop_after(payload))
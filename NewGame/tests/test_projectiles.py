@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+import pygame
+
+from grid import TILE_SIZE, build_collision_grid
+from projectiles import ProjectileSystem, raycast_grid
+
+
+class Wall:
+    def __init__(self, x, y, width, height):
+        self.rect = pygame.Rect(x, y, width, height)
+
+
+def thin_wall_grid(x=400):
+    # One tile thick, across the whole room
+    return build_collision_grid([Wall(x, 0, TILE_SIZE, 600)], 800, 600)
+
+
+def test_fast_projectile_stops_at_a_thin_wall():
+    system = ProjectileSystem()
+    # Far further per tick than the wall is thick, at a slant
+    for angle in (0.0, 0.3, -0.7):
+        system.fire(100, 300, angle, speed=700)
+    struck, _, _ = system.update(thin_wall_grid())
+    assert len(struck) == 0 and system.count == 0
+    assert len(system.wall_hits) == 3
+    assert np.allclose(system.wall_hits[:, 0], 400)
+
+
+def test_raycast_returns_the_fraction_before_the_wall():
+    grid = thin_wall_grid()
+    start = np.array([[100.0, 300.0], [100.0, 300.0], [500.0, 300.0]])
+    delta = np.array([[600.0, 0.0], [200.0, 0.0], [200.0, 0.0]])
+    t = raycast_grid(start, delta, grid)
+    assert np.isclose(t[0], 0.5) and np.isinf(t[1]) and np.isinf(t[2])
+
+
+def test_fast_projectile_hits_a_small_target_it_passes():
+    system = ProjectileSystem()
+    empty = np.zeros((30, 40), dtype=bool)
+    system.fire(100, 300, 0.0, "arrow", owner=3, damage=2.5, speed=500)
+    # A target smaller than one tick of travel, halfway along it
+    struck, damage, owner = system.update(empty, [(350, 302)], 2)
+    assert struck.tolist() == [0] and damage.tolist() == [2.5] and owner.tolist() == [3]
+    assert system.count == 0
+
+
+def test_first_target_along_the_path_wins():
+    system = ProjectileSystem()
+    empty = np.zeros((30, 40), dtype=bool)
+    system.fire(100, 300, 0.0, speed=500)
+    system.fire(500, 100, math.pi, speed=500)
+    targets = [(450, 300), (250, 300), (150, 100), (300, 100)]
+    struck, _, _ = system.update(empty, targets, 4)
+    assert sorted(struck.tolist()) == [1, 3]
+
+
+def test_wall_shields_a_target_behind_it():
+    system = ProjectileSystem()
+    system.fire(100, 300, 0.0, speed=600)
+    struck, _, _ = system.update(thin_wall_grid(), [(600, 300)], 10)
+    assert len(struck) == 0 and len(system.wall_hits) == 1
+
+
+def test_projectiles_fly_until_their_lifetime_ends():
+    system = ProjectileSystem()
+    empty = np.zeros((300, 400), dtype=bool)
+    system.fire(100, 100, 0.0, "arrow")
+    for _ in range(44):
+        system.update(empty)
+    assert system.count == 1 and np.isclose(system.pos[0, 0], 100 + 44 * 14.0)
+    system.update(empty)
+    assert system.count == 0
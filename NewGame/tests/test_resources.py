@@ -0,0 +1,120 @@
+import pytest
+
+from resources import (ACCURACY_DELAY, ACCURACY_INTERVAL, ACCURACY_PER_SHOT, ACCURACY_REGEN, ATTACK, DAMAGE_TAKEN,
+                       ITEM_USED, KILL, MANA_PER_SPELL, SOUL_CONSUMED, SOUL_PER_KILL, SPLIT, EventBus, ResourceSystem)
+from stats import StatBlock, class_stats
+from timers import TimerWheel
+
+
+class Character:
+    def __init__(self, player_class, timers):
+        self.stats = StatBlock(self, class_stats(player_class), timers)
+
+
+@pytest.fixture
+def timers():
+    return TimerWheel()
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def system(bus, timers):
+    return ResourceSystem(bus, timers)
+
+
+def test_events_wait_for_dispatch_and_batch_by_kind(bus):
+    batches = []
+    bus.subscribe(KILL, batches.append)
+    bus.publish(KILL, "a", 1)
+    bus.publish(DAMAGE_TAKEN, "a", 5)
+    bus.publish(KILL, "b", 2)
+    assert batches == []
+    assert bus.dispatch() == 3
+    assert batches == [[(KILL, "a", 1, None), (KILL, "b", 2, None)]]
+    assert bus.dispatch() == 0
+
+
+def test_events_change_only_their_class_resource(bus, system):
+    tank, cleric, mage = object(), object(), object()
+    system.add_player(tank, "Tank", 100)
+    system.add_player(cleric, "Cleric", 100)
+    system.add_player(mage, "Mage", 100)
+    for player in (tank, cleric, mage):
+        bus.publish(DAMAGE_TAKEN, player, 40)
+        bus.publish(KILL, player, 2)
+        bus.publish(ATTACK, player)
+    bus.dispatch()
+    assert system.get(tank, "rage") == 20
+    assert system.get(cleric, "soul") == 2 * SOUL_PER_KILL
+    assert system.get(mage, "mana") == 150 - MANA_PER_SPELL
+    bus.publish(ITEM_USED, mage, detail="spellbook")
+    bus.dispatch()
+    assert system.get(mage, "mana") == 150
+    assert system.get(tank, "mana") is None
+
+
+def test_accuracy_comes_back_after_the_last_shot(bus, system, timers):
+    archer = object()
+    system.add_player(archer, "Archer", 100)
+    for _ in range(2):
+        bus.publish(ATTACK, archer)
+        bus.dispatch()
+        timers.tick(ACCURACY_DELAY - 1)
+    assert system.get(archer, "accuracy") == 100 - 2 * ACCURACY_PER_SHOT
+    timers.tick()
+    assert system.get(archer, "accuracy") == 100 - 2 * ACCURACY_PER_SHOT + ACCURACY_REGEN
+    timers.tick(ACCURACY_INTERVAL * 10)
+    assert system.get(archer, "accuracy") == 100
+    assert archer not in system.regen_timers
+
+
+def test_soul_merge_and_split(bus, system, timers):
+    tank, cleric, half = (Character(player_class, timers) for player_class in ("Tank", "Cleric", "Cleric"))
+    system.add_player(tank, "Tank", 100)
+    system.add_player(cleric, "Cleric", 80)
+    bus.publish(KILL, cleric, 1)
+    bus.dispatch()
+    bus.publish(SOUL_CONSUMED, tank, detail=cleric)
+    bus.dispatch()
+    # The Tank carries the Cleric's bars alongside its own, at reduced power
+    assert set(system.bars[tank]) == {"sp", "rage", "sp2", "soul"}
+    assert system.get(tank, "sp2") == 80 and system.get(tank, "soul") == SOUL_PER_KILL
+    assert cleric not in system.bars
+    assert tank.power == class_stats("Tank")["power"] * 0.5
+
+    # A second soul is refused while carrying one
+    other = object()
+    system.add_player(other, "Mage", 100)
+    bus.publish(SOUL_CONSUMED, tank, detail=other)
+    bus.dispatch()
+    assert other in system.bars and "mana" not in system.bars[tank]
+
+    bus.publish(KILL, tank, 2)
+    bus.publish(DAMAGE_TAKEN, tank, 40)
+    bus.publish(SPLIT, tank, detail=half)
+    bus.dispatch()
+    assert set(system.bars[tank]) == {"sp", "rage"} and set(system.bars[half]) == {"sp", "soul"}
+    assert system.get(tank, "rage") == 20 and system.get(half, "soul") == 3 * SOUL_PER_KILL
+    assert system.bars[tank]["sp"].maximum == 50 and system.bars[half]["sp"].maximum == 40
+    assert tank.power == class_stats("Tank")["power"] * 1.5
+    assert half.max_hp == class_stats("Cleric")["max_hp"] // 2
+
+    # Splitting again does nothing once the soul is gone
+    bus.publish(SPLIT, tank, detail=object())
+    bus.dispatch()
+    assert set(system.bars[tank]) == {"sp", "rage"}
+
+
+def test_remove_player_cancels_regeneration(bus, system, timers):
+    archer = object()
+    system.add_player(archer, "Archer", 100)
+    bus.publish(ATTACK, archer)
+    bus.dispatch()
+    timer = system.regen_timers[archer]
+    system.remove_player(archer)
+    assert not timer.active and system.get(archer, "accuracy") is None
+    timers.tick(ACCURACY_DELAY + ACCURACY_INTERVAL)
@@ -0,0 +1,13 @@
+from runhistory import RunHistory
+
+
+def test_quit_runs_stay_off_the_leaderboard(tmp_path):
+    history = RunHistory(str(tmp_path / "runs.db"))
+    for player_class, score, result in (("knight", 300, "win"), ("knight", 900, "quit"), ("rogue", 200, "dead")):
+        run_id = history.start_run("tower", player_class)
+        history.end_run(run_id, score, 3, result)
+    history.flush()
+    assert [row[2] for row in history.top_runs(10, "tower")] == [300, 200]
+    stats = history.class_stats("tower")
+    assert stats["knight"][:3] == (1, 1, 300) and stats["rogue"][:3] == (1, 0, 200)
+    history.close()
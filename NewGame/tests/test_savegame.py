@@ -0,0 +1,148 @@
+import os
+
+import pytest
+
+from engine import Chest, Key, LockedDoor, Player, Room
+from pointnclickad import SAVE_OBJECTS
+from savegame import (HEADER, RECORD, RECORD_ROOM, Autosaver, SaveError, WorldCodec, journal_path, load_world,
+                      pack_record, save_world)
+
+
+class SavedGame:
+    pass
+
+
+def make_game():
+    hall = Room(0, (10, 20, 30), 1200, 900)
+    hall.add_wall(0, 0, 1200, 20)
+    hall.add_door(1180, 400, 20, 80, 1, 30, 400)
+    hall.add_object(Key(100, 120, 32, 18))
+    chest = hall.add_object(Chest(300, 320, 60, 44))
+    chest.opened = True
+    chest.description = "An empty chest."
+    hall.add_collectible(500, 500)
+    cellar = Room(1, (40, 40, 40))
+    door = cellar.add_object(LockedDoor(380, 0, 40, 60))
+    door.description = "A trapdoor. It won't budge."
+    door.interactive = False
+    game = SavedGame()
+    game.rooms = {0: hall, 1: cellar}
+    game.player = Player(140, 160)
+    game.current_room_id = 1
+    game.score = 75
+    game.inventory = ["Key", "Gold"]
+    game.loot_seed = 3_000_000_000
+    return game
+
+
+def object_state(obj):
+    return (type(obj), tuple(obj.rect), obj.description, obj.visible, obj.interactive,
+            getattr(obj, "opened", None), getattr(obj, "locked", None))
+
+
+def assert_rooms_equal(loaded, rooms):
+    assert sorted(loaded) == sorted(rooms)
+    for room_id, room in rooms.items():
+        copy = loaded[room_id]
+        assert (copy.bg_color, copy.width, copy.height) == (room.bg_color, room.width, room.height)
+        assert copy.wall_rects == room.wall_rects
+        assert [(d.rect, d.leads_to_room, d.spawn_x, d.spawn_y) for d in copy.doors] == \
+            [(d.rect, d.leads_to_room, d.spawn_x, d.spawn_y) for d in room.doors]
+        assert [object_state(obj) for obj in copy.objects] == [object_state(obj) for obj in room.objects]
+        assert [c.rect for c in copy.collectibles] == [c.rect for c in room.collectibles]
+
+
+@pytest.fixture
+def codec():
+    return WorldCodec(Room, SAVE_OBJECTS)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "world.sav")
+
+
+def test_full_save_round_trip(codec, path):
+    game = make_game()
+    save_world(codec, game, path)
+    rooms, state = load_world(codec, path)
+    assert_rooms_equal(rooms, game.rooms)
+    assert state == {"current_room_id": 1, "player_x": 140, "player_y": 160, "score": 75,
+                     "inventory": ["Key", "Gold"], "loot_seed": 3_000_000_000}
+
+
+def test_journal_holds_changed_rooms(codec, path):
+    game = make_game()
+    save_world(codec, game, path)
+    autosaver = Autosaver(codec, path)
+    autosaver.mark_saved(game.rooms)
+    game.rooms[0].take_collectibles(game.rooms[0].collectibles[0].rect)
+    game.score = 80
+    assert autosaver.update(game, force=True) == 1
+    autosaver.flush()
+    autosaver.close()
+    assert autosaver.error is None
+    rooms, state = load_world(codec, path)
+    assert not rooms[0].collectibles and state["score"] == 80
+    assert_rooms_equal(rooms, game.rooms)
+
+
+def test_torn_journal_is_cut_back_before_appending(codec, path):
+    game = make_game()
+    save_world(codec, game, path)
+    autosaver = Autosaver(codec, path)
+    autosaver.mark_saved(game.rooms)
+    game.rooms[1].objects[0].locked = False
+    game.rooms[1].changes += 1
+    autosaver.update(game, force=True)
+    autosaver.close()
+
+    # A crash partway through the next append
+    record = pack_record(RECORD_ROOM, codec.encode_room(game.rooms[0]))
+    with open(journal_path(path), "ab") as f:
+        f.write(record[:RECORD.size + 5])
+    rooms, _ = load_world(codec, path)
+    assert not rooms[1].objects[0].locked
+
+    # The next run appends after the last intact record, where loading can reach it
+    autosaver = Autosaver(codec, path)
+    autosaver.mark_saved(game.rooms)
+    game.rooms[0].collectibles.clear()
+    game.rooms[0].changes += 1
+    autosaver.update(game, force=True)
+    autosaver.close()
+    assert autosaver.error is None
+    rooms, _ = load_world(codec, path)
+    assert_rooms_equal(rooms, game.rooms)
+
+
+def test_compact_folds_the_journal_into_the_save(codec, path):
+    game = make_game()
+    save_world(codec, game, path)
+    autosaver = Autosaver(codec, path)
+    autosaver.mark_saved(game.rooms)
+    game.rooms[0].objects[1].opened = False
+    game.rooms[0].changes += 1
+    autosaver.update(game, force=True)
+    autosaver.flush()
+    autosaver.compact()
+    autosaver.close()
+    assert not os.path.exists(journal_path(path))
+    rooms, state = load_world(codec, path)
+    assert_rooms_equal(rooms, game.rooms)
+    assert state["loot_seed"] == game.loot_seed
+
+
+def test_rejects_other_files(codec, path):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(b"NOPE", 1, 0))
+    with pytest.raises(SaveError):
+        load_world(codec, path)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(b"SBSV", 2, 0))
+    with pytest.raises(SaveError):
+        load_world(codec, path)
+    with open(path, "wb") as f:
+        f.write(b"SB")
+    with pytest.raises(SaveError):
+        load_world(codec, path)
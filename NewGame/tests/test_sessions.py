@@ -0,0 +1,47 @@
+import math
+import random
+
+from lagcomp import MAX_REWIND
+from sessions import ATTACK_KEY, ATTACK_RANGE, Match
+
+
+def collectible_spots(match):
+    return {room_id: [tuple(c.rect) for c in room.collectibles] for room_id, room in match.rooms.items()}
+
+
+def test_seeded_matches_place_the_same_collectibles():
+    random.seed(1)
+    first = Match(0, seed=5)
+    random.seed(2)
+    second = Match(1, seed=5)
+    assert collectible_spots(first) == collectible_spots(second)
+    assert collectible_spots(first) != collectible_spots(Match(2, seed=6))
+
+
+def attack_from(match, x, y, view_tick):
+    player = match.players[0]
+    player.place(int(x) - player.width // 2, int(y) - player.height // 2)
+    match.set_input(0, [ATTACK_KEY], view_tick)
+    match.tick()
+
+
+def test_a_delayed_attack_hits_the_enemy_where_the_attacker_saw_it():
+    present, rewound = Match(0, seed=3), Match(1, seed=3)
+    for match in (present, rewound):
+        for _ in range(5):
+            match.tick()
+    seen_tick = rewound.tick_count
+    seen = [(enemy.x, enemy.y) for enemy in rewound.enemies[0]]
+    for match in (present, rewound):
+        for _ in range(MAX_REWIND):
+            match.tick()
+    # The enemy that moved furthest is now out of reach of where the client saw it
+    moved = [math.dist(spot, (enemy.x, enemy.y)) for spot, enemy in zip(seen, rewound.enemies[0])]
+    index = moved.index(max(moved))
+    assert moved[index] > ATTACK_RANGE
+    seen_x, seen_y = seen[index]
+
+    attack_from(present, seen_x, seen_y, None)
+    attack_from(rewound, seen_x, seen_y, seen_tick)
+    assert present.enemies[0][index].alive
+    assert not rewound.enemies[0][index].alive and rewound.scores[0] >= 100
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from sessions import ATTACK_KEY, Match, SessionHost, random_bot_inputs
+from shards import RoomShards
+
+
+@pytest.fixture(scope="module")
+def shards():
+    with RoomShards(workers=2, capacity=4096) as shards:
+        yield shards
+
+
+def run_periods(host, periods):
+    async def run():
+        for _ in range(periods):
+            await host.run_period(0.0)
+    asyncio.run(run())
+
+
+def enemy_positions(match):
+    return {room_id: [(enemy.x, enemy.y, enemy.alive) for enemy in enemies]
+            for room_id, enemies in match.enemies.items()}
+
+
+def test_sharded_rooms_step_like_the_single_process_host(shards):
+    local = SessionHost(cpu_budget=float("inf"))
+    sharded = SessionHost(cpu_budget=float("inf"), shards=shards)
+    for host in (local, sharded):
+        host.on_tick = random_bot_inputs
+        for match_id in range(3):
+            host.add_match(Match(match_id, seed=match_id))
+    run_periods(local, 90)
+    run_periods(sharded, 90)
+    for a, b in zip(local.matches, sharded.matches):
+        assert a.player_rooms == b.player_rooms
+        assert enemy_positions(a) == enemy_positions(b)
+    for match in list(sharded.matches):
+        sharded.remove_match(match)
+    assert not shards.owners
+
+
+def test_a_kill_on_the_coordinator_stops_the_worker_enemy(shards):
+    host = SessionHost(cpu_budget=float("inf"), shards=shards)
+    match = host.add_match(Match(7, seed=7))
+    enemy = match.enemies[0][0]
+    player = match.players[0]
+    # Put the enemy in reach and attack
+    player.place(int(enemy.x) - player.width // 2, int(enemy.y) - player.height // 2)
+    match.set_input(0, [ATTACK_KEY])
+    run_periods(host, 1)
+    assert not enemy.alive
+    x, y = enemy.x, enemy.y
+    run_periods(host, 10)
+    assert (enemy.x, enemy.y) == (x, y) and not enemy.alive
+    host.remove_match(match)
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from telemetry import DOOR, HEADER, HIT, MAGIC, PICKUP, RECORD, TelemetryLog, log_files, read_file, read_telemetry
+
+
+def test_write_then_read(tmp_path):
+    log = TelemetryLog(str(tmp_path), flush_interval=0.01)
+    log.stamp(100.0)
+    log.log(HIT, 2, 7, 10.5, 20.25)
+    log.log(PICKUP, 2, 50, 1.0, 2.0)
+    log.stamp(101.5)
+    log.log(DOOR, 3, 3)
+    log.flush()
+    log.close()
+    assert log.error is None and log.dropped == 0
+    records = read_telemetry(str(tmp_path))
+    assert records["kind"].tolist() == [HIT, PICKUP, DOOR]
+    assert records["room"].tolist() == [2, 2, 3]
+    assert records["value"].tolist() == [7, 50, 3]
+    assert records["x"].tolist() == [10.5, 1.0, 0.0] and records["y"].tolist() == [20.25, 2.0, 0.0]
+    # Records carry the time of the frame's stamp
+    assert records["time"].tolist() == [100.0, 100.0, 101.5]
+    assert read_telemetry(str(tmp_path), PICKUP)["value"].tolist() == [50]
+
+
+def test_ring_wraps_and_files_rotate(tmp_path):
+    # A small ring written out several times over, into files a few records long
+    log = TelemetryLog(str(tmp_path), capacity=8, flush_interval=0.01,
+                       file_limit=HEADER.size + 10 * RECORD.size, keep_files=3)
+    for i in range(100):
+        log.log(HIT, 0, i)
+        log.flush()
+    log.close()
+    assert log.dropped == 0
+    files = log_files(str(tmp_path))
+    assert len(files) == 3
+    values = read_telemetry(str(tmp_path))["value"]
+    # The oldest files are gone, the rest is the newest records in order
+    assert values.tolist() == list(range(100 - len(values), 100))
+
+
+def test_full_ring_drops_instead_of_blocking(tmp_path):
+    log = TelemetryLog(str(tmp_path), capacity=4)
+    log.close()
+    # With the writer gone nothing is copied out, so the ring stays full
+    for i in range(10):
+        log.log(HIT, 0, i)
+    assert log.written == 4 and log.dropped == 6
+
+
+def test_torn_record_is_left_off(tmp_path):
+    log = TelemetryLog(str(tmp_path), flush_interval=0.01)
+    log.log(HIT, 1, 1)
+    log.log(HIT, 1, 2)
+    log.close()
+    (path,) = log_files(str(tmp_path))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+    assert read_file(path)["value"].tolist() == [1]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "telemetry-000001.bin"
+    path.write_bytes(HEADER.pack(MAGIC, 1, RECORD.size + 1))
+    with pytest.raises(ValueError):
+        read_file(str(path))
@@ -0,0 +1,62 @@
+from timers import SLOTS, TimerWheel
+
+
+def test_one_shot_fires_once_at_its_deadline():
+    wheel = TimerWheel()
+    fired = []
+    timer = wheel.call_later(5, fired.append, "done")
+    assert wheel.tick(4) == 0 and timer.remaining() == 1
+    assert wheel.tick() == 1 and fired == ["done"]
+    assert not timer.active and timer.remaining() == 0
+    wheel.tick(100)
+    assert fired == ["done"]
+
+
+def test_repeating_timer_fires_every_interval():
+    wheel = TimerWheel()
+    fired = []
+    timer = wheel.call_every(10, lambda: fired.append(wheel.now), delay=3)
+    wheel.tick(35)
+    assert fired == [3, 13, 23, 33]
+    assert timer.active and timer.remaining() == 8
+
+
+def test_long_delays_cascade_down_the_levels():
+    wheel = TimerWheel()
+    fired = []
+    # One delay filed in each level, each pulled down a level at a time
+    delays = [SLOTS - 1, SLOTS + 1, SLOTS * SLOTS + 7, SLOTS ** 3 + 3]
+    for delay in delays:
+        wheel.call_later(delay, lambda: fired.append(wheel.now))
+    for delay in delays:
+        wheel.tick(delay - wheel.now)
+        assert fired[-1] == delay
+    assert fired == delays
+
+
+def test_cancel_and_clear():
+    wheel = TimerWheel()
+    fired = []
+    kept = wheel.call_later(2, fired.append, "kept")
+    cancelled = wheel.call_later(2, fired.append, "cancelled")
+    repeating = wheel.call_every(1, fired.append, "repeat")
+    cancelled.cancel()
+    cancelled.cancel()
+    wheel.tick(2)
+    assert fired == ["repeat", "kept", "repeat"]
+    repeating.cancel()
+    wheel.tick(5)
+    assert fired.count("repeat") == 2 and "cancelled" not in fired
+    wheel.call_later(1, fired.append, "cleared")
+    wheel.clear()
+    wheel.tick(5)
+    assert "cleared" not in fired and not kept.active
+
+
+def test_callback_cancels_a_timer_in_the_same_batch():
+    wheel = TimerWheel()
+    fired = []
+    first = wheel.call_later(4, lambda: (fired.append("first"), second.cancel()))
+    second = wheel.call_later(4, lambda: (fired.append("second"), first.cancel()))
+    assert wheel.tick(4) == 1
+    assert len(fired) == 1
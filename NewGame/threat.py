@@ -0,0 +1,219 @@
+import heapq
+import itertools
+
+# Share of threat kept each tick
+THREAT_DECAY = 0.99
+
+# Enemies forget everyone once their highest threat decays below this
+FORGET_BELOW = 1.0
+
+# Healing draws this much threat per point healed, split across the enemies
+# targeting the healed player. Shares under FORGET_BELOW are dropped, so a
+# heal in the middle of a horde costs nothing instead of touching every enemy.
+HEAL_THREAT = 0.5
+
+# A taunt puts the taunter this far above the enemy's current top threat
+TAUNT_MARGIN = 1.1
+
+# Threat a taunt gives against an enemy that has no threat on anyone yet
+TAUNT_THREAT = 20.0
+
+# Stored values are rescaled once the decay factor grows past this
+RESCALE_AT = 1e100
+
+
+class ThreatTable:
+    # Per-enemy threat tables with each enemy's target kept up to date as
+    # threat arrives, so reading a target is a dict lookup.
+    #
+    # Decay is the same for every entry, so it never changes who is on top:
+    # values are stored multiplied by a growing factor instead of being
+    # decayed one by one, and each enemy's heap only changes on events.
+    # Players can be any hashable object; a "threat" attribute (from the
+    # stat block) scales the threat they generate.
+    def __init__(self, decay=THREAT_DECAY, forget_below=FORGET_BELOW):
+        self.decay = decay
+        self.forget_below = forget_below
+        self.growth = 1.0
+        self.tables = {}  # enemy -> {player: stored threat}
+        self.heaps = {}  # enemy -> [(-stored, seq, player)], stale entries skipped on read
+        self.targets = {}  # enemy -> player
+        self.targeted_by = {}  # player -> set of enemies targeting them
+        self.engaged = {}  # player -> set of enemies with any threat on them
+        self.expiring = []  # (stored top threat, seq, enemy), smallest forgotten first
+        self.sequence = itertools.count()
+
+    def clear(self):
+        self.__init__(self.decay, self.forget_below)
+
+    def threat(self, enemy, player):
+        return self.tables.get(enemy, {}).get(player, 0.0) / self.growth
+
+    def target(self, enemy):
+        return self.targets.get(enemy)
+
+    def enemies_targeting(self, player):
+        return self.targeted_by.get(player, set())
+
+    def add(self, enemy, player, amount):
+        amount *= getattr(player, "threat", 1.0)
+        self._raise(enemy, player, amount * self.growth)
+
+    def add_damage(self, enemy, player, damage):
+        self.add(enemy, player, damage)
+
+    def add_heal(self, healer, healed, amount):
+        enemies = self.targeted_by.get(healed)
+        if not enemies:
+            return
+        share = amount * HEAL_THREAT / len(enemies)
+        if share * getattr(healer, "threat", 1.0) < self.forget_below:
+            return
+        for enemy in list(enemies):
+            self.add(enemy, healer, share)
+
+    def taunt(self, enemy, player):
+        # Jump straight to the top of the enemy's table
+        table = self.tables.get(enemy, {})
+        top = self.targets.get(enemy)
+        if top is player:
+            return
+        stored = table[top] * TAUNT_MARGIN if top is not None else TAUNT_THREAT * self.growth
+        self._raise(enemy, player, stored - table.get(player, 0.0))
+
+    def tick(self, ticks=1):
+        # Decay is a single multiply; only enemies whose top threat falls
+        # below the forget threshold are touched
+        self.growth /= self.decay ** ticks
+        if self.growth > RESCALE_AT:
+            self._rescale()
+        threshold = self.forget_below * self.growth
+        while self.expiring and self.expiring[0][0] < threshold:
+            stored, _, enemy = heapq.heappop(self.expiring)
+            table = self.tables.get(enemy)
+            if table is None:
+                continue
+            top = self.targets.get(enemy)
+            if top is not None and table[top] == stored:
+                self.remove_enemy(enemy)
+
+    def remove_enemy(self, enemy):
+        table = self.tables.pop(enemy, None)
+        if table is None:
+            return
+        del self.heaps[enemy]
+        for player in table:
+            self.engaged[player].discard(enemy)
+        self._set_target(enemy, None)
+
+    def remove_player(self, player):
+        for enemy in list(self.engaged.pop(player, ())):
+            table = self.tables[enemy]
+            del table[player]
+            if not table:
+                self.remove_enemy(enemy)
+            elif self.targets.get(enemy) is player:
+                self._retarget(enemy)
+        self.targeted_by.pop(player, None)
+
+    def _raise(self, enemy, player, stored_amount):
+        table = self.tables.get(enemy)
+        if table is None:
+            table = self.tables[enemy] = {}
+            self.heaps[enemy] = []
+        stored = table.get(player, 0.0) + stored_amount
+        table[player] = stored
+        self.engaged.setdefault(player, set()).add(enemy)
+        heap = self.heaps[enemy]
+        heapq.heappush(heap, (-stored, next(self.sequence), player))
+        if len(heap) > 2 * len(table) + 8:
+            # Drop stale entries before the heap outgrows the table
+            heap[:] = [(-value, next(self.sequence), p) for p, value in table.items()]
+            heapq.heapify(heap)
+        current = self.targets.get(enemy)
+        if current is None or current is player or stored > table[current]:
+            self._set_target(enemy, player)
+            heapq.heappush(self.expiring, (stored, next(self.sequence), enemy))
+
+    def _top(self, enemy):
+        table = self.tables[enemy]
+        heap = self.heaps[enemy]
+        while heap:
+            negative, _, player = heap[0]
+            if table.get(player) == -negative:
+                return player
+            heapq.heappop(heap)
+        return None
+
+    def _retarget(self, enemy):
+        top = self._top(enemy)
+        self._set_target(enemy, top)
+        if top is not None:
+            heapq.heappush(self.expiring, (self.tables[enemy][top], next(self.sequence), enemy))
+
+    def _set_target(self, enemy, player):
+        previous = self.targets.get(enemy)
+        if previous is player:
+            return
+        if previous is not None:
+            self.targeted_by[previous].discard(enemy)
+        if player is None:
+            self.targets.pop(enemy, None)
+        else:
+            self.targets[enemy] = player
+            self.targeted_by.setdefault(player, set()).add(enemy)
+
+    def _rescale(self):
+        scale = 1.0 / self.growth
+        self.growth = 1.0
+        for enemy, table in self.tables.items():
+            for player in table:
+                table[player] *= scale
+            heap = self.heaps[enemy] = [(-value, next(self.sequence), p) for p, value in table.items()]
+            heapq.heapify(heap)
+        self.expiring = [(self.tables[enemy][player], next(self.sequence), enemy)
+                         for enemy, player in self.targets.items()]
+        heapq.heapify(self.expiring)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from stats import StatBlock, class_stats
+
+    class Character:
+        def __init__(self, player_class):
+            self.player_class = player_class
+            self.stats = StatBlock(self, class_stats(player_class))
+
+    # A horde of 10,000 enemies against a four-player party, with a few
+    # hundred damage events, some heals and a taunt every tick
+    rng = random.Random(3)
+    party = [Character(name) for name in ("Tank", "Cleric", "Mage", "Archer")]
+    enemies = list(range(10000))
+    table = ThreatTable()
+    ticks = 300
+    event_time = 0.0
+    read_time = 0.0
+    for tick in range(ticks):
+        start = time.perf_counter()
+        for _ in range(300):
+            table.add_damage(rng.choice(enemies), rng.choice(party), rng.uniform(5, 20))
+        for _ in range(5):
+            table.add_heal(party[1], rng.choice(party), 30)
+        table.taunt(rng.choice(enemies), party[0])
+        table.tick()
+        event_time += time.perf_counter() - start
+        start = time.perf_counter()
+        for enemy in enemies:
+            table.target(enemy)
+        read_time += time.perf_counter() - start
+    start = time.perf_counter()
+    naive_targets = {enemy: max(threats, key=threats.get) for enemy, threats in table.tables.items()}
+    scan_time = time.perf_counter() - start
+    assert naive_targets == table.targets
+    print(f"{len(enemies)} enemies: events + decay {event_time / ticks * 1000:.2f}ms/tick, "
+          f"target reads {read_time / ticks * 1000:.2f}ms/tick (full rescan {scan_time * 1000:.2f}ms)")
+    for character in party:
+        print(f"{character.player_class:7s} targeted by {len(table.enemies_targeting(character))} enemies")
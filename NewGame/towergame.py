@@ -1,153 +1,294 @@
 import pygame
 import random
 import math
+import sys
+import time
 
-# Initialize Pygame
-pygame.init()
+import numpy as np
 
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-FPS = 60
+from assets import get_font
+from behavior import FAILURE, RUNNING, SUCCESS, BehaviorGroup, CompiledTree
+from crowd import CrowdSteering
+from engine import Mode, movement
+from engine.config import BLACK, BLUE, DARK_GREEN, FPS, GRAY, GREEN, RED, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE
+from grid import build_collision_grid
+from lagcomp import PositionHistory
+from particles import ParticleSystem
+from projectiles import ProjectileSystem
+from resources import ATTACK, DAMAGE_TAKEN, KILL, EventBus, ResourceSystem
+from runhistory import RunHistory
+from snapshots import SimulationThread, Snapshot, SnapshotBuffer, blend_factor, interpolate
+from stats import StatBlock, class_stats
+from telemetry import HIT, PLAYER_DEATH, TelemetryLog
+from threat import ThreatTable
+from timers import TimerWheel
 
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
+# Colors of this mode's own that the shared palette lacks
 PURPLE = (128, 0, 128)
-GRAY = (128, 128, 128)
-DARK_GREEN = (0, 128, 0)
+
+# Threaded mode (--threaded): the simulation ticks at SIM_RATE, which must
+# divide FPS, while drawing interpolates between ticks at up to RENDER_FPS
+SIM_RATE = 30
+RENDER_FPS = 144
+
+# Frames at the start of an attack during which it hits
+ATTACK_FRAMES = 5
+
+# Classes that attack by firing projectiles instead of a melee sweep
+RANGED_CLASSES = {"Archer": "arrow", "Mage": "bolt"}
+
+# Enemies closer than this to a player build PROXIMITY_THREAT on them every frame
+AGGRO_RADIUS = 150
+PROXIMITY_THREAT = 5
+
+ENEMY_SPEED = 2
+DEATH_FRAMES = 20
 
 class Player:
-    def __init__(self, x, y):
+    def __init__(self, x, y, timers, player_class=None):
         self.x = x
         self.y = y
         self.size = 20
-        self.speed = 5
         self.color = BLUE
         self.enemies_defeated = 0
-        self.attack_range = 40
-        self.attack_cooldown = 0
-        
-    def move(self, keys):
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.x -= self.speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.x += self.speed
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            self.y -= self.speed
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            self.y += self.speed
+        self.timers = timers
+        self.attack_timer = None
+        self.facing = 0.0  # Angle in radians, updated when moving
+        self.player_class = player_class
+        # Sets speed, attack_range, attack_delay, max_hp, ... as attributes
+        self.stats = StatBlock(self, class_stats(player_class), timers)
+    
+    @property
+    def attack_cooldown(self):
+        return self.attack_timer.remaining() if self.attack_timer is not None else 0
+        
+    def move(self, keys, frames=1):
+        dx, dy = movement(keys)
+        if dx or dy:
+            step = self.speed * frames
+            self.x += dx * step
+            self.y += dy * step
+            self.facing = math.atan2(dy, dx)
             
         # Keep player on screen
         self.x = max(self.size, min(SCREEN_WIDTH - self.size, self.x))
         self.y = max(self.size, min(SCREEN_HEIGHT - self.size, self.y))
     
-    def update(self):
-        # Update attack cooldown
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= 1
-    
     def attack(self):
         if self.attack_cooldown == 0:
-            self.attack_cooldown = 30  # 30 frames cooldown (0.5 seconds at 60 FPS)
+            # 30 frames by default (0.5 seconds at 60 FPS)
+            self.attack_timer = self.timers.call_later(self.attack_delay)
             return True
         return False
     
+    def is_attacking(self):
+        # Ranged classes hit through their projectiles, not a melee sweep
+        if self.player_class in RANGED_CLASSES:
+            return False
+        return self.attack_cooldown > self.attack_delay - ATTACK_FRAMES
+    
+    def look(self):
+        # Plain copy of what drawing needs besides the position
+        return self.size, self.color, self.attack_range, self.is_attacking()
+    
     def draw(self, screen):
-        # Change color when attacking
-        color = RED if self.attack_cooldown > 25 else self.color
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), self.size)
-        # Draw a small white dot in the center to show direction
-        pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), 3)
-        
-        # Draw attack range when attacking
-        if self.attack_cooldown > 25:
-            pygame.draw.circle(screen, (255, 0, 0, 50), (int(self.x), int(self.y)), self.attack_range, 2)
+        draw_player(screen, self.x, self.y, self.look())
     
     def get_rect(self):
         return pygame.Rect(self.x - self.size, self.y - self.size, 
                           self.size * 2, self.size * 2)
 
+def draw_player(screen, x, y, look):
+    size, color, attack_range, attacking = look
+    # Change color when attacking
+    if attacking:
+        color = RED
+    pygame.draw.circle(screen, color, (int(x), int(y)), size)
+    # Draw a small white dot in the center to show direction
+    pygame.draw.circle(screen, WHITE, (int(x), int(y)), 3)
+    
+    # Draw attack range when attacking
+    if attacking:
+        pygame.draw.circle(screen, (255, 0, 0, 50), (int(x), int(y)), attack_range, 2)
+
 # Remove the Collectible class entirely since we don't need it anymore
 
 class Enemy:
-    def __init__(self, x, y):
+    # rng picks the starting direction, so a seeded caller gets the same
+    # enemies every run. The enemy stays inside bounds, a (width, height)
+    # room size, and bounces off wall_rects.
+    def __init__(self, x, y, timers, rng=random, bounds=(SCREEN_WIDTH, SCREEN_HEIGHT), wall_rects=()):
         self.x = x
         self.y = y
         self.size = 15
-        self.speed = 2
+        self.speed = ENEMY_SPEED
         self.color = RED
-        self.direction_x = random.choice([-1, 1])
-        self.direction_y = random.choice([-1, 1])
+        self.direction_x = rng.choice([-1, 1])
+        self.direction_y = rng.choice([-1, 1])
+        self.width, self.height = bounds
+        self.wall_rects = wall_rects
         self.alive = True
-        self.death_animation = 0
+        self.timers = timers
+        self.death_timer = None
+        self.target = None  # Set from the threat table
+    
+    def __setstate__(self, state):
+        # Room shards pickle enemies to their workers; setting the attributes
+        # one by one keeps the compact layout __init__ gives, which updates
+        # about a third faster than the default restore
+        for name, value in state.items():
+            setattr(self, name, value)
+    
+    @property
+    def death_animation(self):
+        return self.death_timer.remaining() if self.death_timer is not None else 0
         
-    def update(self):
+    def update(self, frames=1):
         if not self.alive:
-            if self.death_animation > 0:
-                self.death_animation -= 1
             return
-            
-        self.x += self.speed * self.direction_x
-        self.y += self.speed * self.direction_y
+        self.move(*self.plan(frames))
+    
+    def plan(self, frames=1):
+        # Where this enemy wants to go this tick, before crowd steering
+        step = self.speed * frames
         
-        # Bounce off walls
-        if self.x <= self.size or self.x >= SCREEN_WIDTH - self.size:
+        # Head for whoever holds the most threat
+        if self.target is not None:
+            if abs(self.target.x - self.x) > step:
+                self.direction_x = 1 if self.target.x > self.x else -1
+            if abs(self.target.y - self.y) > step:
+                self.direction_y = 1 if self.target.y > self.y else -1
+        return step * self.direction_x, step * self.direction_y
+    
+    def move(self, dx, dy):
+        # Each axis separately, so an enemy slides along a wall it hits
+        if self.wall_rects:
+            rect = self.get_rect()
+            if rect.move(int(dx), 0).collidelist(self.wall_rects) != -1:
+                dx = 0
+                self.direction_x *= -1
+            if rect.move(int(dx), int(dy)).collidelist(self.wall_rects) != -1:
+                dy = 0
+                self.direction_y *= -1
+        self.x += dx
+        self.y += dy
+        
+        # Bounce off the room edge
+        if self.x <= self.size or self.x >= self.width - self.size:
             self.direction_x *= -1
-        if self.y <= self.size or self.y >= SCREEN_HEIGHT - self.size:
+        if self.y <= self.size or self.y >= self.height - self.size:
             self.direction_y *= -1
             
-        # Keep enemy on screen
-        self.x = max(self.size, min(SCREEN_WIDTH - self.size, self.x))
-        self.y = max(self.size, min(SCREEN_HEIGHT - self.size, self.y))
+        # Keep enemy in the room
+        self.x = max(self.size, min(self.width - self.size, self.x))
+        self.y = max(self.size, min(self.height - self.size, self.y))
     
     def take_damage(self):
         self.alive = False
-        self.death_animation = 20  # Animation frames
+        self.death_timer = self.timers.call_later(DEATH_FRAMES)
+    
+    def look(self):
+        # Plain copy of what drawing needs besides the position
+        return self.alive, self.size, self.color
     
     def draw(self, screen):
-        if not self.alive:
-            # Death animation - shrinking red circle
-            if self.death_animation > 0:
-                size = self.size * (self.death_animation / 20)
-                alpha = int(255 * (self.death_animation / 20))
-                color = (*self.color, alpha)
-                # Create a surface for alpha blending
-                death_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-                pygame.draw.circle(death_surface, color, (size, size), size)
-                screen.blit(death_surface, (self.x - size, self.y - size))
-            return
-            
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size)
-        # Draw angry eyes
-        pygame.draw.circle(screen, WHITE, (int(self.x - 5), int(self.y - 5)), 3)
-        pygame.draw.circle(screen, WHITE, (int(self.x + 5), int(self.y - 5)), 3)
-        pygame.draw.circle(screen, BLACK, (int(self.x - 5), int(self.y - 5)), 1)
-        pygame.draw.circle(screen, BLACK, (int(self.x + 5), int(self.y - 5)), 1)
+        draw_enemy(screen, self.x, self.y, self.look())
     
     def get_rect(self):
         return pygame.Rect(self.x - self.size, self.y - self.size,
                           self.size * 2, self.size * 2)
 
-class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Top-Down Combat Game")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+def draw_enemy(screen, x, y, look):
+    alive, size, color = look
+    if not alive:
+        # Death animation is a particle burst spawned by the game
+        return
+    pygame.draw.circle(screen, color, (int(x), int(y)), size)
+    # Draw angry eyes
+    pygame.draw.circle(screen, WHITE, (int(x - 5), int(y - 5)), 3)
+    pygame.draw.circle(screen, WHITE, (int(x + 5), int(y - 5)), 3)
+    pygame.draw.circle(screen, BLACK, (int(x - 5), int(y - 5)), 1)
+    pygame.draw.circle(screen, BLACK, (int(x + 5), int(y - 5)), 1)
+
+# Enemy AI leaves, run over index arrays into Game.enemies
+def target_within(enemies, agents, elapsed, radius):
+    statuses = []
+    for i in agents.tolist():
+        enemy = enemies[i]
+        close = enemy.target is not None and math.hypot(enemy.target.x - enemy.x, enemy.target.y - enemy.y) <= radius
+        statuses.append(SUCCESS if close else FAILURE)
+    return np.array(statuses, dtype=np.int8)
+
+def set_speed_for(enemies, agents, elapsed, speed, frames):
+    for i in agents.tolist():
+        enemies[i].speed = speed
+    return np.where(elapsed >= frames, SUCCESS, RUNNING)
+
+def charge(enemies, agents, elapsed, frames):
+    return set_speed_for(enemies, agents, elapsed, ENEMY_SPEED * 2, frames)
+
+def rest(enemies, agents, elapsed, frames):
+    return set_speed_for(enemies, agents, elapsed, ENEMY_SPEED / 2, frames)
+
+def roam(enemies, agents, elapsed):
+    for i in agents.tolist():
+        enemies[i].speed = ENEMY_SPEED
+    return SUCCESS
+
+# Rush a nearby target, then catch breath; otherwise keep roaming
+ENEMY_TREE = ("selector", [
+    ("sequence", [
+        ("condition", "target_within", 120),
+        ("action", "charge", 30),
+        ("action", "rest", 45),
+    ]),
+    ("action", "roam"),
+])
+ENEMY_BEHAVIOR = CompiledTree(ENEMY_TREE, {"target_within": target_within, "charge": charge,
+                                           "rest": rest, "roam": roam})
+
+class Game(Mode):
+    caption = "Top-Down Combat Game"
+    
+    def __init__(self, player_class=None):
+        super().__init__()
+        self.font = get_font(36)
+        self.small_font = get_font(24)
+        self.particles = ParticleSystem(capacity=8192)
+        self.projectiles = ProjectileSystem(capacity=1024)
+        # No interior walls; the screen edge is the only thing projectiles hit
+        self.collision_grid = build_collision_grid([], SCREEN_WIDTH, SCREEN_HEIGHT)
+        
+        # Enemy position history so hit checks can rewind to what the attacker
+        # saw; it grows if more enemies than this are ever recorded
+        self.history = PositionHistory(64)
+        self.tick = 0
+        self.threat = ThreatTable()
+        # Enemies spread out around their target instead of stacking up
+        self.crowd = CrowdSteering()
+        # Finished runs and kills go to the local leaderboard database
+        self.run_history = RunHistory()
+        self.best_score = 0
+        self.telemetry = TelemetryLog()
+        # Cooldowns, death animations and stat buffs all count down here
+        self.timers = TimerWheel()
+        
+        self.player_class = player_class
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, self.timers, player_class)
+        # Class resources change through gameplay events, dispatched once per tick
+        self.events = EventBus()
+        self.resources = ResourceSystem(self.events, self.timers)
+        self.resources.add_player(self.player, player_class)
         self.enemies = []
         self.game_over = False
         self.win = False
+        self.run_id = self.run_history.start_run("tower", player_class)
         
         self.spawn_enemies()
         
+        # Collect and freeze everything built so far; full collections wait for restarts
+        self.loaded()
+        
     def spawn_enemies(self):
         for _ in range(8):  # More enemies since they're the main objective
             x = random.randint(50, SCREEN_WIDTH - 50)
@@ -156,44 +297,170 @@ class Game:
             while math.sqrt((x - self.player.x)**2 + (y - self.player.y)**2) < 100:
                 x = random.randint(50, SCREEN_WIDTH - 50)
                 y = random.randint(50, SCREEN_HEIGHT - 50)
-            self.enemies.append(Enemy(x, y))
+            self.enemies.append(Enemy(x, y, self.timers))
+        self.enemy_ai = BehaviorGroup(ENEMY_BEHAVIOR, self.enemies, len(self.enemies))
+    
+    def player_attack(self):
+        if not self.player.attack():
+            return
+        self.events.publish(ATTACK, self.player)
+        kind = RANGED_CLASSES.get(self.player.player_class)
+        if kind is not None:
+            self.projectiles.fire(self.player.x, self.player.y, self.player.facing, kind, damage=self.player.power)
+        else:
+            self.particles.ring(self.player.x, self.player.y, self.player.attack_range, 48)
+        # Attacking draws the attention of everything nearby
+        for enemy in self.enemies:
+            if enemy.alive and math.hypot(enemy.x - self.player.x, enemy.y - self.player.y) <= AGGRO_RADIUS:
+                self.threat.add_damage(enemy, self.player, self.player.power)
+    
+    def update_threat(self, frames=1):
+        for enemy in self.enemies:
+            if enemy.alive and math.hypot(enemy.x - self.player.x, enemy.y - self.player.y) <= AGGRO_RADIUS:
+                self.threat.add(enemy, self.player, PROXIMITY_THREAT * frames)
+        self.threat.tick(frames)
+        for enemy in self.enemies:
+            enemy.target = self.threat.target(enemy)
+        self.enemy_ai.tick(np.flatnonzero([enemy.alive for enemy in self.enemies]), frames)
+    
+    def update_world(self, keys, frames=1):
+        self.telemetry.stamp()
+        self.events.dispatch()
+        self.timers.tick(frames)
+        self.player.move(keys, frames)
+        self.update_threat(frames)
+        self.move_enemies(frames)
+        self.record_history()
+        self.particles.update(frames)
+    
+    def step(self, keys, frames=1):
+        self.update_world(keys, frames)
+        # Projectiles move a frame's distance per update
+        for _ in range(frames):
+            self.update_projectiles()
+        self.check_collisions()
+    
+    def update_projectiles(self):
+        living = [index for index, enemy in enumerate(self.enemies) if enemy.alive]
+        positions = [(self.enemies[index].x, self.enemies[index].y) for index in living]
+        struck, _, _ = self.projectiles.update(self.collision_grid, positions,
+                                               [self.enemies[index].size for index in living])
+        for hit in struck.tolist():
+            index = living[hit]
+            enemy = self.enemies[index]
+            if enemy.alive:
+                enemy.take_damage()
+                self.threat.remove_enemy(enemy)
+                self.player.enemies_defeated += 1
+                self.run_history.kill(self.run_id)
+                self.telemetry.log(HIT, 0, index, enemy.x, enemy.y)
+                self.events.publish(KILL, self.player, 1)
+                self.particles.burst(enemy.x, enemy.y, 40, "blood", speed=2.5, life=enemy.death_animation)
+        for x, y in self.projectiles.wall_hits.tolist():
+            self.particles.burst(x, y, 8, "spark", speed=2.0, life=12)
+    
+    def move_enemies(self, frames=1):
+        # Every living enemy's own step, steered together: apart from each
+        # other, along with their neighbors, off the screen edge and out of
+        # the player's body
+        living = [enemy for enemy in self.enemies if enemy.alive]
+        if not living:
+            return
+        steps = self.crowd.steer([(enemy.x, enemy.y) for enemy in living],
+                                 [enemy.plan(frames) for enemy in living],
+                                 [enemy.size for enemy in living], self.collision_grid,
+                                 [(self.player.x, self.player.y)], self.player.size, frames)
+        for enemy, (dx, dy) in zip(living, steps.tolist()):
+            enemy.move(dx, dy)
+    
+    def record_history(self):
+        self.tick += 1
+        self.history.record(self.tick, [(enemy.x, enemy.y) for enemy in self.enemies],
+                            [enemy.alive for enemy in self.enemies])
     
     def check_collisions(self):
         player_rect = self.player.get_rect()
         
-        # Check if player attacked
-        if self.player.attack_cooldown > 25:  # Attack is happening
-            for enemy in self.enemies:
+        # Check if player attacked. Local play sees the present tick; networked
+        # matches rewind to the client's acked snapshot (sessions.Match)
+        if self.player.is_attacking():
+            hits = self.history.hits_in_radius(self.tick, self.player.x, self.player.y,
+                                               self.player.attack_range, len(self.enemies))
+            for index in hits.tolist():
+                enemy = self.enemies[index]
                 if enemy.alive:
-                    enemy_rect = enemy.get_rect()
-                    distance = math.sqrt((self.player.x - enemy.x)**2 + (self.player.y - enemy.y)**2)
-                    if distance <= self.player.attack_range:
-                        enemy.take_damage()
-                        self.player.enemies_defeated += 1
+                    enemy.take_damage()
+                    self.threat.remove_enemy(enemy)
+                    self.particles.burst(enemy.x, enemy.y, 40, "blood", speed=2.5, life=enemy.death_animation)
+                    self.player.enemies_defeated += 1
+                    self.run_history.kill(self.run_id)
+                    self.telemetry.log(HIT, 0, index, enemy.x, enemy.y)
+                    self.events.publish(KILL, self.player, 1)
         
         # Check enemy collisions with player (only living enemies)
-        for enemy in self.enemies:
+        for index, enemy in enumerate(self.enemies):
             if enemy.alive and player_rect.colliderect(enemy.get_rect()):
+                self.telemetry.log(PLAYER_DEATH, 0, index, self.player.x, self.player.y)
+                self.events.publish(DAMAGE_TAKEN, self.player, self.player.max_hp)
                 self.game_over = True
+                self.end_run("dead")
                 return
         
         # Check win condition - all enemies defeated
         if all(not enemy.alive for enemy in self.enemies):
             self.win = True
+            self.end_run("win")
     
-    def draw_hud(self):
-        defeated_text = self.font.render(f"Enemies Defeated: {self.player.enemies_defeated}", True, WHITE)
+    def end_run(self, result):
+        if self.run_id is None:
+            return
+        history = self.run_history
+        score = self.player.enemies_defeated
+        if result == "win":
+            history.room_cleared(self.run_id, 0, history.elapsed(self.run_id))
+        history.end_run(self.run_id, score, self.player.enemies_defeated, result)
+        self.run_id = None
+        # This run may still be on its way to disk, so count it separately
+        best = history.top_runs(1, "tower", self.player_class)
+        self.best_score = max(score, best[0][2] if best else 0)
+    
+    def close(self):
+        self.end_run("quit")
+        self.run_history.close()
+        self.telemetry.close()
+        super().close()
+    
+    def hud_state(self):
+        bars = self.resources.bars.get(self.player, {})
+        resource = next(((name, bar.value, bar.maximum) for name, bar in bars.items() if name != "sp"), None)
+        return {
+            "defeated": self.player.enemies_defeated,
+            "remaining": sum(1 for enemy in self.enemies if enemy.alive),
+            "cooling_down": self.player.attack_cooldown > 0,
+            "game_over": self.game_over,
+            "win": self.win,
+            "best": self.best_score,
+            "resource": resource,
+        }
+    
+    def draw_hud(self, hud):
+        defeated_text = self.font.render(f"Enemies Defeated: {hud['defeated']}", True, WHITE)
         self.screen.blit(defeated_text, (10, 10))
         
-        remaining = sum(1 for enemy in self.enemies if enemy.alive)
-        remaining_text = self.small_font.render(f"Enemies left: {remaining}", True, WHITE)
+        remaining_text = self.small_font.render(f"Enemies left: {hud['remaining']}", True, WHITE)
         self.screen.blit(remaining_text, (10, 50))
         
         # Attack cooldown indicator
-        if self.player.attack_cooldown > 0:
+        if hud["cooling_down"]:
             cooldown_text = self.small_font.render("Attacking!", True, RED)
             self.screen.blit(cooldown_text, (10, 80))
         
+        # Class resource (Rage, Soul, Mana or Accuracy)
+        if hud["resource"] is not None:
+            name, value, maximum = hud["resource"]
+            resource_text = self.small_font.render(f"{name.title()}: {int(value)}/{maximum}", True, WHITE)
+            self.screen.blit(resource_text, (10, 110))
+        
         # Instructions
         instructions = [
             "Use WASD or Arrow keys to move",
@@ -205,86 +472,204 @@ class Game:
             text = self.small_font.render(instruction, True, GRAY)
             self.screen.blit(text, (10, SCREEN_HEIGHT - 80 + i * 20))
     
-    def draw_game_over(self):
+    def draw_game_over(self, hud):
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         overlay.set_alpha(128)
         overlay.fill(BLACK)
         self.screen.blit(overlay, (0, 0))
         
-        if self.win:
+        if hud["win"]:
             title = self.font.render("YOU WIN!", True, GREEN)
-            message = self.font.render(f"Enemies Defeated: {self.player.enemies_defeated}", True, WHITE)
+            message = self.font.render(f"Enemies Defeated: {hud['defeated']}", True, WHITE)
         else:
             title = self.font.render("GAME OVER", True, RED)
-            message = self.font.render(f"Enemies Defeated: {self.player.enemies_defeated}", True, WHITE)
+            message = self.font.render(f"Enemies Defeated: {hud['defeated']}", True, WHITE)
         
+        best_text = self.small_font.render(f"Best run: {hud['best']}", True, GRAY)
         restart_text = self.small_font.render("Press R to restart or ESC to quit", True, WHITE)
         
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         message_rect = message.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
+        best_rect = best_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
+        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
         
         self.screen.blit(title, title_rect)
         self.screen.blit(message, message_rect)
+        self.screen.blit(best_text, best_rect)
         self.screen.blit(restart_text, restart_rect)
     
     def restart(self):
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.timers.clear()
+        self.resources.remove_player(self.player)
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, self.timers, self.player_class)
+        self.events.clear()
+        self.resources.add_player(self.player, self.player_class)
         self.enemies = []
         self.game_over = False
         self.win = False
+        self.run_id = self.run_history.start_run("tower", self.player_class)
+        self.particles.clear()
+        self.projectiles.clear()
+        self.history.clear()
+        self.threat.clear()
         self.spawn_enemies()
+        self.loaded()
+    
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_r and (self.game_over or self.win):
+                self.restart()
+                return True
+            if event.key == pygame.K_SPACE and not self.game_over and not self.win:
+                self.player_attack()
+                return True
+        return super().handle_event(event)
+    
+    def update(self, keys):
+        if self.game_over or self.win:
+            return
+        # Update game objects
+        self.update_world(keys)
+        self.profiler.mark("update")
+        
+        self.update_projectiles()
+        self.check_collisions()
+        self.profiler.mark("collisions")
+    
+    def draw(self):
+        self.screen.fill(DARK_GREEN)
+        
+        # Draw enemies
+        for enemy in self.enemies:
+            enemy.draw(self.screen)
+        self.projectiles.draw(self.screen)
+        self.particles.draw(self.screen)
+        
+        # Draw player
+        self.player.draw(self.screen)
+        
+        # Draw HUD
+        hud = self.hud_state()
+        self.draw_hud(hud)
+        
+        # Draw game over screen if needed
+        if self.game_over or self.win:
+            self.draw_game_over(hud)
+    
+    def capture(self, scheduled):
+        # Everything draw_snapshot needs, copied into plain values so the
+        # simulation can carry on; no live game objects cross threads
+        return Snapshot(self.tick, scheduled, {
+            "player": [(self.player.x, self.player.y)],
+            "enemies": [(enemy.x, enemy.y) for enemy in self.enemies] or np.zeros((0, 2)),
+        }, {
+            "player": self.player.look(),
+            "enemies": tuple(enemy.look() for enemy in self.enemies),
+            "projectiles": self.projectiles.export(),
+            "particles": self.particles.export(),
+            "hud": self.hud_state(),
+        })
+    
+    def draw_snapshot(self, previous, current, alpha, frames):
+        state = current.state
+        self.screen.fill(DARK_GREEN)
+        
+        enemy_positions = interpolate(previous, current, "enemies", alpha)
+        for look, (x, y) in zip(state["enemies"], enemy_positions.tolist()):
+            draw_enemy(self.screen, x, y, look)
+        
+        # Projectiles fly straight, so step them back along their velocity
+        # instead of matching them up between snapshots
+        self.projectile_view.load(state["projectiles"])
+        count = self.projectile_view.count
+        self.projectile_view.pos[:count] -= self.projectile_view.vel[:count] * frames * (1.0 - alpha)
+        self.projectile_view.draw(self.screen)
+        self.particle_view.load(state["particles"])
+        self.particle_view.draw(self.screen)
+        
+        (x, y), = interpolate(previous, current, "player", alpha).tolist()
+        draw_player(self.screen, x, y, state["player"])
+        
+        self.draw_hud(state["hud"])
+        if state["hud"]["game_over"] or state["hud"]["win"]:
+            self.draw_game_over(state["hud"])
+    
+    def threaded_step(self, frames):
+        # Runs on the simulation thread; input arrives through these fields
+        if self.game_over or self.win:
+            return
+        if self.attack_requested:
+            self.attack_requested = False
+            self.player_attack()
+        self.step(self.held_keys, frames)
     
-    def run(self):
+    def run_threaded(self, sim_rate=SIM_RATE):
+        # The simulation ticks on its own thread at sim_rate; this thread
+        # (which owns the window) only handles input and draws, blending
+        # the two newest snapshots one tick in the past
+        frames = FPS // sim_rate
+        self.held_keys = pygame.key.get_pressed()
+        self.attack_requested = False
+        self.projectile_view = ProjectileSystem(self.projectiles.capacity)
+        self.particle_view = ParticleSystem(self.particles.capacity)
+        snapshots = SnapshotBuffer()
+        
+        def start_simulation():
+            snapshots.clear()
+            snapshots.publish(self.capture(time.perf_counter()))
+            simulation = SimulationThread(lambda: self.threaded_step(frames), self.capture, snapshots, sim_rate)
+            simulation.start()
+            return simulation
+        
+        simulation = start_simulation()
         running = True
         
         while running:
+            self.profiler.begin_frame()
+            previous, current = snapshots.latest()
+            hud = current.state["hud"]
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
-                    elif event.key == pygame.K_r and (self.game_over or self.win):
+                    elif event.key == pygame.K_r and (hud["game_over"] or hud["win"]):
+                        # Restart here, with the simulation stopped, so the
+                        # GC pacing in loaded() stays on this thread
+                        simulation.stop()
                         self.restart()
-                    elif event.key == pygame.K_SPACE and not self.game_over and not self.win:
-                        self.player.attack()
-            
-            if not self.game_over and not self.win:
-                # Get pressed keys for smooth movement
-                keys = pygame.key.get_pressed()
-                
-                # Update game objects
-                self.player.update()
-                self.player.move(keys)
-                
-                for enemy in self.enemies:
-                    enemy.update()
-                
-                self.check_collisions()
-            
-            # Draw everything
-            self.screen.fill(DARK_GREEN)
-            
-            # Draw enemies
-            for enemy in self.enemies:
-                enemy.draw(self.screen)
-            
-            # Draw player
-            self.player.draw(self.screen)
-            
-            # Draw HUD
-            self.draw_hud()
+                        simulation = start_simulation()
+                        previous, current = snapshots.latest()
+                        hud = current.state["hud"]
+                    elif event.key == pygame.K_SPACE:
+                        self.attack_requested = True
+                    else:
+                        self.profiler.handle_event(event)
+            self.held_keys = pygame.key.get_pressed()
+            self.profiler.mark("events")
             
-            # Draw game over screen if needed
-            if self.game_over or self.win:
-                self.draw_game_over()
+            alpha = blend_factor(previous, current, time.perf_counter(), 1.0 / sim_rate)
+            self.draw_snapshot(previous, current, alpha, frames)
+            self.profiler.draw_overlay(self.screen)
+            self.profiler.mark("draw")
             
             pygame.display.flip()
-            self.clock.tick(FPS)
+            self.profiler.mark("flip")
+            self.profiler.end_frame()
+            self.clock.tick(RENDER_FPS)
+            self.hitches.tick()
         
+        simulation.stop()
+        self.close()
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    # Optional class name, e.g. python towergame.py Archer; --threaded
+    # simulates at SIM_RATE on a separate thread and interpolates drawing
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    game = Game(args[0] if args else None)
+    if "--threaded" in sys.argv:
+        game.run_threaded()
+    else:
+        game.run()
\ No newline at end of file